@@ -2,7 +2,17 @@ import sys, time, threading, logging, redis, math
 from commlib.node import Node
 from commlib.transports.redis import ConnectionParameters
 from streamsimdsl.utils.visualizer import EnvVisualizer
-from streamsimdsl.utils.geometry import node_pose_callback
+from streamsimdsl.utils.geometry import node_pose_callback, PoseMessage, PoseArrayMessage
+from streamsimdsl.utils.registry import NodeRegistry
+from streamsimdsl.utils.batch import BatchAffectionEngine
+from streamsimdsl.utils.static import StaticInfluenceTable
+from streamsimdsl.utils.rng import RandomStreams
+from streamsimdsl.utils.visibility import VisibilityIndex
+from streamsimdsl.utils.fields import FieldEngine
+from streamsimdsl.utils.diffusion import DiffusionEngine, DIFFUSION_CELL
+from streamsimdsl.utils.collisions import detect_collisions, contacts_by_entity
+from streamsimdsl.utils.occupancy import OccupancyGrid
+from streamsimdsl.utils.transforms import TransformTree
 # Affection handlers
 from streamsimdsl.utils.affections import check_affectability
 {# KEY FIX: Store ORIGINAL values before lowercasing #}
@@ -143,79 +153,7 @@ from streamsimdsl.generated_files.{{ folder }}.{{ instance_name }} import {{ Rpc
 
     {{ parts | join('.') }}
 {%- endmacro %}
-{% macro render_properties(obj) -%}
-    "properties": {
-                {% set excluded = [
-                    "class","type","subtype","shape","pubFreq","name","dataModel",
-                    "_tx_position","_tx_model","_tx_position_end","parent",
-                    "actuators","sensors","composites","targets"
-                ] %}
-                {% for attr, val in obj.__dict__.items()
-                if attr not in excluded and val is not none %}
-                "{{ attr }}":
-                    {%- if val is number -%} {{ val }}
-                    {%- elif val is string -%} "{{ val }}"
-                    {%- elif val.__class__.__name__ in [
-                        "Constant","Linear","Quadratic","Exponential","Logarithmic",
-                        "Gaussian","Uniform","CustomNoise"
-                    ] -%}
-                    {
-                    "type": "{{ val.__class__.__name__ }}",
-                    {%- for k,v in val.__dict__.items()
-                        if k not in ["_tx_model","_tx_position","_tx_position_end","parent","ref"]
-                        and v is not none -%}
-                        "{{ k }}": {{ v|tojson }},
-                    {%- endfor -%}
-                    }
-                    {%- elif val.__class__.__name__ == "list" and val and
-                    val[0].__class__.__name__ in ["TargetPose","Point","Angle","Pose"] -%}
-                    [
-                    {%- for tp in val -%}
-                        {%- if tp.__class__.__name__ == "TargetPose" -%}
-                            {%- if tp.point is defined and tp.point is not none -%}
-                                {"x": {{ tp.point.x }}, "y": {{ tp.point.y }}}
-                            {%- elif tp.angle is defined and tp.angle is not none -%}
-                                {"angle": {{ tp.angle.value }}}
-                            {%- endif -%}
-                        {%- elif tp.__class__.__name__ == "Point" -%}
-                            {"x": {{ tp.x }}, "y": {{ tp.y }}}
-                        {%- elif tp.__class__.__name__ == "Angle" -%}
-                            {"angle": {{ tp.value }}}
-                        {%- elif tp.__class__.__name__ == "Pose" -%}
-                            {"x": {{ tp.x }}, "y": {{ tp.y }}, "theta": {{ tp.theta }}}
-                        {%- endif -%}
-                        {%- if not loop.last %}, {% endif %}
-                    {%- endfor -%}
-                    ]
-                    {%- elif val.__class__.__name__ == "list"
-                        and val
-                        and val[0].__class__.__name__ == "AffectEntry" -%}
-                    [
-                        {%- for entry in val -%}
-                            {
-                    "id": "{{ entry.id }}"
-                    {%- if entry.dispersion is not none -%},
-                        "dispersion": {
-                            "type": "{{ entry.dispersion.__class__.__name__ }}"
-                            {%- for k,v in entry.dispersion.__dict__.items()
-                                if k not in ["_tx_model","_tx_position","_tx_position_end","parent","ref"]
-                                and v is not none -%},
-                                "{{ k }}": {{ v|tojson }}
-                            {%- endfor -%}
-                        }
-                    {%- endif -%}
-                    {%- if entry.target_value is not none -%},
-                    "target_value": {{ entry.target_value }}
-                    {%- endif -%}
-                    }
-                    {%- if not loop.last %}, {% endif %}
-                        {%- endfor -%}
-                    ]
-                    {%- else -%} {{ val|tojson }}
-                    {%- endif -%},
-                {% endfor %}
-            }
-{%- endmacro %}
+{% from "properties.tpl" import render_properties %}
 {% macro render_shape(shape) -%}
 "type": "{{ shape.__class__.__name__ }}",
         {% if shape.__class__.__name__ == "Rectangle" %}
@@ -360,73 +298,10 @@ from streamsimdsl.generated_files.{{ folder }}.{{ instance_name }} import {{ Rpc
         {% endif %}
     {% endfor %}
 {% endmacro %}
-{% macro register_pose_subscribers(parent_ref, parents=None) %}
-    {% if parents is none %}
-        {% set parents = [] %}
-    {% endif %}
-    
-    {# === Child composites === #}
-    {% for comp in parent_ref.composites %}
-        {% set cname = comp.ref.name|lower %}
-        {% set ctype = (comp.ref.type|lower if comp.ref.type else comp.ref.__class__.__name__|lower) %}
-        {% set topic_base = topic_prefix(comp.ref, parents) | trim %}
-        self.{{ cname }}_pose_sub = self.create_subscriber(
-            topic=f"{{ topic_base }}.{{ cname }}.pose",
-            msg_type=PoseMessage,
-            on_message=lambda msg, name="{{ cname }}": \
-                self.node_pose_callback({
-                    "class": "composite",
-                    "type": "{{ ctype }}",
-                    "name": "{{ cname }}",
-                    "x": msg.x, "y": msg.y, "theta": msg.theta
-                },
-                parent_pose=self.get_node_pose(
-                    "{{ parents[-1][1] if parents else '' }}",
-                    cls="composite",
-                    type="{{ parents[-1][0] if parents else '' }}"
-                ))
-        )
-        {{ register_pose_subscribers(comp.ref, parents + [(ctype, cname)]) }}
-    {% endfor %}
-    {# === Atomic children === #}
-    {% for child in parent_ref.sensors + parent_ref.actuators %}
-        {% set child_class = child.ref.class|lower if child.ref.class is defined else "" %}
-        {% set child_type = child.ref.__class__.__name__ %}
-        {% set category =
-            "sensor" if child_class == "sensor" else
-            "actuator" if child_class == "actuator" else
-            "actor" if child_class == "actor" else
-            "obstacle" if child_class == "obstacle" else
-            "composites" if child_type == "CompositeThing"
-        %}
-        {% set chid = child.ref.name|lower %}
-        {% set chtype = child.ref.type|lower if child.ref.type else child.ref.__class__.__name__|lower %}
-        {% set chsub = child.ref.subtype|lower if child.ref.subtype is defined else None %}
-        {% set topic_base = topic_prefix(child.ref, parents) | trim %}
-        self.{{ chid }}_pose_sub = self.create_subscriber(
-            topic=f"{{ topic_base }}.{{ chid }}.pose",
-            msg_type=PoseMessage,
-            on_message=lambda msg, name="{{ chid }}": \
-                self.node_pose_callback({
-                    "class": "{{ category.rstrip('s') }}",
-                    "type": "{{ chtype }}",
-                    {% if chsub %}
-                    "subtype": "{{ chsub }}",
-                    {% endif %}
-                    "name": "{{ chid }}",
-                    "x": msg.x, "y": msg.y, "theta": msg.theta
-                },
-                parent_pose=self.get_node_pose(
-                    "{{ parents[-1][1] if parents else '' }}",
-                    cls="composite",
-                    type="{{ parents[-1][0] if parents else '' }}"
-                ))
-        )
-    {% endfor %}
-{% endmacro %}
 
 class {{ environment.name }}Node(Node):
-    def __init__(self, env_name: str, *args, **kwargs):
+    def __init__(self, env_name: str, *args, seed=None, fields=False, field_cell_cm=None,
+                 physics=False, physics_cell_cm=None, **kwargs):
         super().__init__(
             node_name=f"{env_name.lower()}",
             connection_params=ConnectionParameters(),
@@ -671,43 +546,37 @@ class {{ environment.name }}Node(Node):
         {% endif %}
         self.tree[self.env_name.lower()].append("{{ name }}")
 
-        {% if p.nodeclass == "CompositePlacement" %}
-        {% set comp_type = type if type else (subtype if subtype else ref.__class__.__name__|lower) %}
-        
-        {{ register_pose_subscribers(p.ref, [(type, name)]) }}
-        {% endif %}
-
         # Define {{ name }} subscriber
         {% set parent_tuple = (p.ref.parent.subtype, p.ref.parent.name) if p.ref.parent is defined else None %}
         {% set topic_base = topic_prefix(p.ref, parent_tuple) | trim %}
+        {% if p.nodeclass == "CompositePlacement" %}
+        # one PoseArrayMessage per tick carries the whole {{ name }} subtree
+        self.{{ name }}_poses_sub = self.create_subscriber(
+            topic=f"{{ topic_base }}.{{ name }}.poses",
+            msg_type=PoseArrayMessage,
+            on_message=self.pose_array_subscriber({
+                "class": "{{ ref.class|lower if ref.class is defined and ref.class else ( 'composite' if p.nodeclass == 'CompositePlacement' else obj.__class__.__name__|lower ) }}",  # e.g. sensor, actuator, composite, actor
+                "type": "{{ type if type else '' }}",
+                {% if subtype %}
+                "subtype": "{{ subtype if subtype else '' }}",
+                {% endif %}
+                "name": "{{ node_name }}",
+            })
+        )
+        {% else %}
         self.{{ name }}_pose_sub = self.create_subscriber(
             topic=f"{{ topic_base }}.{{ name }}.pose",
             msg_type=PoseMessage,
-            on_message=lambda msg, name="{{ name }}": \
-                self.node_pose_callback({
-                    "class": "{{ ref.class|lower if ref.class is defined and ref.class else ( 'composite' if p.nodeclass == 'CompositePlacement' else obj.__class__.__name__|lower ) }}",  # e.g. sensor, actuator, composite, actor
-                    "type": "{{ type if type else '' }}",
-                    {% if subtype %}
-                    "subtype": "{{ subtype if subtype else '' }}",
-                    {% endif %}
-                    "name": "{{ node_name }}",
-                    "x": msg.x,
-                    "y": msg.y,
-                    "theta": msg.theta
-                }{% if p.nodeclass == "CompositePlacement" %}, parent_pose=None  # top-level composite in environment
-                {% elif ref.class|lower in ["sensor", "actuator", "actor"] %}, parent_pose=None  # top-level thing in environment
-                {% elif ref.class|lower == "composite" %}
-                    {% set parent_tuple = (p.ref.parent.subtype, p.ref.parent.name) if p.ref.parent is defined else None %}
-                    {% if parent_tuple %}, parent_pose=self.get_node_pose(
-                        "{{ parent_tuple[1]|lower }}",
-                        cls="composite",
-                        type="{{ parent_tuple[0]|lower if parent_tuple[0] else '' }}"
-                    )
-                    {% else %}
-                    , parent_pose=None
-                    {% endif %}
-                {% endif %})
+            on_message=self.pose_subscriber({
+                "class": "{{ ref.class|lower if ref.class is defined and ref.class else ( 'composite' if p.nodeclass == 'CompositePlacement' else obj.__class__.__name__|lower ) }}",  # e.g. sensor, actuator, composite, actor
+                "type": "{{ type if type else '' }}",
+                {% if subtype %}
+                "subtype": "{{ subtype if subtype else '' }}",
+                {% endif %}
+                "name": "{{ node_name }}",
+            })
         )
+        {% endif %}
 
         {% set rpc_sensors = ["camera", "rfid", "microphone"] %}
         {% set sensor_type = type|lower if type else "" %}
@@ -764,16 +633,104 @@ class {{ environment.name }}Node(Node):
             "shape": self.nodes["obstacles"]["{{ name }}"]["shape"]
         }
         {% endfor %}
+
+        # Flat name-keyed index over nodes/poses plus a spatial hash on the grid
+        # cell size (both kept in sync by node_pose_callback)
+        # Per-sensor noise streams from one scenario seed (seed=None: fresh entropy)
+        self.rng = RandomStreams(seed)
+        self.log.info(f"[{{ environment.name }}Node] Random seed: {self.rng.entropy}")
+        self.registry = NodeRegistry(self.nodes, self.poses, cell_size=self.cellSizeCm, rng=self.rng)
+        # Progress of static sensor/source pairs, precomputed by env_to_vcode
+        self.registry.static_influences = StaticInfluenceTable(
+            {{ static_influences.positions|tojson }},
+            {{ static_influences.progress|tojson }}
+        )
+        # Parent / relative / absolute pose arrays; composite updates move
+        # their whole subtree in one vectorised pass (self.poses mirrors them)
+        self.registry.transforms = TransformTree(self.poses)
+        # Static obstacles rasterised once at cellSizeCm for collisions and LiDAR
+        self.registry.occupancy = OccupancyGrid(
+            self.registry, self.width, self.height, self.cellSizeCm
+        ).refresh()
+        # Occlusion by obstacles (static grid) and composites (per-tick layer)
+        self.registry.visibility = VisibilityIndex(self.registry)
+        # Opt-in rasterised property fields (cellSizeCm resolution, or coarser)
+        if fields:
+            self.registry.fields = FieldEngine(
+                self.registry, self.width, self.height,
+                max(field_cell_cm or self.cellSizeCm, self.cellSizeCm)
+            )
+        # Opt-in time-stepped diffusion of temperature, humidity and gas
+        if physics:
+            self.registry.physics = DiffusionEngine(
+                self.registry, self.width, self.height,
+                max(physics_cell_cm or DIFFUSION_CELL, self.cellSizeCm),
+                env_properties=self.env_properties
+            )
+        # Environment-owned collision pass, see collision_pass()
+        self.collision_hz = 20.0
+        self.collisions = []
+        self.contacts = {}
+        self._contact_poses = {}
+        self.collision_tick = 0
+        self._collision_key = None
+        self._collision_lock = threading.Lock()
+        # Vectorised evaluation of all scalar sensors, driven by update_affections
+        self.affection_engine = BatchAffectionEngine(self.registry)
         import json
         print(json.dumps(self.nodes, indent=2, default=str))
         print(json.dumps(self.poses, indent=2, default=str))
 
     # Wrappers for affection and pose utils
     def check_affectability(self, sensor_id: str, env_properties, env=None):
-        return check_affectability(self.nodes, self.poses, self.log, sensor_id, env_properties, env)
+        return check_affectability(self.nodes, self.poses, self.log, sensor_id, env_properties, env,
+                                   registry=self.registry)
 
     def node_pose_callback(self, node: dict, parent_pose):
-        return node_pose_callback(self.nodes, self.poses, self.log, node, parent_pose)
+        return node_pose_callback(self.nodes, self.poses, self.log, node, parent_pose,
+                                  registry=self.registry)
+
+    def pose_subscriber(self, node: dict):
+        """
+        on_message callback for the pose topic of `node`. Messages are
+        written through a registry PoseHandle bound on first use (O(1), no
+        hierarchy search); anything it cannot apply goes through
+        node_pose_callback.
+        """
+        handle = None
+
+        def on_pose(msg):
+            nonlocal handle
+            if handle is None:
+                handle = self.registry.pose_handle(node["name"])
+            if not handle.write(msg.x, msg.y, msg.theta):
+                self.node_pose_callback({**node, "x": msg.x, "y": msg.y, "theta": msg.theta}, None)
+
+        return on_pose
+
+    def pose_array_subscriber(self, node: dict):
+        """
+        on_message callback for the subtree topic of composite `node`: one
+        PoseArrayMessage moves the composite and overwrites its descendants
+        with their reported poses in a single TransformTree pass. Without a
+        tree only the composite's own pose is applied, as a pose message.
+        """
+        on_pose = self.pose_subscriber(node)
+
+        def on_poses(msg):
+            if not msg.names:
+                return
+            tree = self.registry.transforms
+            if tree is not None and node["name"] in tree:
+                poses = list(zip(msg.x, msg.y, msg.theta))
+                tree.sync(tree.place(node["name"], msg.names, poses), self.registry)
+                return
+            root = [i for i, n in enumerate(msg.names) if n.lower() == node["name"]]
+            if root:
+                i = root[0]
+                on_pose(PoseMessage(x=msg.x[i], y=msg.y[i], theta=msg.theta[i]))
+
+        return on_poses
 
     def get_node_pose(self, name, cls, type=None, subtype=None):
         """
@@ -868,6 +825,62 @@ class {{ environment.name }}Node(Node):
                 for name, val in data.items():
                     recurse(name, val, indent=2)
 
+    def collision_pass(self):
+        """
+        One collision pass over the whole world for this tick. Robots read
+        their own contacts through contacts_for() instead of each scanning
+        the scene themselves. Skipped while no collidable bucket changed.
+        """
+        key = tuple(
+            self.registry.bucket_version(cls)
+            for cls in ("composite", "actor", "actuator", "obstacle")
+        )
+        if key == self._collision_key:
+            return
+        # swept: a mover is tested along its path since the previous pass
+        collisions = detect_collisions(
+            self.nodes, self.poses, self.width, self.height,
+            registry=self.registry, swept="collision_pass"
+        )
+        contacts = contacts_by_entity(collisions)
+        # poses of everything that moves, so a robot knows what a clean pass saw
+        seen = {}
+        for cls in ("composite", "actor"):
+            for node in self.registry.find(cls):
+                name = (node.get("name") or "").lower()
+                pose = self.registry.get_pose(name)
+                if pose:
+                    seen[name] = (pose["x"], pose["y"], pose["theta"])
+        with self._collision_lock:
+            self.collisions = collisions
+            self.contacts = contacts
+            self._contact_poses = seen
+            self.collision_tick += 1
+        self._collision_key = key
+
+    def contacts_for(self, name):
+        """
+        (tick, contacts, pose) of `name` from the latest collision pass:
+        the names it touches and the pose of `name` that pass saw.
+        """
+        name = name.lower()
+        with self._collision_lock:
+            return (
+                self.collision_tick,
+                self.contacts.get(name, set()),
+                self._contact_poses.get(name),
+            )
+
+    def update_collisions(self):
+        """Fixed-rate collision passes (collision_hz) while the environment runs."""
+        period = 1.0 / self.collision_hz
+        while getattr(self, "running", False):
+            try:
+                self.collision_pass()
+            except Exception as e:
+                self.log.error(f"[update_collisions] {e}")
+            time.sleep(period)
+
     def update_affections(self):
         """Continuously evaluate affectability for all passive sensors (exclude RPC-based ones)."""
         self.log.info("[Env] Affections update thread started.")
@@ -875,7 +888,7 @@ class {{ environment.name }}Node(Node):
         # --- List of active sensors handled via RPC ---
         active_rpc_sensors = {"camera", "rfid", "microphone"}
 
-        def recurse_children(node_dict):
+        def recurse_children(node_dict, batch):
             """Recursively walk through composites and evaluate sensor affections."""
             if not isinstance(node_dict, dict):
                 return
@@ -895,7 +908,15 @@ class {{ environment.name }}Node(Node):
                 # --- Only evaluate passive sensors automatically ---
                 if node_class == "sensor":
                     aff_handler = getattr(node, "affection_handler", None)
-                    if callable(aff_handler):
+                    if node_id.lower() in batch:
+                        # Scalar sensors come from the tick's vectorised pass
+                        result = {
+                            "affections": batch[node_id.lower()],
+                            "env_properties": self.env_properties
+                        }
+                        node._sim_data = result
+                        self.sensor_values[node_id] = result["affections"]
+                    elif callable(aff_handler):
                         try:
                             result = aff_handler(node_id, self.env_properties, self)
                             node._sim_data = result
@@ -911,11 +932,16 @@ class {{ environment.name }}Node(Node):
 
                 # --- If node has children (e.g., composite), recurse deeper ---
                 if hasattr(node, "children") and isinstance(node.children, dict):
-                    recurse_children(node.children)
+                    recurse_children(node.children, batch)
 
         while getattr(self, "running", False):
             try:
-                recurse_children(getattr(self, "children", {}))
+                try:
+                    batch = self.affection_engine.evaluate(self.env_properties)
+                except Exception as e:
+                    self.log.error(f"[update_affections] batch pass failed: {e}")
+                    batch = {}
+                recurse_children(getattr(self, "children", {}), batch)
             except Exception as e:
                 self.log.error(f"[update_affections] {e}")
             time.sleep(1.0)
@@ -1056,6 +1082,14 @@ class {{ environment.name }}Node(Node):
         self._aff_thread = threading.Thread(target=self.update_affections, daemon=True)
         self._aff_thread.start()
 
+        # Collision pass thread
+        self._coll_thread = threading.Thread(target=self.update_collisions, daemon=True)
+        self._coll_thread.start()
+
+        # Fixed-step diffusion thread (physics mode)
+        if self.registry.physics is not None:
+            self.registry.physics.start()
+
         # Environment main loop
         try:
             while self.running:
@@ -1127,6 +1161,8 @@ class {{ environment.name }}Node(Node):
         """Stop environment and all children cleanly."""
         print(f"[{self.__class__.__name__}] Stopping environment...")
         self.running = False
+        if self.registry.physics is not None:
+            self.registry.physics.stop()
 
         if hasattr(self, "children"):
             for name, child in self.children.items():
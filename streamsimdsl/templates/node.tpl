@@ -8,15 +8,18 @@ from commlib.msg import PubSubMessage
 {% endif %}
 from streamsimdsl.utils.geometry import (
     PoseMessage,
+    {% if obj.__class__.__name__ == "CompositeThing" %}
+    PoseArrayMessage,
+    {% endif %}
     {% if obj.__class__.__name__ == "CompositeThing" or obj.__class__.__name__ == "Human" %}
     VelocityMessage,
     {% endif %}
     make_tf_matrix,
     apply_transformation,
+    compose_pose,
     get_shape_world_points,
     check_lines_intersection,
 )
-from streamsimdsl.utils.collisions import detect_collisions
 {# --- Import generated child nodes (for composites only) --- #}
 {% if obj.__class__.__name__ == "CompositeThing" %}
     {% for posed_sensor in obj.sensors %}
@@ -190,6 +193,9 @@ class {{ thing_name }}Node(Node):
         self._initial_pose = kwargs.pop("initial_pose", None)
         self.affection_handler = kwargs.pop("affection_handler", None)
         self.environment = kwargs.pop("environment", None)
+        # composites and their descendants are batched into the root's
+        # `poses` topic; their own `pose` topics are only published when asked for
+        self.pose_topics = kwargs.pop("pose_topics", False)
         super().__init__(
             node_name="{{ thing_name.lower() }}",
             connection_params=ConnectionParameters(),
@@ -292,6 +298,9 @@ class {{ thing_name }}Node(Node):
         self.current_target_idx = 0
         self.has_target = False
         self._last_t = time.monotonic()
+        # last collision pass acted on and the last pose it found contact-free
+        self._contact_tick = 0
+        self._safe_pose = None
         
         if not self.automated:
             self.vel_sub = self.create_subscriber(
@@ -301,8 +310,9 @@ class {{ thing_name }}Node(Node):
             )
         {% endif %}
         
-        # Subscribe to parent pose updates
-        if parent_topic:
+        # Parents push their pose to children in-process each tick; the
+        # parent's `pose` topic only exists when pose_topics is on
+        if parent_topic and self.pose_topics:
             self.parent_pose_sub = self.create_subscriber(
                 topic=f"{parent_topic}.pose",
                 msg_type=PoseMessage,
@@ -310,10 +320,26 @@ class {{ thing_name }}Node(Node):
             )
 
         # Pose publisher (Sensors and Robots)
-        self.pose_publisher = self.create_publisher(
-            topic=f"{full_topic_prefix}.{{ '{self.' ~ id_field ~ '}' }}.pose",
-            msg_type=PoseMessage
-        )
+        self.pose_publisher = None
+        {% if obj.__class__.__name__ == "CompositeThing" %}
+        # composites report through their `poses` batch; `pose` is opt-in
+        if self.pose_topics:
+        {% else %}
+        if not parent_topic or self.pose_topics:
+        {% endif %}
+            self.pose_publisher = self.create_publisher(
+                topic=f"{full_topic_prefix}.{{ '{self.' ~ id_field ~ '}' }}.pose",
+                msg_type=PoseMessage
+            )
+        {% if obj.__class__.__name__ == "CompositeThing" %}
+        # Subtree pose publisher: one PoseArrayMessage per tick for the whole tree
+        self.poses_publisher = None
+        if not parent_topic:
+            self.poses_publisher = self.create_publisher(
+                topic=f"{full_topic_prefix}.{{ '{self.' ~ id_field ~ '}' }}.poses",
+                msg_type=PoseArrayMessage
+            )
+        {% endif %}
         
         {% if cls == "sensor" and stype not in ["camera", "rfid", "microphone"] %}
         # --- Passive sensor: publish data messages ---
@@ -357,7 +383,8 @@ class {{ thing_name }}Node(Node):
                 'theta': self.theta
             },
             affection_handler=self.affection_handler,
-            environment=self.environment
+            environment=self.environment,
+            pose_topics=self.pose_topics
         )
         {% endfor %}
         {% for posed_actuator in obj.actuators %}
@@ -383,7 +410,8 @@ class {{ thing_name }}Node(Node):
                 'theta': self.theta
             },
             affection_handler=self.affection_handler,
-            environment=self.environment
+            environment=self.environment,
+            pose_topics=self.pose_topics
         )
         {% endfor %}
         {% for posed_cthing in obj.composites %}
@@ -410,7 +438,8 @@ class {{ thing_name }}Node(Node):
                 'theta': self.theta
             },
             affection_handler=self.affection_handler,
-            environment=self.environment
+            environment=self.environment,
+            pose_topics=self.pose_topics
         )
             {% endif %}
         {% endfor %}
@@ -490,6 +519,14 @@ class {{ thing_name }}Node(Node):
             self.theta = (self.parent_theta + self.rel_theta + self.local_theta) % 360.0
             
     {% endif %}
+    def _subtree_poses(self, out=None):
+        """(name, x, y, theta) of this node and all its descendants, depth first."""
+        out = [] if out is None else out
+        out.append((self.{{ id_field }}, self.x, self.y, self.theta))
+        for child in getattr(self, "children", {}).values():
+            child._subtree_poses(out)
+        return out
+
     def _update_parent_pose(self, msg):
         """
         Update this node's position based on parent pose updates.
@@ -497,11 +534,10 @@ class {{ thing_name }}Node(Node):
         """
         parent_pose = {'x': msg.x, 'y': msg.y, 'theta': msg.theta}
         self._initial_pose = parent_pose
-        abs_pose = apply_transformation(parent_pose, self._rel_pose)
+        rel = self._rel_pose
 
         # Update position only
-        self.x = abs_pose["x"]
-        self.y = abs_pose["y"]
+        self.x, self.y, _ = compose_pose(msg.x, msg.y, msg.theta, rel["x"], rel["y"], rel["theta"])
 
         # If pantilt is NOT automated, follow parent's rotation fully
         if not getattr(self, "automated", False):
@@ -519,9 +555,17 @@ class {{ thing_name }}Node(Node):
     def simulate(self):
         return getattr(self, "_sim_data", {})
     {% elif cls == "actuator" %}
+    def _set_current_value(self, value):
+        """Store the actuator value and mirror it into the environment's node table."""
+        self.current_value = value
+        registry = getattr(self.environment, "registry", None)
+        if registry is not None and value is not None:
+            # bumps the value version only when it actually changed
+            registry.set_value(self.{{ id_field }}, value)
+
     def _on_actuator_command(self, msg):
         """Manual actuator control when automated=False."""
-        self.current_value = getattr(msg, "value", None)
+        self._set_current_value(getattr(msg, "value", None))
         print(f"[{self.__class__.__name__}] manual set value -> {self.current_value}")
 
     def _run_actuator_targets(self, dt):
@@ -535,7 +579,7 @@ class {{ thing_name }}Node(Node):
 
         elapsed = time.monotonic() - (self._target_start or time.monotonic())
         dur = self.target.get("duration", 1.0)
-        self.current_value = self.target.get("value")
+        self._set_current_value(self.target.get("value"))
 
         if elapsed >= dur:
             self.current_target_idx = (self.current_target_idx + 1) % len(self.targets)
@@ -599,26 +643,23 @@ class {{ thing_name }}Node(Node):
                 self.y += self.vel_lin * math.sin(th_rad) * dt
                 self.theta = (self.theta + self.vel_ang * dt) % 360.0
             
-            # --- Collision check ---
+            # --- Collision check (environment-owned pass) ---
             try:
-                collisions = detect_collisions(
-                    self.environment.nodes,
-                    self.environment.poses,
-                    self.environment.width,
-                    self.environment.height
-                )
-                print(f"[{self.__class__.__name__}] Collision check: {len(collisions)} collisions detected")
-                if collisions:
-                    print(f"  Collisions: {collisions}")
-                
-                    for (a, b) in collisions:
-                        print(f"[Collision] {a} hit {b}")
-                        if a == self.{{ id_field }} or b == self.{{ id_field }}:
-                            print(f"[Collision] Reverting movement for {a}")
-                            self.x = self._prev_x
-                            self.y = self._prev_y
-                            self.theta = self._prev_theta
-                            break
+                contacts_for = getattr(self.environment, "contacts_for", None)
+                if callable(contacts_for):
+                    tick, contacts, seen = contacts_for(self.{{ id_field }})
+                    # act once per pass, on the pose that pass actually saw
+                    if seen is not None and tick != self._contact_tick:
+                        self._contact_tick = tick
+                        if not contacts:
+                            self._safe_pose = seen
+                        else:
+                            print(f"[Collision] {self.{{ id_field }}} hit {sorted(contacts)}, reverting movement")
+                            if self._safe_pose is not None:
+                                self.x, self.y, self.theta = self._safe_pose
+                            elif hasattr(self, "_prev_x"):
+                                # never seen clear yet: undo the last step
+                                self.x, self.y, self.theta = self._prev_x, self._prev_y, self._prev_theta
             except Exception as e:
                 print(f"[Collision] Check failed: {e}")
                 import traceback
@@ -626,16 +667,23 @@ class {{ thing_name }}Node(Node):
 
             if hasattr(self, "children"):
                 # Propagate only translation + parent orientation (not child's orientation)
+                parent_pose = PoseMessage(x=self.x, y=self.y, theta=self.theta)
                 for name, child in self.children.items():
                     try:
-                        parent_pose = PoseMessage(x=self.x, y=self.y, theta=self.theta)
                         child._update_parent_pose(parent_pose)
                     except Exception as e:
                         print(f"[{self.__class__.__name__}] Failed to update child {name}: {e}")
             {% endif %}
             # Publish pose
-            msg_pose = PoseMessage(x=self.x, y=self.y, theta=self.theta)
-            self.pose_publisher.publish(msg_pose)
+            if self.pose_publisher is not None:
+                msg_pose = PoseMessage(x=self.x, y=self.y, theta=self.theta)
+                self.pose_publisher.publish(msg_pose)
+            {% if obj.__class__.__name__ == "CompositeThing" %}
+            if self.poses_publisher is not None:
+                names, xs, ys, thetas = zip(*self._subtree_poses())
+                self.poses_publisher.publish(PoseArrayMessage(
+                    names=list(names), x=list(xs), y=list(ys), theta=list(thetas)))
+            {% endif %}
             
             {% if cls == "sensor" %}
             def _extract_numeric_or_summary(sensor_type, updated_props):
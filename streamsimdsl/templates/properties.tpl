@@ -0,0 +1,75 @@
+{# Node "properties" entry, shared by environment.tpl and the codegen's
+   static influence tables (transformations/node2vcode.py) #}
+{% macro render_properties(obj) -%}
+    "properties": {
+                {% set excluded = [
+                    "class","type","subtype","shape","pubFreq","name","dataModel",
+                    "_tx_position","_tx_model","_tx_position_end","parent",
+                    "actuators","sensors","composites","targets"
+                ] %}
+                {% for attr, val in obj.__dict__.items()
+                if attr not in excluded and val is not none %}
+                "{{ attr }}":
+                    {%- if val is number -%} {{ val }}
+                    {%- elif val is string -%} "{{ val }}"
+                    {%- elif val.__class__.__name__ in [
+                        "Constant","Linear","Quadratic","Exponential","Logarithmic",
+                        "Gaussian","Uniform","CustomNoise"
+                    ] -%}
+                    {
+                    "type": "{{ val.__class__.__name__ }}",
+                    {%- for k,v in val.__dict__.items()
+                        if k not in ["_tx_model","_tx_position","_tx_position_end","parent","ref"]
+                        and v is not none -%}
+                        "{{ k }}": {{ v|tojson }},
+                    {%- endfor -%}
+                    }
+                    {%- elif val.__class__.__name__ == "list" and val and
+                    val[0].__class__.__name__ in ["TargetPose","Point","Angle","Pose"] -%}
+                    [
+                    {%- for tp in val -%}
+                        {%- if tp.__class__.__name__ == "TargetPose" -%}
+                            {%- if tp.point is defined and tp.point is not none -%}
+                                {"x": {{ tp.point.x }}, "y": {{ tp.point.y }}}
+                            {%- elif tp.angle is defined and tp.angle is not none -%}
+                                {"angle": {{ tp.angle.value }}}
+                            {%- endif -%}
+                        {%- elif tp.__class__.__name__ == "Point" -%}
+                            {"x": {{ tp.x }}, "y": {{ tp.y }}}
+                        {%- elif tp.__class__.__name__ == "Angle" -%}
+                            {"angle": {{ tp.value }}}
+                        {%- elif tp.__class__.__name__ == "Pose" -%}
+                            {"x": {{ tp.x }}, "y": {{ tp.y }}, "theta": {{ tp.theta }}}
+                        {%- endif -%}
+                        {%- if not loop.last %}, {% endif %}
+                    {%- endfor -%}
+                    ]
+                    {%- elif val.__class__.__name__ == "list"
+                        and val
+                        and val[0].__class__.__name__ == "AffectEntry" -%}
+                    [
+                        {%- for entry in val -%}
+                            {
+                    "id": "{{ entry.id }}"
+                    {%- if entry.dispersion is not none -%},
+                        "dispersion": {
+                            "type": "{{ entry.dispersion.__class__.__name__ }}"
+                            {%- for k,v in entry.dispersion.__dict__.items()
+                                if k not in ["_tx_model","_tx_position","_tx_position_end","parent","ref"]
+                                and v is not none -%},
+                                "{{ k }}": {{ v|tojson }}
+                            {%- endfor -%}
+                        }
+                    {%- endif -%}
+                    {%- if entry.target_value is not none -%},
+                    "target_value": {{ entry.target_value }}
+                    {%- endif -%}
+                    }
+                    {%- if not loop.last %}, {% endif %}
+                        {%- endfor -%}
+                    ]
+                    {%- else -%} {{ val|tojson }}
+                    {%- endif -%},
+                {% endfor %}
+            }
+{%- endmacro %}
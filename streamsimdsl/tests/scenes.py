@@ -0,0 +1,76 @@
+"""Random scenes shared by the affection, spatial, static and field tests."""
+import random
+
+ENV_PROPS = {"temperature": 25.0, "humidity": 50.0, "luminosity": 60.0}
+
+
+def build_scene(n_sensors=40, n_sources=30, seed=7):
+    """Random nodes/poses with every scalar sensor kind and mixed sources."""
+    rnd = random.Random(seed)
+    nodes = {"sensors": {}, "actuators": {}, "actors": {}}
+    poses = {"sensors": {}, "actuators": {}, "actors": {}}
+
+    def put(cat, typ, sub, name, node):
+        node.update({"class": cat[:-1], "type": typ, "subtype": sub, "name": name})
+        nodes[cat].setdefault(typ, {}).setdefault(sub, {})[name] = node
+        poses[cat].setdefault(typ, {}).setdefault(sub, {})[name] = {
+            "x": rnd.uniform(0, 500), "y": rnd.uniform(0, 500), "theta": 0.0}
+
+    kinds = ["temperature", "humidity", "gas", "light", "vibration"]
+    for i in range(n_sensors):
+        sub = kinds[i % len(kinds)]
+        props = {"range": 100.0}
+        if sub == "vibration":
+            props["affectedBy"] = [{"id": "vibration"}, {"id": "temperature"}]
+        put("sensors", "envsensor", sub, f"s_{i}", {"properties": props})
+
+    source_kinds = [
+        ("actuators", "envdevice", "thermostat"),
+        ("actuators", "envdevice", "humidifier"),
+        ("actors", "envactor", "fire"),
+        ("actors", "envactor", "water"),
+        ("actuators", "singleled", "led"),
+        ("actuators", "washingmachine", "washer"),
+    ]
+    for i in range(n_sources):
+        cat, typ, sub = source_kinds[i % len(source_kinds)]
+        props = {"range": rnd.uniform(50, 250), "value": rnd.uniform(0, 100)}
+        if sub == "washer":
+            props["affects"] = [{
+                "id": "vibration", "target_value": 2.0,
+                "dispersion": {"type": "Quadratic", "a": 1.0, "b": 0.0, "c": 0.0},
+            }]
+        elif i % 4 == 0:
+            props["dispersion"] = {"type": "Linear", "start": 0.2, "end": 0.9}
+        put(cat, typ, sub, f"src_{i}", {"properties": props})
+    return nodes, poses
+
+
+def build_ranging_scene(n_sensors=25, n_targets=40, seed=3):
+    rnd = random.Random(seed)
+    nodes = {"sensors": {"sonar": {}}, "composites": {"robot": {}}, "obstacles": {}, "actors": {"envactor": {"fire": {}}}}
+    poses = {"sensors": {"sonar": {}}, "composites": {"robot": {}}, "obstacles": {}, "actors": {"envactor": {"fire": {}}}}
+
+    def rand_pose():
+        return {"x": rnd.uniform(0, 400), "y": rnd.uniform(0, 400), "theta": rnd.uniform(-180, 360)}
+
+    for i in range(n_sensors):
+        name = f"so_{i}"
+        nodes["sensors"]["sonar"][name] = {
+            "class": "sensor", "type": "sonar", "name": name,
+            "properties": {"range": rnd.uniform(50, 200), "fov": rnd.choice([30.0, 60.0, 120.0, 200.0])},
+        }
+        poses["sensors"]["sonar"][name] = rand_pose()
+    for i in range(n_targets):
+        name = f"t_{i}"
+        if i % 3 == 0:
+            nodes["composites"]["robot"][name] = {"class": "composite", "type": "robot", "name": name}
+            poses["composites"]["robot"][name] = rand_pose()
+        elif i % 3 == 1:
+            nodes["obstacles"][name] = {"class": "obstacle", "name": name}
+            poses["obstacles"][name] = rand_pose()
+        else:
+            nodes["actors"]["envactor"]["fire"][name] = {
+                "class": "actor", "type": "envactor", "subtype": "fire", "name": name}
+            poses["actors"]["envactor"]["fire"][name] = rand_pose()
+    return nodes, poses
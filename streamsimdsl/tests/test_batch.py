@@ -0,0 +1,133 @@
+import logging
+import numpy as np
+import pytest
+from streamsimdsl.utils.registry import NodeRegistry
+from streamsimdsl.utils.affections import (
+    check_affectability,
+    handle_affection_arced,
+    handle_distance_sensor,
+)
+from streamsimdsl.utils.batch import (
+    BatchAffectionEngine,
+    arc_parameters,
+    arced_affection_matrix,
+    nearest_hits,
+    ranged_affection_matrix,
+)
+
+from streamsimdsl.tests.scenes import ENV_PROPS, build_ranging_scene, build_scene
+
+log = logging.getLogger(__name__)
+
+def test_ranged_matrix_masks_out_of_range_and_unknown_poses():
+    sensors = [[0.0, 0.0], [np.nan, np.nan]]
+    sources = [[3.0, 4.0], [30.0, 40.0]]
+    dist, weight, in_range = ranged_affection_matrix(sensors, sources, [10.0, 10.0])
+    assert dist[0, 0] == pytest.approx(5.0)
+    assert weight[0, 0] == pytest.approx(0.5)
+    assert in_range.tolist() == [[True, False], [False, False]]
+    assert weight[1].tolist() == [0.0, 0.0]
+
+
+def test_batch_engine_matches_per_sensor_handlers():
+    nodes, poses = build_scene()
+    registry = NodeRegistry(nodes, poses)
+    engine = BatchAffectionEngine(registry)
+    batch = engine.evaluate(ENV_PROPS)
+
+    for sensor in registry.find("sensor"):
+        name = sensor["name"]
+        assert engine.handles(name)
+        expected = check_affectability(nodes, poses, log, name, ENV_PROPS, registry=registry)
+        assert batch[name] == pytest.approx(expected["affections"], abs=0.011)
+
+
+def test_batch_engine_picks_up_new_entities():
+    nodes, poses = build_scene(n_sensors=5, n_sources=0)
+    registry = NodeRegistry(nodes, poses)
+    engine = BatchAffectionEngine(registry)
+    assert engine.evaluate(ENV_PROPS)["s_0"] == {"temperature": 25.0}
+
+    fire = {"class": "actor", "type": "envactor", "subtype": "fire", "name": "fi_1",
+            "properties": {"range": 100.0, "value": 125.0}}
+    registry.register_node(fire)
+    s0 = registry.get_pose("s_0")
+    registry.register_pose("fi_1", {"x": s0["x"] + 50.0, "y": s0["y"], "theta": 0.0})
+    assert engine.evaluate(ENV_PROPS)["s_0"]["temperature"] == pytest.approx(75.0)
+
+
+def test_batch_engine_rebuilds_when_an_entity_is_replaced():
+    nodes, poses = build_scene(n_sensors=5, n_sources=0)
+    registry = NodeRegistry(nodes, poses)
+    engine = BatchAffectionEngine(registry)
+    assert engine.evaluate(ENV_PROPS)["s_0"] == {"temperature": 25.0}
+
+    # same name, same entity count, different kind
+    registry.register_node({"class": "sensor", "type": "envsensor", "subtype": "humidity", "name": "s_0",
+                            "properties": {"range": 100.0}})
+    assert engine.evaluate(ENV_PROPS)["s_0"] == {"humidity": 50.0}
+
+
+def test_batch_engine_leaves_lidar_to_its_handler():
+    nodes = {"sensors": {"lidar": {"li_1": {
+        "class": "sensor", "type": "lidar", "name": "li_1", "properties": {"range": 100.0}}}}}
+    poses = {"sensors": {"lidar": {"li_1": {"x": 0.0, "y": 0.0, "theta": 0.0}}}}
+    engine = BatchAffectionEngine(NodeRegistry(nodes, poses))
+    assert not engine.handles("li_1")
+    assert "li_1" not in engine.evaluate(ENV_PROPS)
+
+
+def test_arced_matrix_matches_scalar_fov_test():
+    nodes, poses = build_ranging_scene()
+    registry = NodeRegistry(nodes, poses)
+    sensors = registry.find("sensor")
+    targets = registry.find("obstacle") + registry.find("actor")
+    sp = [[registry.get_pose(s["name"])[k] for k in ("x", "y", "theta")] for s in sensors]
+    tp = [[registry.get_pose(t["name"])[k] for k in ("x", "y")] for t in targets]
+    arcs = [arc_parameters(s) for s in sensors]
+    dist, bearing, visible, _, _ = arced_affection_matrix(
+        sp, [a[0] for a in arcs], [a[1] for a in arcs], tp)
+    for i, s in enumerate(sensors):
+        for k, t in enumerate(targets):
+            r = handle_affection_arced(nodes, poses, log, s, t, None, registry=registry)
+            assert bool(visible[i, k]) == (r is not None)
+            if r:
+                assert dist[i, k] == pytest.approx(r["distance"])
+                assert bearing[i, k] == pytest.approx(r["angle"])
+
+
+def test_nearest_hits_reports_misses():
+    dist = np.array([[5.0, 2.0, 3.0], [1.0, 1.0, 1.0]])
+    visible = np.array([[True, False, True], [False, False, False]])
+    assert nearest_hits(dist, visible).tolist() == [2, -1]
+    assert nearest_hits(np.zeros((2, 0)), np.zeros((2, 0), dtype=bool)).tolist() == [-1, -1]
+
+
+def test_batch_distance_readings_match_handler():
+    nodes, poses = build_ranging_scene()
+    registry = NodeRegistry(nodes, poses)
+    batch = BatchAffectionEngine(registry).evaluate({})
+    hits = 0
+    for sensor in registry.find("sensor"):
+        expected = handle_distance_sensor(nodes, poses, log, sensor["name"])
+        assert batch[sensor["name"]] == expected
+        hits += "detected_name" in expected
+    assert hits > 0
+
+
+def test_batch_engine_reuses_groups_until_inputs_change():
+    nodes, poses = build_scene(n_sensors=5, n_sources=0)
+    registry = NodeRegistry(nodes, poses)
+    fire = {"class": "actor", "type": "envactor", "subtype": "fire", "name": "fi_1",
+            "properties": {"range": 100.0, "value": 125.0}}
+    registry.register_node(fire)
+    s0 = registry.get_pose("s_0")
+    registry.register_pose("fi_1", {"x": s0["x"] + 50.0, "y": s0["y"], "theta": 0.0})
+    engine = BatchAffectionEngine(registry)
+    assert engine.evaluate(ENV_PROPS)["s_0"]["temperature"] == pytest.approx(75.0)
+
+    fire["properties"]["value"] = 25.0  # untracked: cached group reused
+    assert engine.evaluate(ENV_PROPS)["s_0"]["temperature"] == pytest.approx(75.0)
+    registry.set_value("fi_1", 225.0)
+    assert engine.evaluate(ENV_PROPS)["s_0"]["temperature"] == pytest.approx(125.0)
+    assert engine.evaluate({**ENV_PROPS, "temperature": 75.0})["s_0"]["temperature"] == pytest.approx(150.0)
@@ -0,0 +1,179 @@
+import random
+import numpy as np
+from streamsimdsl.utils.registry import NodeRegistry
+from streamsimdsl.utils.geometry import get_shape_world_points
+from streamsimdsl.utils.collisions import (
+    SweepAndPrune,
+    contacts_by_entity,
+    detect_collisions,
+    hits_bounds,
+    narrow_phase,
+    polygons_overlap,
+)
+
+
+def build_warehouse(n=80, seed=4):
+    rnd = random.Random(seed)
+    nodes = {"obstacles": {}, "composites": {"robot": {}}}
+    poses = {"obstacles": {}, "composites": {"robot": {}}}
+    for i in range(n):
+        name = f"shelf_{i}"
+        nodes["obstacles"][name] = {"class": "obstacle", "name": name, "collidable": True,
+                                    "shape": {"type": "Rectangle", "width": rnd.uniform(5, 40),
+                                              "length": rnd.uniform(5, 40)}}
+        poses["obstacles"][name] = {"x": rnd.uniform(0, 400), "y": rnd.uniform(0, 400),
+                                    "theta": rnd.uniform(0, 180)}
+    return nodes, poses
+
+
+def all_pairs(nodes, poses, w, h):
+    polys = [(n["name"], get_shape_world_points(poses["obstacles"][n["name"]], n["shape"]))
+             for n in nodes["obstacles"].values()]
+    found = {frozenset((name, "WALL")) for name, poly in polys if hits_bounds(poly, w, h)}
+    for i, (a, pa) in enumerate(polys):
+        for b, pb in polys[i + 1:]:
+            if polygons_overlap(pa, pb):
+                found.add(frozenset((a, b)))
+    return found
+
+
+def test_sweep_and_prune_reports_overlapping_boxes():
+    boxes = {"a": (0, 0, 10, 10), "b": (10, 5, 20, 15), "c": (11, 11, 12, 12), "d": (30, 0, 40, 40)}
+    assert {frozenset(p) for p in SweepAndPrune().pairs(boxes)} == {
+        frozenset("ab"), frozenset("bc")}
+
+
+def test_broadphase_matches_all_pairs_across_ticks():
+    nodes, poses = build_warehouse()
+    registry = NodeRegistry(nodes, poses)
+    rnd = random.Random(8)
+    for _ in range(5):
+        got = {frozenset(c) for c in detect_collisions(nodes, poses, 400, 400, registry=registry)}
+        assert got == all_pairs(nodes, poses, 400, 400)
+        for pose in poses["obstacles"].values():
+            pose["x"] += rnd.uniform(-8, 8)
+            pose["y"] += rnd.uniform(-8, 8)
+    assert registry.broadphase is not None
+
+
+def test_contacts_by_entity_is_symmetric_except_walls():
+    contacts = contacts_by_entity([("r_1", "WALL"), ("r_1", "box"), ("box", "crate")])
+    assert contacts == {"r_1": {"WALL", "box"}, "box": {"r_1", "crate"}, "crate": {"box"}}
+
+
+def square(cx, cy, half, convex=True):
+    poly = np.array([[cx - half, cy - half], [cx + half, cy - half], [cx + half, cy + half], [cx - half, cy + half]])
+    return poly, None, convex
+
+
+def circle(cx, cy, r):
+    return np.zeros((1, 2)), (cx, cy, r), True
+
+
+def test_narrow_phase_detects_containment_and_native_circles():
+    bodies = [
+        square(50, 50, 40),                     # 0: big box
+        square(50, 50, 5),                      # 1: inside 0
+        square(50, 50, 5, convex=False),        # 2: inside 0, non-SAT path
+        circle(50, 50, 3),                      # 3: inside 0 and 1
+        circle(100, 50, 9.9),                   # 4: 0.1 short of box 0
+        circle(100, 50, 10.0),                  # 5: touches box 0
+        circle(115, 50, 5.0),                   # 6: touches circle 5
+        square(200, 200, 1),                    # 7: far away
+    ]
+    pairs = [(0, 1), (0, 2), (0, 3), (1, 3), (0, 4), (0, 5), (5, 6), (4, 6), (0, 7), (3, 7)]
+    assert narrow_phase(bodies, pairs).tolist() == [
+        True, True, True, True, False, True, True, False, False, False]
+
+
+def test_sat_matches_crossing_and_containment_reference():
+    rnd = random.Random(19)
+    bodies, polys = [], []
+    for _ in range(60):
+        shape = {"type": "rectangle", "width": rnd.uniform(2, 40), "length": rnd.uniform(2, 40)}
+        pose = {"x": rnd.uniform(0, 150), "y": rnd.uniform(0, 150), "theta": rnd.uniform(0, 360)}
+        poly = get_shape_world_points(pose, shape)
+        polys.append(poly)
+        bodies.append((np.array(poly), None, True))
+    pairs = [(i, j) for i in range(len(polys)) for j in range(i + 1, len(polys))]
+    expected = [polygons_overlap(polys[i], polys[j]) for i, j in pairs]
+    assert narrow_phase(bodies, pairs).tolist() == expected
+    assert any(expected) and not all(expected)
+
+
+def test_swept_collision_catches_tunnelling_robot():
+    nodes = {
+        "obstacles": {"wall": {"class": "obstacle", "name": "wall", "collidable": True,
+                               "shape": {"type": "rectangle", "width": 2, "length": 100}}},
+        "composites": {"robot": {"r_1": {"class": "composite", "type": "robot", "name": "r_1", "collidable": True,
+                                         "shape": {"type": "circle", "radius": 5}}}},
+    }
+    poses = {
+        "obstacles": {"wall": {"x": 100.0, "y": 100.0, "theta": 0.0}},
+        "composites": {"robot": {"r_1": {"x": 50.0, "y": 100.0, "theta": 0.0}}},
+    }
+    registry = NodeRegistry(nodes, poses)
+    assert detect_collisions(nodes, poses, 400, 400, registry=registry, swept="test") == []
+
+    # one 100cm step jumps clean over the 2cm wall
+    poses["composites"]["robot"]["r_1"]["x"] = 150.0
+    registry.pose_moved("r_1")
+    assert detect_collisions(nodes, poses, 400, 400, registry=registry) == []
+    hits = detect_collisions(nodes, poses, 400, 400, registry=registry, swept="test")
+    assert {frozenset(c) for c in hits} == {frozenset(("wall", "r_1"))}
+    # nothing moved since this observer's last look
+    assert detect_collisions(nodes, poses, 400, 400, registry=registry, swept="test") == []
+
+
+def test_linear_alarm_beam_catches_fast_robot():
+    import logging
+    from streamsimdsl.utils.affections import handle_linear_alarm
+
+    nodes = {
+        "sensors": {"alarm": {"linearalarm": {"la_1": {
+            "class": "sensor", "type": "alarm", "subtype": "linearalarm", "name": "la_1",
+            "shape": {"type": "arbitraryshape", "points": [{"x": 0, "y": 0}, {"x": 0, "y": 200}]}}}}},
+        "composites": {"robot": {"r_1": {"class": "composite", "type": "robot", "name": "r_1",
+                                         "shape": {"type": "square", "length": 10}}}},
+    }
+    poses = {
+        "sensors": {"alarm": {"linearalarm": {"la_1": {"x": 100.0, "y": 0.0, "theta": 0.0}}}},
+        "composites": {"robot": {"r_1": {"x": 50.0, "y": 100.0, "theta": 0.0}}},
+    }
+    registry = NodeRegistry(nodes, poses)
+    log = logging.getLogger("test")
+    assert not handle_linear_alarm(nodes, poses, log, "la_1", registry)["triggered"]
+
+    poses["composites"]["robot"]["r_1"]["x"] = 150.0
+    registry.pose_moved("r_1")
+    assert not handle_linear_alarm(nodes, poses, log, "la_1")["triggered"]
+    assert handle_linear_alarm(nodes, poses, log, "la_1", registry)["detections"] == ["r_1"]
+
+
+def test_linear_alarm_crossing_is_not_replayed_from_cache():
+    import logging
+    from streamsimdsl.utils.affections import check_affectability
+
+    nodes = {
+        "sensors": {"alarm": {"linearalarm": {"la_1": {
+            "class": "sensor", "type": "alarm", "subtype": "linearalarm", "name": "la_1",
+            "shape": {"type": "arbitraryshape", "points": [{"x": 0, "y": 0}, {"x": 0, "y": 200}]}}}}},
+        "composites": {"robot": {"r_1": {"class": "composite", "type": "robot", "name": "r_1",
+                                         "shape": {"type": "square", "length": 10}}}},
+    }
+    poses = {
+        "sensors": {"alarm": {"linearalarm": {"la_1": {"x": 100.0, "y": 0.0, "theta": 0.0}}}},
+        "composites": {"robot": {"r_1": {"x": 50.0, "y": 100.0, "theta": 0.0}}},
+    }
+    registry = NodeRegistry(nodes, poses)
+    log = logging.getLogger("test")
+
+    def triggered():
+        return check_affectability(nodes, poses, log, "la_1", {}, registry=registry)["affections"]["triggered"]
+
+    assert not triggered()
+    poses["composites"]["robot"]["r_1"]["x"] = 150.0
+    registry.pose_moved("r_1")
+    assert triggered()
+    # the robot stays put on the far side: the crossing is over
+    assert not triggered()
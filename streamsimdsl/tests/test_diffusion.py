@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+from streamsimdsl.utils.registry import NodeRegistry
+from streamsimdsl.utils.diffusion import DiffusionEngine, diffuse
+
+
+def fire_scene(with_wall=False):
+    nodes = {"actors": {"envactor": {"fire": {"fi_1": {
+        "class": "actor", "type": "envactor", "subtype": "fire", "name": "fi_1",
+        "properties": {"range": 30.0, "value": 125.0},
+    }}}}, "obstacles": {}}
+    poses = {"actors": {"envactor": {"fire": {"fi_1": {"x": 100.0, "y": 100.0, "theta": 0.0}}}},
+             "obstacles": {}}
+    if with_wall:
+        nodes["obstacles"]["wall_1"] = {"class": "obstacle", "name": "wall_1",
+                                        "shape": {"type": "rectangle", "width": 10.0, "length": 300.0}}
+        poses["obstacles"]["wall_1"] = {"x": 150.0, "y": 100.0, "theta": 0.0}
+    return NodeRegistry(nodes, poses)
+
+
+def test_diffusion_conserves_mass_without_decay_and_walls():
+    v = np.zeros((20, 20))
+    v[10, 10] = 100.0
+    blocked = np.zeros_like(v, dtype=bool)
+    blocked[:, 15] = True
+    for _ in range(200):
+        diffuse(v, blocked, 0.2, 0.0)
+    assert v.sum() == pytest.approx(100.0)
+    assert (v[:, 15:] == 0.0).all()
+
+
+def test_heat_spreads_over_time_and_not_through_walls():
+    env = {"temperature": 25.0}
+    open_room = DiffusionEngine(fire_scene(), 300, 200, 5.0, env_properties=env, properties=("temperature",))
+    walled = DiffusionEngine(fire_scene(True), 300, 200, 5.0, env_properties=env, properties=("temperature",))
+
+    near, far = [100.0, 100.0], [200.0, 100.0]
+    assert open_room.sample_point("temperature", *near, 25.0) == 25.0
+    for _ in range(5):
+        open_room.step(1.0)
+    early = open_room.sample("temperature", [near, far], [25.0, 25.0])
+    for _ in range(300):
+        open_room.step(1.0)
+        walled.step(1.0)
+    late = open_room.sample("temperature", [near, far], [25.0, 25.0])
+    assert early[0] > 40.0 and late[0] > early[0]
+    assert late[1] > early[1] > 25.0 - 1e-9
+    assert walled.sample_point("temperature", *far, 25.0) < late[1]
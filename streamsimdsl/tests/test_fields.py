@@ -0,0 +1,54 @@
+import logging
+import numpy as np
+import pytest
+from streamsimdsl.utils.registry import NodeRegistry
+from streamsimdsl.utils.affections import check_affectability
+from streamsimdsl.utils.batch import BatchAffectionEngine
+from streamsimdsl.utils.fields import FieldEngine, ScalarField
+from streamsimdsl.tests.scenes import ENV_PROPS, build_scene
+
+log = logging.getLogger(__name__)
+
+
+def test_field_sampling_tracks_exact_readings():
+    nodes, poses = build_scene()
+    exact = BatchAffectionEngine(NodeRegistry(nodes, poses)).evaluate(ENV_PROPS)
+
+    registry = NodeRegistry(nodes, poses)
+    registry.fields = FieldEngine(registry, 500, 500, 1.0)
+    sampled = BatchAffectionEngine(registry).evaluate(ENV_PROPS)
+    for sensor in registry.find("sensor"):
+        name = sensor["name"]
+        assert sampled[name] == pytest.approx(exact[name], abs=1.0)
+        via_handler = check_affectability(nodes, poses, log, name, ENV_PROPS, registry=registry)
+        assert via_handler["affections"] == pytest.approx(sampled[name], abs=0.011)
+
+
+def test_field_updates_only_moved_sources():
+    nodes, poses = build_scene(n_sensors=5, n_sources=0)
+    registry = NodeRegistry(nodes, poses)
+    fire = {"class": "actor", "type": "envactor", "subtype": "fire", "name": "fi_1",
+            "properties": {"range": 100.0, "value": 125.0}}
+    registry.register_node(fire)
+    registry.register_pose("fi_1", {"x": 200.0, "y": 200.0, "theta": 0.0})
+    engine = FieldEngine(registry, 500, 500, 2.0)
+    assert engine.sample_point("temperature", 250.0, 200.0, 25.0) == pytest.approx(75.0, abs=0.5)
+
+    registry.set_value("fi_1", 225.0)
+    assert engine.sample_point("temperature", 250.0, 200.0, 25.0) == pytest.approx(125.0, abs=1.0)
+    registry.get_pose_slot("fi_1")["x"] = 400.0
+    registry.pose_moved("fi_1")
+    assert engine.sample_point("temperature", 250.0, 200.0, 25.0) == pytest.approx(25.0)
+    # the old footprint was removed exactly, not just overwritten
+    field = engine.fields["temperature"]
+    assert np.abs(field.P[:, :150]).max() == pytest.approx(0.0, abs=1e-12)
+
+
+def test_field_base_change_needs_no_resplat():
+    field = ScalarField(100, 100, 1.0)
+    field.splat("a", 50.0, 50.0, 40.0, 80.0)
+    hot = field.sample([[60.0, 50.0]], [20.0])[0]
+    warm = field.sample([[60.0, 50.0]], [40.0])[0]
+    # progress 0.75 at 10cm of 40: b + 0.75 * (80 - b)
+    assert hot == pytest.approx(65.0, abs=0.2)
+    assert warm == pytest.approx(70.0, abs=0.2)
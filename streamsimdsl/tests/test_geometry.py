@@ -0,0 +1,46 @@
+import math
+import random
+import numpy as np
+import pytest
+from streamsimdsl.utils.geometry import (
+    apply_transformation,
+    compose_pose,
+    compose_poses,
+    make_tf_matrix,
+)
+
+
+def matrix_compose(parent, rel):
+    T = make_tf_matrix(*parent) @ make_tf_matrix(*rel)
+    theta = math.degrees(math.atan2(T[1, 0], T[0, 0]))
+    return T[0, 2], T[1, 2], theta
+
+
+def random_pose(rnd):
+    return rnd.uniform(-500, 500), rnd.uniform(-500, 500), rnd.uniform(-720, 720)
+
+
+def angle_diff(a, b):
+    return abs((a - b + 180.0) % 360.0 - 180.0)
+
+
+def test_scalar_composition_matches_matrices():
+    rnd = random.Random(22)
+    for _ in range(200):
+        parent, rel = random_pose(rnd), random_pose(rnd)
+        x, y, theta = compose_pose(*parent, *rel)
+        mx, my, mtheta = matrix_compose(parent, rel)
+        assert (x, y) == pytest.approx((mx, my), abs=1e-9)
+        assert angle_diff(theta, mtheta) < 1e-9
+        assert -180.0 <= theta < 180.0
+    pose = apply_transformation({"x": 1.0, "y": 2.0, "theta": 90.0}, {"x": 10.0, "y": 0.0, "theta": 90.0})
+    assert pose == pytest.approx({"x": 1.0, "y": 12.0, "theta": -180.0})
+
+
+def test_batch_composition_matches_scalar():
+    rnd = random.Random(5)
+    parents = np.array([random_pose(rnd) for _ in range(50)])
+    rels = np.array([random_pose(rnd) for _ in range(50)])
+    expected = np.array([compose_pose(*p, *r) for p, r in zip(parents, rels)])
+    np.testing.assert_allclose(compose_poses(parents, rels), expected, atol=1e-9)
+
@@ -0,0 +1,45 @@
+import logging
+import pytest
+from streamsimdsl.utils import affections
+from streamsimdsl.utils.registry import NodeRegistry
+from streamsimdsl.utils.rng import RandomStreams
+
+log = logging.getLogger(__name__)
+
+
+def camera_scene():
+    nodes = {
+        "sensors": {"camera": {"cam_1": {"class": "sensor", "type": "camera", "name": "cam_1",
+                                         "properties": {"range": 200.0, "fov": 60.0}}}},
+        "actuators": {"singleled": {"led": {"led_1": {
+            "class": "actuator", "type": "singleled", "subtype": "led", "name": "led_1",
+            "properties": {"range": 100.0}}}}},
+    }
+    poses = {
+        "sensors": {"camera": {"cam_1": {"x": 0.0, "y": 0.0, "theta": 0.0}}},
+        "actuators": {"singleled": {"led": {"led_1": {"x": 50.0, "y": 0.0, "theta": 0.0}}}},
+    }
+    return nodes, poses
+
+
+def test_luminosity_is_computed_once_per_input_epoch(monkeypatch):
+    nodes, poses = camera_scene()
+    registry = NodeRegistry(nodes, poses, rng=RandomStreams(3))
+    calls = []
+    ranged = affections.handle_affection_ranged
+    monkeypatch.setattr(affections, "handle_affection_ranged",
+                        lambda *a, **kw: calls.append(a[4]["name"]) or ranged(*a, **kw))
+    env = {"luminosity": 30.0}
+
+    first = affections.compute_luminosity(nodes, poses, log, "cam_1", env, registry=registry)
+    for _ in range(20):
+        lum = affections.compute_luminosity(nodes, poses, log, "cam_1", env, registry=registry)
+        # only the per-read jitter differs
+        assert lum == pytest.approx(first, abs=0.51)
+    assert calls == ["led_1"]
+
+    poses["actuators"]["singleled"]["led"]["led_1"]["x"] = 90.0
+    registry.pose_moved("led_1")
+    dimmer = affections.compute_luminosity(nodes, poses, log, "cam_1", env, registry=registry)
+    assert calls == ["led_1", "led_1"]
+    assert dimmer == pytest.approx(31.0, abs=0.26)
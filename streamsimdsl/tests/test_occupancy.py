@@ -0,0 +1,63 @@
+import random
+import numpy as np
+from streamsimdsl.utils.registry import NodeRegistry
+from streamsimdsl.utils.collisions import detect_collisions
+from streamsimdsl.utils.occupancy import OccupancyGrid
+from streamsimdsl.utils.raycast import cast_rays, points_in_polygon, polygon_segments
+
+
+def build_scene(n_obstacles=40, n_robots=25, seed=21):
+    rnd = random.Random(seed)
+    nodes = {"obstacles": {}, "composites": {"robot": {}}}
+    poses = {"obstacles": {}, "composites": {"robot": {}}}
+    for i in range(n_obstacles):
+        name = f"ob_{i}"
+        shape = ({"type": "circle", "radius": rnd.uniform(3, 15)} if i % 4 == 0 else
+                 {"type": "rectangle", "width": rnd.uniform(2, 50), "length": rnd.uniform(2, 50)})
+        nodes["obstacles"][name] = {"class": "obstacle", "name": name, "collidable": True, "shape": shape}
+        poses["obstacles"][name] = {"x": rnd.uniform(0, 300), "y": rnd.uniform(0, 300),
+                                    "theta": rnd.uniform(0, 360)}
+    for i in range(n_robots):
+        name = f"r_{i}"
+        nodes["composites"]["robot"][name] = {
+            "class": "composite", "type": "robot", "name": name, "collidable": True,
+            "shape": {"type": "square", "length": rnd.uniform(4, 20)}}
+        poses["composites"]["robot"][name] = {"x": rnd.uniform(0, 300), "y": rnd.uniform(0, 300),
+                                              "theta": rnd.uniform(0, 360)}
+    return nodes, poses
+
+
+def test_collisions_with_occupancy_grid_match_plain_detection():
+    nodes, poses = build_scene()
+    plain = NodeRegistry(nodes, poses)
+    gridded = NodeRegistry(nodes, poses)
+    gridded.occupancy = OccupancyGrid(gridded, 300, 300, 2.0)
+    rnd = random.Random(3)
+    for _ in range(6):
+        expected = detect_collisions(nodes, poses, 300, 300, registry=plain)
+        assert detect_collisions(nodes, poses, 300, 300, registry=gridded) == expected
+        for name, pose in poses["composites"]["robot"].items():
+            pose["x"] += rnd.uniform(-20, 20)
+            pose["y"] += rnd.uniform(-20, 20)
+            plain.pose_moved(name)
+            gridded.pose_moved(name)
+    assert gridded.occupancy.version is not None
+
+
+def test_point_and_march_match_exact_geometry():
+    nodes, poses = build_scene(n_robots=0)
+    registry = NodeRegistry(nodes, poses)
+    grid = OccupancyGrid(registry, 300, 300, 1.5).refresh()
+    rnd = random.Random(8)
+    for _ in range(400):
+        x, y = rnd.uniform(0, 300), rnd.uniform(0, 300)
+        expected = [k for k, poly in enumerate(grid.polys) if points_in_polygon(x, y, poly)]
+        assert sorted(grid.point(x, y)) == expected
+
+    angles = np.radians(np.arange(0, 360, 0.5))
+    for _ in range(10):
+        x, y = rnd.uniform(0, 300), rnd.uniform(0, 300)
+        inside = grid.point(x, y)
+        segments = polygon_segments([p for k, p in enumerate(grid.polys) if k not in inside])
+        expected = cast_rays(x, y, angles, 120.0, segments)
+        np.testing.assert_allclose(grid.march(x, y, angles, 120.0, exclude=inside), expected)
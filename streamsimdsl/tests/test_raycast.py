@@ -0,0 +1,54 @@
+import logging
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from streamsimdsl.utils.registry import NodeRegistry
+from streamsimdsl.utils.affections import check_affectability
+from streamsimdsl.utils.raycast import beam_angles, cast_rays, polygon_segments
+
+log = logging.getLogger(__name__)
+
+
+def test_cast_rays_nearest_hit_per_beam():
+    square = [(10.0, -5.0), (20.0, -5.0), (20.0, 5.0), (10.0, 5.0)]
+    far = [(40.0, -50.0), (45.0, -50.0), (45.0, 50.0), (40.0, 50.0)]
+    angles = np.radians([0.0, 90.0, 180.0, 26.0])
+    ranges = cast_rays(0.0, 0.0, angles, 100.0, polygon_segments([far, square]))
+    assert ranges[0] == pytest.approx(10.0)
+    assert ranges[1] == 100.0 and ranges[2] == 100.0
+    assert ranges[3] == pytest.approx(10.0 / np.cos(np.radians(26.0)))
+
+
+def test_beam_angles_do_not_repeat_full_circle():
+    assert beam_angles(0.0, 360.0, 4).tolist() == [0.0, 90.0, 180.0, 270.0]
+    assert beam_angles(-90.0, 90.0, 3).tolist() == [-90.0, 0.0, 90.0]
+
+
+def test_lidar_scan_ignores_its_carrier_and_sees_walls():
+    nodes = {
+        "composites": {"robot": {"rb_1": {
+            "class": "composite", "type": "robot", "name": "rb_1",
+            "shape": {"type": "square", "length": 20.0},
+            "lidar": {"li_1": {
+                "class": "sensor", "type": "lidar", "name": "li_1",
+                "properties": {"range": 250.0, "numBeams": 4, "maxAngle": 360.0},
+            }},
+        }}},
+        "obstacles": {"wall_1": {
+            "class": "obstacle", "name": "wall_1",
+            "shape": {"type": "rectangle", "width": 10.0, "length": 100.0},
+        }},
+    }
+    poses = {
+        "composites": {"robot": {"rb_1": {
+            "x": 100.0, "y": 100.0, "theta": 0.0,
+            "lidar": {"li_1": {"x": 100.0, "y": 100.0, "theta": 90.0}},
+        }}},
+        "obstacles": {"wall_1": {"x": 55.0, "y": 100.0, "theta": 0.0}},
+    }
+    registry = NodeRegistry(nodes, poses)
+    env = SimpleNamespace(width=300.0, height=160.0)
+    scan = check_affectability(nodes, poses, log, "li_1", {}, env=env, registry=registry)["affections"]
+    # beams at 90, 180, 270 and 0 degrees world heading
+    assert scan["num_beams"] == 4
+    assert scan["ranges"] == [60.0, 40.0, 100.0, 200.0]
@@ -0,0 +1,272 @@
+import logging
+import pytest
+from streamsimdsl.utils.registry import NodeRegistry
+from streamsimdsl.utils.geometry import node_pose_callback
+from streamsimdsl.utils.affections import (
+    find_node_by_id,
+    find_nodes_by_metadata,
+    find_affect_sources,
+    find_pose_by_metadata,
+    check_affectability,
+)
+from streamsimdsl.utils.collisions import detect_collisions
+
+log = logging.getLogger(__name__)
+
+
+def build_env():
+    """Small nodes/poses pair laid out like a generated HomeNode."""
+    nodes = {
+        "sensors": {"envsensor": {"temperature": {"te_1": {
+            "class": "sensor", "type": "envsensor", "subtype": "temperature",
+            "name": "te_1", "properties": {"range": 100.0},
+        }}}},
+        "actuators": {"envdevice": {"thermostat": {"th_1": {
+            "class": "actuator", "type": "envdevice", "subtype": "thermostat",
+            "name": "th_1", "properties": {"range": 100.0, "value": 35.0},
+            "shape": {"type": "Square", "length": 10.0},
+        }}}},
+        "actors": {},
+        "composites": {"robot": {"r_1": {
+            "class": "composite", "type": "robot", "name": "r_1",
+            "properties": {"collidable": True},
+            "shape": {"type": "Rectangle", "width": 20.0, "length": 10.0},
+            "sensors": {"sonar": {"so_1": {
+                "class": "sensor", "type": "sonar", "name": "so_1",
+                "properties": {"range": 50.0, "fov": 60.0},
+            }}},
+            "actuators": {},
+            "composites": {},
+        }}},
+        "obstacles": {"desk": {
+            "class": "obstacle", "name": "desk", "collidable": True,
+            "shape": {"type": "Square", "length": 20.0},
+        }},
+    }
+    poses = {
+        "sensors": {"envsensor": {"temperature": {"te_1": {"x": 20.0, "y": 0.0, "theta": 0.0}}}},
+        "actuators": {"envdevice": {"thermostat": {"th_1": {"x": 0.0, "y": 0.0, "theta": 0.0}}}},
+        "actors": {},
+        "composites": {"robot": {"r_1": {
+            "x": 100.0, "y": 100.0, "theta": 0.0,
+            "sensors": {"sonar": {"so_1": {"rel_pose": {"x": 10.0, "y": 0.0, "theta": 0.0}}}},
+            "actuators": {},
+            "composites": {},
+        }}},
+        "obstacles": {"desk": {"x": 300.0, "y": 300.0, "theta": 0.0}},
+    }
+    return nodes, poses
+
+
+@pytest.fixture
+def env():
+    nodes, poses = build_env()
+    return nodes, poses, NodeRegistry(nodes, poses)
+
+
+def test_registry_matches_recursive_lookups(env):
+    nodes, poses, registry = env
+    for name in ("te_1", "th_1", "r_1", "so_1", "desk"):
+        assert registry.get_node(name) is find_node_by_id(nodes, name)
+        node = registry.get_node(name)
+        assert registry.get_pose(name) == find_pose_by_metadata(
+            poses, node["class"], node.get("type"), node.get("subtype"), name)
+
+
+def test_registry_is_case_insensitive_and_misses_cleanly(env):
+    _, _, registry = env
+    assert registry.get_node("TE_1")["name"] == "te_1"
+    assert registry.get_node("nope") is None
+    assert registry.get_pose("nope") is None
+    assert "r_1" in registry
+
+
+def test_composite_update_keeps_registry_in_sync(env):
+    nodes, poses, registry = env
+    node_pose_callback(nodes, poses, log, {
+        "class": "composite", "type": "robot", "name": "r_1",
+        "x": 200.0, "y": 50.0, "theta": 90.0,
+    }, registry=registry)
+    assert registry.get_pose("r_1")["x"] == pytest.approx(200.0)
+    # child absolute pose recomputed from rel_pose and visible through the registry
+    so = registry.get_pose("so_1")
+    assert so["x"] == pytest.approx(200.0)
+    assert so["y"] == pytest.approx(60.0)
+    assert so["theta"] == pytest.approx(90.0)
+
+
+def test_new_composite_is_registered(env):
+    nodes, poses, registry = env
+    node_pose_callback(nodes, poses, log, {
+        "class": "composite", "type": "robot", "name": "r_2",
+        "x": 1.0, "y": 2.0, "theta": 0.0,
+    }, registry=registry)
+    assert registry.get_pose("r_2") == {"x": 1.0, "y": 2.0, "theta": 0.0}
+
+
+def test_affectability_same_with_and_without_registry(env):
+    nodes, poses, registry = env
+    env_props = {"temperature": 25.0}
+    plain = check_affectability(nodes, poses, log, "te_1", env_props)
+    fast = check_affectability(nodes, poses, log, "te_1", env_props, registry=registry)
+    assert plain["affections"] == fast["affections"]
+    assert fast["affections"]["temperature"] == pytest.approx(33.0)
+
+
+def test_collisions_same_with_and_without_registry(env):
+    nodes, poses, registry = env
+    poses["obstacles"]["desk"].update({"x": 105.0, "y": 100.0})
+    plain = detect_collisions(nodes, poses, 1000, 1000)
+    fast = detect_collisions(nodes, poses, 1000, 1000, registry=registry)
+    pairs = {frozenset(c) for c in fast}
+    assert {frozenset(c) for c in plain} == pairs
+    assert frozenset(("r_1", "desk")) in pairs
+
+
+def test_metadata_buckets_match_recursive_search(env):
+    nodes, _, registry = env
+    queries = [
+        {},
+        {"cls": "sensor"},
+        {"cls": "actuator", "type": "envdevice", "subtype": "thermostat"},
+        {"cls": "composite", "type": "robot"},
+        {"cls": "obstacle"},
+        {"cls": "actor", "subtype": "fire"},
+    ]
+    for q in queries:
+        plain = find_nodes_by_metadata(nodes, **q)
+        fast = find_nodes_by_metadata(nodes, registry=registry, **q)
+        assert [n["name"] for n in fast] == [n["name"] for n in plain]
+
+
+def test_registering_node_updates_buckets(env):
+    _, _, registry = env
+    fire = {"class": "actor", "type": "envactor", "subtype": "fire", "name": "fi_1"}
+    registry.register_node(fire)
+    registry.register_node(fire)
+    assert registry.find("actor", "envactor", "fire") == [fire]
+    assert registry.find().count(fire) == 1
+    # replacing an entity under the same name drops the old one from its buckets
+    registry.register_node({"class": "actor", "type": "envactor", "subtype": "water", "name": "fi_1"})
+    assert registry.find("actor", subtype="fire") == []
+    assert len(registry.find("actor")) == 1
+
+
+def test_affects_index_dedups_and_matches_tree_walk(env):
+    nodes, poses, registry = env
+    th = registry.get_node("th_1")
+    # a thermostat that also declares the property it implicitly affects
+    th["properties"]["affects"] = [{"id": "Temperature", "target_value": 45.0}]
+    registry.build(nodes, poses)
+    fast = find_affect_sources(nodes, "temperature", registry=registry)
+    plain = find_affect_sources(nodes, "temperature")
+    assert [e["node"]["name"] for e in fast] == ["th_1"]
+    assert [e["node"]["name"] for e in plain] == ["th_1"]
+    assert fast[0]["target_value"] == 45.0
+    assert find_affect_sources(nodes, "humidity", registry=registry) == []
+    result = check_affectability(nodes, poses, log, "te_1", {"temperature": 25.0}, registry=registry)
+    assert result["affections"]["temperature"] == pytest.approx(41.0)
+
+
+def test_implicit_source_reads_live_value(env):
+    nodes, poses, registry = env
+    env_props = {"temperature": 25.0}
+    registry.get_node("th_1")["properties"]["value"] = 30.0
+    result = check_affectability(nodes, poses, log, "te_1", env_props, registry=registry)
+    assert result["affections"]["temperature"] == pytest.approx(29.0)
+
+
+def test_only_temperature_has_implicit_sources(env):
+    nodes, poses, registry = env
+    # undeclared fire and humidifier next to the sensors
+    fire = {"class": "actor", "type": "envactor", "subtype": "fire", "name": "fi_1",
+            "properties": {"range": 100.0, "value": 600.0}}
+    hum = {"class": "actuator", "type": "envdevice", "subtype": "humidifier", "name": "hu_1",
+           "properties": {"range": 100.0, "value": 90.0}}
+    nodes["actors"]["envactor"] = {"fire": {"fi_1": fire}}
+    poses["actors"]["envactor"] = {"fire": {"fi_1": {"x": 10.0, "y": 0.0, "theta": 0.0}}}
+    nodes["actuators"]["envdevice"]["humidifier"] = {"hu_1": hum}
+    poses["actuators"]["envdevice"]["humidifier"] = {"hu_1": {"x": 10.0, "y": 0.0, "theta": 0.0}}
+    registry.build(nodes, poses)
+    assert [e["node"]["name"] for e in find_affect_sources(nodes, "temperature", registry=registry)] == [
+        "th_1", "fi_1"]
+    for prop in ("humidity", "gas", "light"):
+        assert find_affect_sources(nodes, prop, registry=registry) == []
+        assert find_affect_sources(nodes, prop) == []
+
+
+def test_range_cache_keys_ignore_case(env):
+    _, _, registry = env
+    assert registry.max_range("Actuator", "EnvDevice") == 100.0
+    assert registry.max_affect_range("Temperature") == 100.0
+    assert set(registry._max_range) == {("find", "actuator", "envdevice", None), ("affects", "temperature")}
+    assert registry.max_range("actuator", "envdevice") == 100.0
+    assert len(registry._max_range) == 2
+
+
+def test_versions_only_advance_on_real_changes(env):
+    nodes, poses, registry = env
+    v_robot = registry.bucket_version("composite", "robot")
+    v_so = registry.pose_version("so_1")
+    update = {"class": "composite", "type": "robot", "name": "r_1", "x": 100.0, "y": 100.0, "theta": 0.0}
+    node_pose_callback(nodes, poses, log, update, registry=registry)
+    # r_1 did not move, but so_1 got its first absolute pose from rel_pose
+    assert registry.bucket_version("composite", "robot") == v_robot
+    assert registry.pose_version("so_1") == v_so + 1
+    node_pose_callback(nodes, poses, log, update, registry=registry)
+    assert registry.pose_version("so_1") == v_so + 1
+
+    v_temp = registry.affects_version("temperature")
+    assert registry.set_value("th_1", 35.0) is False
+    assert registry.set_value("th_1", 40.0) is True
+    assert registry.value_version("th_1") == 1
+    assert registry.affects_version("temperature") == v_temp + 1
+
+
+def test_affection_cache_tracks_input_versions(env):
+    nodes, poses, registry = env
+    env_props = {"temperature": 25.0}
+    first = check_affectability(nodes, poses, log, "te_1", env_props, registry=registry)
+    assert first["affections"]["temperature"] == pytest.approx(33.0)
+
+    # an untracked edit is invisible: the cached reading is reused
+    registry.get_node("th_1")["properties"]["value"] = 45.0
+    assert check_affectability(nodes, poses, log, "te_1", env_props, registry=registry) == first
+    # tracked changes invalidate it
+    registry.set_value("th_1", 30.0)
+    assert check_affectability(nodes, poses, log, "te_1", env_props, registry=registry)[
+        "affections"]["temperature"] == pytest.approx(29.0)
+    assert check_affectability(nodes, poses, log, "te_1", {"temperature": 20.0}, registry=registry)[
+        "affections"]["temperature"] == pytest.approx(28.0)
+    node_pose_callback(nodes, poses, log, {
+        "class": "actuator", "type": "envdevice", "subtype": "thermostat", "name": "th_1",
+        "x": 70.0, "y": 0.0, "theta": 0.0}, registry=registry)
+    assert check_affectability(nodes, poses, log, "te_1", {"temperature": 20.0}, registry=registry)[
+        "affections"]["temperature"] == pytest.approx(25.0)
+
+
+def test_pose_handles_write_slots_directly(env):
+    nodes, poses, registry = env
+    te = registry.pose_handle("te_1")
+    version = registry.pose_version("te_1")
+    assert te.write(42.0, 7.0, 90.0)
+    assert poses["sensors"]["envsensor"]["temperature"]["te_1"] == {"x": 42.0, "y": 7.0, "theta": 90.0}
+    assert registry.pose_version("te_1") == version + 1
+
+    # nested leaves follow their composite; their own messages are dropped
+    so_before = dict(registry.get_pose("so_1"))
+    assert registry.pose_handle("so_1").write(0.0, 0.0, 0.0)
+    assert registry.get_pose("so_1") == so_before
+
+    # composites need a TransformTree, otherwise the caller falls back
+    assert not registry.pose_handle("r_1").write(200.0, 50.0, 90.0)
+    assert not registry.pose_handle("nope").write(1.0, 1.0, 0.0)
+
+
+def test_composite_pose_handle_moves_subtree(env):
+    from streamsimdsl.utils.transforms import TransformTree
+    nodes, poses, registry = env
+    registry.transforms = TransformTree(poses)
+    assert registry.pose_handle("r_1").write(200.0, 50.0, 90.0)
+    so = registry.get_pose("so_1")
+    assert (so["x"], so["y"], so["theta"]) == pytest.approx((200.0, 60.0, 90.0))
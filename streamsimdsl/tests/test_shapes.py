@@ -0,0 +1,42 @@
+from streamsimdsl.utils.registry import NodeRegistry
+from streamsimdsl.utils.geometry import get_shape_world_points
+from streamsimdsl.utils.shapes import world_points
+
+SHAPES = {
+    "box": {"type": "rectangle", "width": 20, "length": 10},
+    "tile": {"type": "square", "length": 8},
+    "drum": {"type": "circle", "radius": 5},
+    "wedge": {"type": "arbitraryshape", "points": [{"x": 0, "y": 0}, {"x": 10, "y": 0}, {"x": 0, "y": 5}]},
+}
+
+
+def build_scene():
+    nodes = {"obstacles": {}}
+    poses = {"obstacles": {}}
+    for k, (name, shape) in enumerate(SHAPES.items()):
+        nodes["obstacles"][name] = {"class": "obstacle", "name": name, "shape": shape}
+        poses["obstacles"][name] = {"x": 30.0 * k + 7, "y": 12.5, "theta": 33.0 * k}
+    return nodes, poses
+
+
+def test_cached_outlines_match_get_shape_world_points_exactly():
+    nodes, poses = build_scene()
+    registry = NodeRegistry(nodes, poses)
+    for name, shape in SHAPES.items():
+        pose = registry.get_pose(name)
+        assert world_points(pose, shape, registry, name) == get_shape_world_points(pose, shape)
+    assert world_points({"x": 0, "y": 0, "theta": 0}, {"type": "blob"}, registry, "blob") == []
+
+
+def test_outline_is_transformed_once_per_pose_version():
+    nodes, poses = build_scene()
+    registry = NodeRegistry(nodes, poses)
+    first = world_points(registry.get_pose("box"), SHAPES["box"], registry, "box")
+    assert world_points(registry.get_pose("box"), SHAPES["box"], registry, "box") is first
+
+    poses["obstacles"]["box"]["theta"] = 90.0
+    registry.pose_moved("box")
+    pose = registry.get_pose("box")
+    moved = world_points(pose, SHAPES["box"], registry, "box")
+    assert moved is not first
+    assert moved == get_shape_world_points(pose, SHAPES["box"])
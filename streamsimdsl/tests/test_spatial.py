@@ -0,0 +1,108 @@
+import logging
+import math
+import random
+import pytest
+from streamsimdsl.utils.spatial import SpatialHash
+from streamsimdsl.utils.registry import NodeRegistry
+from streamsimdsl.utils.geometry import node_pose_callback
+from streamsimdsl.utils.affections import check_affectability
+from streamsimdsl.utils.collisions import detect_collisions
+from streamsimdsl.tests.scenes import ENV_PROPS, build_scene, build_ranging_scene
+
+log = logging.getLogger(__name__)
+
+
+def test_query_radius_matches_brute_force():
+    rnd = random.Random(1)
+    pts = {f"p{i}": (rnd.uniform(-50, 150), rnd.uniform(-50, 150)) for i in range(300)}
+    for cell in (1.0, 7.5, 40.0):
+        sh = SpatialHash(cell)
+        for name, (x, y) in pts.items():
+            sh.update(name, x, y)
+        for _ in range(20):
+            qx, qy, r = rnd.uniform(0, 100), rnd.uniform(0, 100), rnd.uniform(0, 60)
+            expected = {n for n, (x, y) in pts.items() if math.hypot(x - qx, y - qy) <= r}
+            assert set(sh.query_radius(qx, qy, r)) == expected
+
+
+def test_update_moves_and_remove_forgets():
+    sh = SpatialHash(10.0)
+    sh.update("a", 1.0, 1.0)
+    sh.update("a", 95.0, 95.0)
+    assert sh.query_radius(0.0, 0.0, 5.0) == []
+    assert sh.query_radius(100.0, 100.0, 10.0) == ["a"]
+    sh.remove("a")
+    assert len(sh) == 0 and "a" not in sh
+
+
+@pytest.mark.parametrize("builder", [build_scene, build_ranging_scene])
+def test_spatial_registry_gives_same_affections(builder):
+    nodes, poses = builder()
+    plain = NodeRegistry(nodes, poses)
+    spatial = NodeRegistry(nodes, poses, cell_size=5.0)
+    for sensor in plain.find("sensor"):
+        name = sensor["name"]
+        a = check_affectability(nodes, poses, log, name, ENV_PROPS, registry=plain)
+        b = check_affectability(nodes, poses, log, name, ENV_PROPS, registry=spatial)
+        assert a == b
+
+
+def test_spatial_collisions_and_pose_updates():
+    rnd = random.Random(5)
+    nodes = {"obstacles": {}, "composites": {"robot": {}}}
+    poses = {"obstacles": {}, "composites": {"robot": {}}}
+    for i in range(60):
+        name = f"o_{i}"
+        nodes["obstacles"][name] = {"class": "obstacle", "name": name, "collidable": True,
+                                    "shape": {"type": "Square", "length": rnd.uniform(5, 30)}}
+        poses["obstacles"][name] = {"x": rnd.uniform(0, 300), "y": rnd.uniform(0, 300), "theta": rnd.uniform(0, 90)}
+    nodes["composites"]["robot"]["r_1"] = {
+        "class": "composite", "type": "robot", "name": "r_1",
+        "properties": {"collidable": True}, "shape": {"type": "Circle", "radius": 15.0},
+        "sensors": {}, "actuators": {}, "composites": {}}
+    poses["composites"]["robot"]["r_1"] = {"x": 500.0, "y": 500.0, "theta": 0.0,
+                                           "sensors": {}, "actuators": {}, "composites": {}}
+    registry = NodeRegistry(nodes, poses, cell_size=1.0)
+
+    robot_hits = 0
+    for x, y in ((500.0, 500.0), (150.0, 150.0), (20.0, 280.0), (130.0, 60.0)):
+        node_pose_callback(nodes, poses, log, {
+            "class": "composite", "type": "robot", "name": "r_1", "x": x, "y": y, "theta": 0.0,
+        }, registry=registry)
+        fast = {frozenset(c) for c in detect_collisions(nodes, poses, 600, 600, registry=registry)}
+        assert fast == {frozenset(c) for c in detect_collisions(nodes, poses, 600, 600)}
+        robot_hits += any("r_1" in c for c in fast)
+    assert robot_hits > 0
+
+
+def test_spatial_alarm_and_microphone_match_full_scan():
+    rnd = random.Random(9)
+    nodes = {"sensors": {"areaalarm": {}, "microphone": {}}, "composites": {"robot": {}},
+             "actors": {"envactor": {"human": {}}}}
+    poses = {"sensors": {"areaalarm": {}, "microphone": {}}, "composites": {"robot": {}},
+             "actors": {"envactor": {"human": {}}}}
+
+    def place(cat, typ, name, node):
+        nodes[cat][typ][name] = node
+        poses[cat][typ][name] = {"x": rnd.uniform(0, 400), "y": rnd.uniform(0, 400), "theta": 0.0}
+
+    for i in range(10):
+        place("sensors", "areaalarm", f"aa_{i}", {"class": "sensor", "type": "areaalarm", "name": f"aa_{i}"})
+        place("sensors", "microphone", f"mic_{i}", {"class": "sensor", "type": "microphone", "name": f"mic_{i}"})
+    for i in range(15):
+        place("composites", "robot", f"r_{i}", {"class": "composite", "type": "robot", "name": f"r_{i}",
+                                                "properties": {"range": rnd.uniform(20, 120)}})
+        nodes["actors"]["envactor"]["human"][f"h_{i}"] = {
+            "class": "actor", "type": "envactor", "subtype": "human", "name": f"h_{i}",
+            "properties": {"range": rnd.uniform(20, 120)}}
+        poses["actors"]["envactor"]["human"][f"h_{i}"] = {"x": rnd.uniform(0, 400), "y": rnd.uniform(0, 400), "theta": 0.0}
+
+    plain = NodeRegistry(nodes, poses)
+    spatial = NodeRegistry(nodes, poses, cell_size=10.0)
+    detected = 0
+    for sensor in plain.find("sensor"):
+        a = check_affectability(nodes, poses, log, sensor["name"], {}, env=object(), registry=plain)
+        b = check_affectability(nodes, poses, log, sensor["name"], {}, env=object(), registry=spatial)
+        assert a == b
+        detected += bool(a.get("detections") or a.get("affections", {}).get("detections"))
+    assert detected > 0
@@ -0,0 +1,118 @@
+import logging
+import pytest
+from streamsimdsl.utils.registry import NodeRegistry
+from streamsimdsl.utils.affections import check_affectability
+from streamsimdsl.utils.batch import BatchAffectionEngine
+from streamsimdsl.utils.static import StaticInfluenceTable, build_static_influences
+from streamsimdsl.tests.scenes import ENV_PROPS, build_scene
+
+log = logging.getLogger(__name__)
+
+
+def flat_nodes(registry):
+    return [n for cls in ("sensor", "actuator", "actor") for n in registry.find(cls)]
+
+
+def with_static_table(nodes, poses):
+    registry = NodeRegistry(nodes, poses)
+    positions = {
+        n["name"]: [registry.get_pose(n["name"])["x"], registry.get_pose(n["name"])["y"]]
+        for n in flat_nodes(registry)
+    }
+    progress = build_static_influences(flat_nodes(registry), positions)
+    registry.static_influences = StaticInfluenceTable(positions, progress)
+    return registry, progress
+
+
+def test_static_table_matches_live_evaluation():
+    nodes, poses = build_scene()
+    live = NodeRegistry(nodes, poses)
+    expected = {
+        s["name"]: check_affectability(nodes, poses, log, s["name"], ENV_PROPS, registry=live)["affections"]
+        for s in live.find("sensor")
+    }
+
+    nodes, poses = build_scene()
+    registry, progress = with_static_table(nodes, poses)
+    assert progress
+    for name, affections in expected.items():
+        got = check_affectability(nodes, poses, log, name, ENV_PROPS, registry=registry)
+        assert got["affections"] == pytest.approx(affections, abs=0.011)
+
+
+def test_moved_source_falls_back_to_live_evaluation():
+    nodes, poses = build_scene(n_sensors=5, n_sources=0)
+    fire = {"class": "actor", "type": "envactor", "subtype": "fire", "name": "fi_1",
+            "properties": {"range": 100.0, "value": 125.0}}
+    nodes["actors"].setdefault("envactor", {}).setdefault("fire", {})["fi_1"] = fire
+    s0 = poses["sensors"]["envsensor"]["temperature"]["s_0"]
+    pose = {"x": s0["x"] + 50.0, "y": s0["y"], "theta": 0.0}
+    poses["actors"].setdefault("envactor", {}).setdefault("fire", {})["fi_1"] = pose
+    registry, progress = with_static_table(nodes, poses)
+    table = registry.static_influences
+
+    assert progress["temperature"]["s_0"]["fi_1"] == pytest.approx(0.5)
+    assert table.progress(registry, "temperature", "s_0", "fi_1") == pytest.approx(0.5)
+
+    pose["x"] = s0["x"] + 75.0
+    registry.pose_moved("fi_1")
+    assert table.progress(registry, "temperature", "s_0", "fi_1") is None
+    result = check_affectability(nodes, poses, log, "s_0", ENV_PROPS, registry=registry)
+    assert result["affections"]["temperature"] == pytest.approx(50.0)
+
+
+def assert_same_readings(got, expected):
+    assert got.keys() == expected.keys()
+    for name, affections in expected.items():
+        assert got[name] == pytest.approx(affections, abs=0.011)
+
+
+def test_batch_engine_reads_static_pairs_from_table():
+    nodes, poses = build_scene()
+    expected = BatchAffectionEngine(NodeRegistry(nodes, poses)).evaluate(ENV_PROPS)
+    registry, progress = with_static_table(nodes, poses)
+    engine = BatchAffectionEngine(registry)
+    assert_same_readings(engine.evaluate(ENV_PROPS), expected)
+
+    # the table, not the geometry, answers static pairs
+    sensor, source = next((s, k) for s, row in progress["temperature"].items() for k, v in row.items() if v > 0)
+    progress["temperature"][sensor][source] = 0.0
+    engine.rebuild()
+    assert engine.evaluate(ENV_PROPS)[sensor]["temperature"] != pytest.approx(
+        expected[sensor]["temperature"], abs=0.011)
+
+    # once the source moves, the pair is evaluated live again
+    nodes, poses = build_scene()
+    registry, _ = with_static_table(nodes, poses)
+    engine = BatchAffectionEngine(registry)
+    pose = registry.get_pose(source)
+    pose["x"] += 30.0
+    registry.pose_moved(source)
+    expected = BatchAffectionEngine(NodeRegistry(nodes, poses)).evaluate(ENV_PROPS)
+    assert_same_readings(engine.evaluate(ENV_PROPS), expected)
+
+
+def scene_with_fire(dx):
+    nodes, poses = build_scene(n_sensors=5, n_sources=0)
+    fire = {"class": "actor", "type": "envactor", "subtype": "fire", "name": "fi_1",
+            "properties": {"range": 100.0, "value": 125.0}}
+    nodes["actors"].setdefault("envactor", {}).setdefault("fire", {})["fi_1"] = fire
+    s0 = poses["sensors"]["envsensor"]["temperature"]["s_0"]
+    poses["actors"].setdefault("envactor", {}).setdefault("fire", {})["fi_1"] = {
+        "x": s0["x"] + dx, "y": s0["y"], "theta": 0.0}
+    return with_static_table(nodes, poses), nodes, poses
+
+
+def test_unlisted_pairs_are_evaluated_live():
+    # checked and out of range: an explicit zero
+    (registry, progress), _, _ = scene_with_fire(500.0)
+    assert progress["temperature"]["s_0"]["fi_1"] == 0.0
+    assert registry.static_influences.progress(registry, "temperature", "s_0", "fi_1") == 0.0
+
+    # a pair the codegen view missed is not silently zeroed
+    (registry, progress), nodes, poses = scene_with_fire(50.0)
+    del progress["temperature"]["s_0"]["fi_1"]
+    assert registry.static_influences.progress(registry, "temperature", "s_0", "fi_1") is None
+    result = check_affectability(nodes, poses, log, "s_0", ENV_PROPS, registry=registry)
+    assert result["affections"]["temperature"] == pytest.approx(75.0)
+    assert BatchAffectionEngine(registry).evaluate(ENV_PROPS)["s_0"]["temperature"] == pytest.approx(75.0)
@@ -0,0 +1,106 @@
+import copy
+import logging
+import random
+import pytest
+from streamsimdsl.utils.registry import NodeRegistry
+from streamsimdsl.utils.geometry import compose_pose, node_pose_callback
+from streamsimdsl.utils.transforms import TransformTree
+
+log = logging.getLogger(__name__)
+
+
+def rel(x, y, theta):
+    return {"rel_pose": {"x": x, "y": y, "theta": theta}}
+
+
+def build_robots():
+    poses = {
+        "sensors": {"envsensor": {"temperature": {"te_1": {"x": 20.0, "y": 0.0, "theta": 0.0}}}},
+        "composites": {"robot": {
+            "r_1": {
+                "x": 100.0, "y": 100.0, "theta": 0.0,
+                "sensors": {"sonar": {"so_1": rel(10.0, 0.0, 0.0)}},
+                "actuators": {},
+                "composites": {"pantilt": {"pt_1": {
+                    **rel(0.0, 5.0, 90.0),
+                    "sensors": {"camera": {"cam_1": rel(3.0, 0.0, 0.0)},
+                                "lidar": {"li_1": rel(-2.0, 1.0, 180.0)}},
+                    "actuators": {}, "composites": {},
+                }}},
+            },
+            "r_2": {"x": 0.0, "y": 0.0, "theta": 0.0,
+                    "sensors": {"sonar": {"so_2": rel(1.0, 1.0, 45.0)}}},
+        }},
+    }
+    nodes = {"composites": {"robot": {
+        "r_1": {"class": "composite", "type": "robot", "name": "r_1"},
+        "r_2": {"class": "composite", "type": "robot", "name": "r_2"},
+    }}}
+    return nodes, poses
+
+
+def test_tree_is_depth_first_with_contiguous_subtrees():
+    _, poses = build_robots()
+    tree = TransformTree(poses)
+    assert tree.subtree("r_1") == ["r_1", "so_1", "pt_1", "cam_1", "li_1"]
+    assert tree.subtree("pt_1") == ["pt_1", "cam_1", "li_1"]
+    assert tree.subtree("r_2") == ["r_2", "so_2"]
+    assert tree.parent[tree.index["cam_1"]] == tree.index["pt_1"]
+
+
+def test_move_composes_every_level_from_its_parent():
+    _, poses = build_robots()
+    tree = TransformTree(poses)
+    start, stop = tree.move("r_1", 100.0, 50.0, 30.0)
+    for k in range(start + 1, stop):
+        expected = compose_pose(*tree.abs[tree.parent[k]], *tree.rel[k])
+        assert tree.abs[k].tolist() == pytest.approx(list(expected), abs=1e-9)
+
+
+def test_vectorised_updates_match_recursive_propagation():
+    nodes, poses = build_robots()
+    plain_poses = copy.deepcopy(poses)
+    registry = NodeRegistry(nodes, poses)
+    registry.transforms = TransformTree(poses)
+    plain = NodeRegistry(nodes, plain_poses)
+    rnd = random.Random(23)
+    for _ in range(20):
+        update = {"class": "composite", "type": "robot", "name": rnd.choice(["r_1", "r_2"]),
+                  "x": rnd.uniform(0, 500), "y": rnd.uniform(0, 500), "theta": rnd.uniform(-180, 180)}
+        node_pose_callback(nodes, poses, log, update, registry=registry)
+        node_pose_callback(nodes, plain_poses, log, update, registry=plain)
+        for name in registry.transforms.names:
+            fast, slow = registry.get_pose(name), plain.get_pose(name)
+            assert fast["x"] == pytest.approx(slow["x"], abs=1e-9)
+            assert fast["y"] == pytest.approx(slow["y"], abs=1e-9)
+            assert (fast["theta"] - slow["theta"] + 180.0) % 360.0 - 180.0 == pytest.approx(0.0, abs=1e-9)
+
+
+def test_unknown_composite_falls_back_and_is_indexed():
+    nodes, poses = build_robots()
+    registry = NodeRegistry(nodes, poses)
+    registry.transforms = TransformTree(poses)
+    node_pose_callback(nodes, poses, log, {
+        "class": "composite", "type": "robot", "name": "r_3", "x": 1.0, "y": 2.0, "theta": 0.0,
+    }, registry=registry)
+    assert registry.get_pose("r_3") == {"x": 1.0, "y": 2.0, "theta": 0.0}
+    assert "r_3" in registry.transforms
+
+
+def test_subtree_snapshot_overrides_reported_descendants():
+    nodes, poses = build_robots()
+    registry = NodeRegistry(nodes, poses)
+    tree = registry.transforms = TransformTree(poses)
+    before = registry.pose_version("so_1")
+    # the pantilt reports its servo angle; cam_1 is not in the message
+    rows = tree.place("r_1", ["r_1", "pt_1", "li_1", "ghost", "so_2"],
+                      [[200.0, 0.0, 0.0], [200.0, 5.0, 30.0], [1.0, 2.0, 3.0], [0.0, 0.0, 0.0], [9.0, 9.0, 9.0]])
+    tree.sync(rows, registry)
+    assert registry.get_pose("so_1") == pytest.approx({"x": 210.0, "y": 0.0, "theta": 0.0})
+    assert registry.get_pose("pt_1") == {"x": 200.0, "y": 5.0, "theta": 30.0}
+    assert registry.get_pose("li_1") == {"x": 1.0, "y": 2.0, "theta": 3.0}
+    # composed from the parent's pose before the override, like an unreported node
+    assert registry.get_pose("cam_1") == pytest.approx({"x": 200.0, "y": 8.0, "theta": 90.0})
+    # outside r_1's subtree: untouched
+    assert registry.get_pose("so_2") != {"x": 9.0, "y": 9.0, "theta": 9.0}
+    assert registry.pose_version("so_1") != before
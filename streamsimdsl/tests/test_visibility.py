@@ -0,0 +1,63 @@
+import random
+from streamsimdsl.utils.registry import NodeRegistry
+from streamsimdsl.utils.geometry import check_lines_intersection, get_shape_world_points
+from streamsimdsl.utils.raycast import points_in_polygon
+from streamsimdsl.utils.visibility import VisibilityIndex
+
+
+def build_obstacles(n=30, seed=5):
+    rnd = random.Random(seed)
+    nodes = {"obstacles": {}, "composites": {"robot": {}}}
+    poses = {"obstacles": {}, "composites": {"robot": {}}}
+    for i in range(n):
+        name = f"ob_{i}"
+        nodes["obstacles"][name] = {
+            "class": "obstacle", "name": name,
+            "shape": {"type": "rectangle", "width": rnd.uniform(5, 60), "length": rnd.uniform(5, 60)},
+        }
+        poses["obstacles"][name] = {"x": rnd.uniform(0, 500), "y": rnd.uniform(0, 500), "theta": rnd.uniform(0, 360)}
+    return nodes, poses
+
+
+def brute_visible(registry, x0, y0, x1, y1):
+    for cls in ("obstacle", "composite"):
+        for node in registry.find(cls):
+            poly = get_shape_world_points(registry.get_pose(node["name"]), node["shape"])
+            if points_in_polygon(x0, y0, poly) or points_in_polygon(x1, y1, poly):
+                continue
+            n = len(poly)
+            if any(check_lines_intersection((x0, y0), (x1, y1), poly[k], poly[(k + 1) % n]) for k in range(n)):
+                return False
+    return True
+
+
+def test_segment_grid_matches_brute_force():
+    nodes, poses = build_obstacles()
+    registry = NodeRegistry(nodes, poses)
+    index = VisibilityIndex(registry, cell_size=40.0)
+    rnd = random.Random(11)
+    blocked = 0
+    for _ in range(300):
+        p = [rnd.uniform(-20, 520) for _ in range(4)]
+        expected = brute_visible(registry, *p)
+        assert index.visible(*p) == expected
+        blocked += not expected
+    assert 0 < blocked < 300
+
+
+def test_moving_composite_occludes_and_carrier_does_not():
+    nodes, poses = build_obstacles(n=0)
+    robot = {"class": "composite", "type": "robot", "name": "rb_1",
+             "shape": {"type": "square", "length": 20.0}}
+    nodes["composites"]["robot"]["rb_1"] = robot
+    pose = {"x": 100.0, "y": 0.0, "theta": 0.0}
+    poses["composites"]["robot"]["rb_1"] = pose
+    registry = NodeRegistry(nodes, poses)
+    index = VisibilityIndex(registry)
+    assert index.visible(0.0, 100.0, 200.0, 100.0)
+
+    pose["y"] = 100.0
+    registry.pose_moved("rb_1")
+    assert not index.visible(0.0, 100.0, 200.0, 100.0)
+    # lines starting inside the robot (its own sensors) are not occluded by it
+    assert index.visible(100.0, 100.0, 200.0, 100.0)
@@ -1,8 +1,10 @@
+import ast
 import jinja2
 
 from ..utils.utils import TEMPLATES_PATH
 from ..lang import build_model
 from streamsimdsl.utils.geometry import apply_transformation
+from streamsimdsl.utils.static import build_static_influences
 
 jinja_env = jinja2.Environment(
     loader=jinja2.FileSystemLoader(TEMPLATES_PATH),
@@ -106,6 +108,58 @@ def model_to_vcode(obj, comms, dtypes) -> str:
 #     composite_str = build_composite(robot, comms, dtypes)
 #     return composite_str
 
+# ---------- Static influence tables ----------
+_render_properties = jinja_env.get_template("properties.tpl").module.render_properties
+
+def rendered_properties(ref):
+    """The "properties" dict environment.tpl emits for `ref`, from the same macro."""
+    return ast.literal_eval("{" + str(_render_properties(ref)) + "}")["properties"]
+
+def is_static_placement(p):
+    """
+    Placements that keep their model pose for the whole run. Composites
+    (robots, pantilts) move, as do humans, composite actors and automated
+    actors; plain things and actors stay where they are placed.
+    (`automated` on an actuator cycles its value, not its pose.)
+    """
+    if p.__class__.__name__ == "CompositePlacement":
+        return False
+    ref = p.ref
+    if ref.__class__.__name__ in ("Human", "CompositeActor", "CompositeThing"):
+        return False
+    if str(getattr(ref, "class", "")).lower() == "actor" and getattr(ref, "automated", False):
+        return False
+    return True
+
+def placement_node(ref):
+    """
+    The node dict environment.tpl emits for a top-level placement: the same
+    metadata and rendered properties the runtime registry indexes.
+    """
+    node = {
+        "class": str(getattr(ref, "class", "") or "").lower(),
+        "type": str(ref.type).lower() if getattr(ref, "type", None) else ref.__class__.__name__.lower(),
+        "name": ref.name.lower(),
+        "properties": rendered_properties(ref),
+    }
+    if getattr(ref, "subtype", None):
+        node["subtype"] = str(ref.subtype).lower()
+    return node
+
+def static_influences(placements):
+    """Codegen-time progress table of every static sensor/source pair."""
+    nodes, positions = [], {}
+    for p in placements:
+        if not is_static_placement(p):
+            continue
+        node = placement_node(p.ref)
+        nodes.append(node)
+        positions[node["name"]] = [p.pose.x, p.pose.y]
+    return {
+        "positions": positions,
+        "progress": build_static_influences(nodes, positions),
+    }
+
 # ---------- Environment ----------
 envnode_tpl = jinja_env.get_template("environment.tpl")
 def build_envnode(env, comms, dtypes) -> str:
@@ -136,7 +190,8 @@ def build_envnode(env, comms, dtypes) -> str:
         "comms": comms,
         "dtype": dtypes,
         "placements": placements,
-        "offsets": offsets
+        "offsets": offsets,
+        "static_influences": static_influences(placements)
     }
     envf = envnode_tpl.render(context)
     return envf
@@ -1,10 +1,22 @@
-import math, random
-from streamsimdsl.utils.utils import apply_noise, apply_dispersion
+import math
+import numpy as np
+from streamsimdsl.utils.utils import GLOBAL_RANDOM, compile_dispersion, compile_noise
+from streamsimdsl.utils.registry import affect_entries
+from streamsimdsl.utils.batch import arc_parameters, arced_affection_matrix, nearest_hits
+from streamsimdsl.utils.fields import field_for
+from streamsimdsl.utils.raycast import (
+    beam_angles,
+    bounds_segments,
+    cast_rays,
+    points_in_polygon,
+    polygon_segments,
+)
 from streamsimdsl.utils.geometry import (
     calc_distance,
     check_lines_intersection,
     get_shape_world_points,
 )
+from streamsimdsl.utils.shapes import swept_outline, world_points
 
 def find_pose_by_metadata(poses_section, cls, type, subtype, name):
     """Recursively find and normalize a pose dict with x,y,theta."""
@@ -12,7 +24,6 @@ def find_pose_by_metadata(poses_section, cls, type, subtype, name):
         return None
 
     name_l = name.lower()
-    found_pose = None
 
     for key, val in poses_section.items():
         if isinstance(key, str) and key.lower() == name_l and isinstance(val, dict):
@@ -28,15 +39,18 @@ def find_pose_by_metadata(poses_section, cls, type, subtype, name):
         if isinstance(val, dict):
             candidate = find_pose_by_metadata(val, cls, type, subtype, name)
             if candidate:
-                found_pose = candidate
+                return candidate
 
-    return found_pose
+    return None
 
-def find_nodes_by_metadata(nodes_section, cls=None, type=None, subtype=None):
+def find_nodes_by_metadata(nodes_section, cls=None, type=None, subtype=None, registry=None):
     """
     Recursively collect all node dicts from `nodes_section` matching metadata.
     Returns a list of node dicts.
+    With a NodeRegistry the pre-bucketed (shared, read-only) list is returned.
     """
+    if registry is not None:
+        return registry.find(cls, type, subtype)
     found = []
     if not isinstance(nodes_section, dict):
         return found
@@ -73,17 +87,76 @@ def find_node_by_id(nodes_section, node_id):
         print(f"[find_node_by_id ERROR] {e} in section keys={list(nodes_section.keys())}")
         return None
 
-def handle_affection_ranged(nodes, poses, log, sensor: dict, node: dict, type, dispersion=None):
+def resolve_node(nodes, node_id, registry=None):
+    """Look a node up by name, in O(1) when a NodeRegistry is available."""
+    if registry is not None:
+        return registry.get_node(node_id)
+    return find_node_by_id(nodes, node_id)
+
+def find_nodes_near(nodes, pose, queries, radius=None, registry=None):
+    """
+    find_nodes_by_metadata(**q) for every q in `queries`, concatenated.
+    With a spatially indexed registry only entities within `radius` of
+    `pose` are returned; radius=None means each entity's own range, i.e. the
+    largest range among the queried bucket.
+    """
+    spatial = getattr(registry, "spatial", None)
+    found = []
+    for q in queries:
+        if spatial is not None and pose:
+            rng = radius if radius is not None else registry.max_range(**q)
+            found.extend(registry.find_near(pose["x"], pose["y"], rng, **q))
+        else:
+            found.extend(find_nodes_by_metadata(nodes, registry=registry, **q))
+    return found
+
+def resolve_pose(poses, node, registry=None):
+    """Look up the pose of a node dict, in O(1) when a NodeRegistry is available."""
+    name = node.get("name", "") or ""
+    if registry is not None:
+        return registry.get_pose(name)
+    return find_pose_by_metadata(
+        poses,
+        node.get("class", "").lower(),
+        (node.get("type") or "").lower() or None,
+        (node.get("subtype") or "").lower() or None,
+        name.lower()
+    )
+
+def sensor_stream(sensor, registry=None):
+    """Random stream of a sensor: its seeded per-sensor stream with a registry, else the global modules."""
+    if registry is not None:
+        return registry.stream(sensor.get("name"))
+    return GLOBAL_RANDOM
+
+def sensor_noise(sensor, registry=None):
+    """Compiled noise callable of a sensor, bound once at registration when a NodeRegistry is available."""
+    if registry is not None and sensor.get("name", "").lower() in registry.nodes:
+        return registry.noise_model(sensor["name"])
+    return compile_noise(sensor.get("properties", {}).get("noise"))
+
+def line_of_sight(poses, sensor_pose, target, registry=None):
+    """
+    True unless an obstacle or composite outline blocks the line from the
+    sensor to `target`. Needs the registry's VisibilityIndex; without one
+    geometry is treated as transparent.
+    """
+    visibility = getattr(registry, "visibility", None)
+    if visibility is None or not sensor_pose:
+        return True
+    target_pose = resolve_pose(poses, target, registry)
+    if not target_pose:
+        return True
+    return visibility.visible(sensor_pose["x"], sensor_pose["y"], target_pose["x"], target_pose["y"])
+
+def handle_affection_ranged(nodes, poses, log, sensor: dict, node: dict, type, dispersion=None, registry=None):
     """
     Check if pose_start is within the range of node_id.
     """    
     # Sensor info
-    sensor_class = sensor.get("class", "").lower()   # should be "sensor"
-    sensor_type = sensor.get("type", "").lower() or None
-    sensor_subtype = sensor.get("subtype", "").lower() or None
     sensor_name = sensor.get("name", "").lower()
 
-    pose_start = find_pose_by_metadata(poses, sensor_class, sensor_type, sensor_subtype, sensor_name)
+    pose_start = resolve_pose(poses, sensor, registry)
     if not pose_start:
         log.warning(f"[Affection] Pose not found for sensor {sensor_name}")
         return None
@@ -94,7 +167,7 @@ def handle_affection_ranged(nodes, poses, log, sensor: dict, node: dict, type, d
     node_subtype = node.get("subtype", "").lower() or None  # e.g. "thermostat", "temperature", "fire"
     node_name = node.get("name", "").lower()                # e.g. "th_1"
 
-    pose_end = find_pose_by_metadata(poses, node_class, node_type, node_subtype, node_name)
+    pose_end = resolve_pose(poses, node, registry)
     if not pose_end:
         log.warning(f"[Affection] Pose not found for target {node_name}")
         return None
@@ -107,11 +180,11 @@ def handle_affection_ranged(nodes, poses, log, sensor: dict, node: dict, type, d
 
     weight = max(0.0, 1.0 - dist / rng)
     
-    # disp = node.get("properties", {}).get("dispersion")
+    # dispersion: a callable from compile_dispersion, or a dispersion dict
     if dispersion:
-        dtype  = dispersion.get("type")
-        params = {k:v for k,v in dispersion.items() if k != "type"}
-        progress = apply_dispersion(weight, dtype, **params)
+        if not callable(dispersion):
+            dispersion = compile_dispersion(dispersion)
+        progress = dispersion(weight)
     else:
         progress = weight
 
@@ -131,23 +204,27 @@ def handle_affection_ranged(nodes, poses, log, sensor: dict, node: dict, type, d
     # result.update(node.get('properties', {}))
     # return result
 
+def normalize_angle(a):
+    return (a + math.pi) % (2 * math.pi) - math.pi
+
+def in_fov(min_a, max_a, angle):
+    """Angle inside the (possibly wrapping) arc [min_a, max_a]."""
+    if min_a <= max_a:
+        return min_a <= angle <= max_a
+    return angle >= min_a or angle <= max_a
+
 def handle_affection_arced(nodes, poses, log, sensor, node, type,
-                           sensor_pose=None, target_pose=None):
+                           sensor_pose=None, target_pose=None, registry=None):
     """
     Handles the affection of an arced sensor (FOV-based detection).
     Now supports explicit sensor_pose / target_pose overrides.
     """
     try:
         # --- Sensor info ---
-        sensor_class = sensor.get("class", "").lower()
-        sensor_type = sensor.get("type", "").lower() or None
-        sensor_subtype = sensor.get("subtype", "").lower() or None
         sensor_name = sensor.get("name", "").lower()
 
         # --- Get sensor pose (either passed or found) ---
-        pose_start = sensor_pose or find_pose_by_metadata(
-            poses, sensor_class, sensor_type, sensor_subtype, sensor_name
-        )
+        pose_start = sensor_pose or resolve_pose(poses, sensor, registry)
         if not pose_start:
             log.warning(f"[Affection] Pose not found for arced sensor {sensor_name}")
             return None
@@ -159,9 +236,7 @@ def handle_affection_arced(nodes, poses, log, sensor, node, type,
         node_name = node.get("name", "").lower()
         node_id = node.get("id", node_name)
 
-        pose_end = target_pose or find_pose_by_metadata(
-            poses, node_class, node_type, node_subtype, node_name
-        )
+        pose_end = target_pose or resolve_pose(poses, node, registry)
         if not pose_end:
             log.warning(f"[Affection] Pose not found for target {node_name}")
             return None
@@ -187,18 +262,10 @@ def handle_affection_arced(nodes, poses, log, sensor, node, type,
         dy = pose_end["y"] - pose_start["y"]
         angle = math.atan2(dy, dx)
 
-        def normalize_angle(a):
-            return (a + math.pi) % (2 * math.pi) - math.pi
-
         min_a = normalize_angle(theta_s - fov_rad / 2)
         max_a = normalize_angle(theta_s + fov_rad / 2)
         angle_n = normalize_angle(angle)
 
-        def in_fov(min_a, max_a, angle):
-            if min_a <= max_a:
-                return min_a <= angle <= max_a
-            return angle >= min_a or angle <= max_a
-
         if not in_fov(min_a, max_a, angle_n):
             return None
 
@@ -223,6 +290,47 @@ def handle_affection_arced(nodes, poses, log, sensor, node, type,
         log.error(f"handle_affection_arced: {e}")
         raise
 
+def arced_pass(poses, sensor, sensor_pose, targets, registry=None):
+    """
+    handle_affection_arced for all `targets` in one vectorised call.
+    Returns (candidates, dist, bearing, visible, min_a, max_a); candidates are
+    the targets with a known pose, other than the sensor itself, and index
+    the columns of the (K,) result arrays.
+    """
+    candidates, target_xy = [], []
+    for target in targets:
+        if target.get("name") == sensor.get("name"):
+            continue
+        target_pose = resolve_pose(poses, target, registry)
+        if target_pose:
+            candidates.append(target)
+            target_xy.append([target_pose["x"], target_pose["y"]])
+
+    rng, fov = arc_parameters(sensor)
+    dist, bearing, visible, min_a, max_a = arced_affection_matrix(
+        [[sensor_pose["x"], sensor_pose["y"], sensor_pose["theta"]]], [rng], [fov], target_xy)
+    return candidates, dist[0], bearing[0], visible[0], float(min_a[0]), float(max_a[0])
+
+def arced_result(sensor, node, dist, angle, min_a, max_a):
+    """The dict handle_affection_arced returns, for one visible target."""
+    node_name = node.get("name", "").lower()
+    rng, fov = arc_parameters(sensor)
+    result = {
+        "class": node.get("class", "").lower(),
+        "type": (node.get("type") or "").lower() or None,
+        "subtype": (node.get("subtype") or "").lower() or None,
+        "name": node_name,
+        "id": node.get("id", node_name),
+        "distance": float(dist),
+        "min_sensor_ang": min_a,
+        "max_sensor_ang": max_a,
+        "angle": float(angle),
+        "range": rng,
+        "fov": fov,
+    }
+    result.update(node.get("properties", {}))
+    return result
+
 def affects(entity, property: str) -> bool:
     """
     Checks whether a node has an AffectEntry with id == substance.
@@ -239,78 +347,79 @@ def affects(entity, property: str) -> bool:
 
     return False
 
-def handle_temperature_sensor(nodes, poses, log, sensor_id, env_properties=None):
+def find_affect_sources(nodes, prop, registry=None):
+    """
+    Source entries ``{"node", "dispersion", "target_value"}`` of every entity
+    that can affect ``prop``, each entity at most once. Served from the
+    registry's inverted index when one is given.
+    """
+    if registry is not None:
+        return registry.affecting(prop)
+    prop = prop.lower()
+    sources = []
+    for e in find_nodes_by_metadata(nodes):
+        entry = affect_entries(e).get(prop)
+        if entry:
+            sources.append(entry)
+    return sources
+
+def ranged_property_value(nodes, poses, log, sensor, prop, base_value, registry=None):
+    """
+    base_value plus the ranged influence of every source affecting `prop`.
+    Each source pulls the reading towards its target value by its progress.
+    """
+    influences = []
+    sensor_name = sensor.get("name")
+    # rasterised or diffusing field, see utils/fields.py: one bilinear sample
+    fields = field_for(registry, prop)
+    if fields is not None:
+        sensor_pose = registry.get_pose(sensor_name)
+        if sensor_pose:
+            return fields.sample_point(prop, sensor_pose["x"], sensor_pose["y"], base_value)
+    sources = None
+    if getattr(registry, "spatial", None) is not None:
+        # only sources whose range can reach the sensor's cell neighbourhood
+        sensor_pose = registry.get_pose(sensor_name)
+        if sensor_pose:
+            sources = registry.affecting_near(prop, sensor_pose["x"], sensor_pose["y"])
+    if sources is None:
+        sources = find_affect_sources(nodes, prop, registry)
+    # codegen-time progress of static sensor/source pairs, see utils/static.py
+    static = getattr(registry, "static_influences", None)
+    for entry in sources:
+        source = entry["node"]
+        if source.get("name") == sensor_name:
+            continue
+
+        target_val = entry["target_value"]
+        if target_val is None:
+            target_val = source.get("properties", {}).get("value", base_value)
+
+        progress = None
+        if static is not None:
+            progress = static.progress(registry, prop, sensor_name, source.get("name"))
+        if progress is None:
+            r = handle_affection_ranged(nodes, poses, log, sensor, source, prop, entry["disperse"], registry=registry)
+            if not r:
+                continue
+            progress = r["progress"]
+        influences.append(progress * (target_val - base_value))
+
+    return base_value + sum(influences)
+
+def handle_temperature_sensor(nodes, poses, log, sensor_id, env_properties=None, registry=None):
     """
     Compute the resulting temperature reading for an environmental sensor.
     Influences: thermostats (actuators.envdevice.thermostat) and fires (actors.envactor.fire).
     Returns: {"temperature": float}
     """
     try:
-        sensor = find_node_by_id(nodes, sensor_id)
+        sensor = resolve_node(nodes, sensor_id, registry)
         props = sensor.get("properties", {})
         env_temp = (env_properties or {}).get("temperature", 25.0)
         noise = props.get("noise", 0.0)  # sensor-specific noise amplitude
-        influences = []
-        
-        thermostats = find_nodes_by_metadata(nodes, cls="actuator", type="envdevice", subtype="thermostat")
-        fires = find_nodes_by_metadata(nodes, cls="actor", type="envactor", subtype="fire")
-        custom_entities = [
-            e for e in find_nodes_by_metadata(nodes)
-            if affects(e, "temperature")
-        ]
-
-        # # collect influencers
-        # for source in thermostats + fires + generic_entities:
-        #     # skip entity unless it explicitly affects temperature
-        #     if source in generic_entities and not affects(source, "temperature"):
-        #         continue
-            
-        #     disp = None
-        #     for a in source.get("properties", {}).get("affects", []):
-        #         if a["id"].lower() == "temperature":
-        #             disp = a.get("dispersion")
-        #             target_val = a.get("target_value")
-        #             break
-            
-        #     # fallback
-        #     if target_val is None:
-        #         target_val = source.get("properties", {}).get("value", env_temp)
-
-        #     r = handle_affection_ranged(nodes, poses, log, sensor, source, "temperature", disp)
-        #     if not r:
-        #         continue
-        #     progress = r["progress"]
-
-        #     # influence relative to env_temp
-        #     influence = progress * (target_val - env_temp)
-        #     influences.append(influence)
-
-        for source in thermostats + fires + custom_entities:
-            disp = None
-            target_val = None
-            if affects(source, "temperature"):
-                for a in source.get("properties", {}).get("affects", []):
-                    if a["id"].lower() == "temperature":
-                        disp = a.get("dispersion")
-                        target_val = a.get("target_value")
-                        break
-
-                if target_val is None:
-                    target_val = source.get("properties", {}).get("value", env_temp)
-
-            else:
-                disp = source.get("properties", {}).get("dispersion")
-                target_val = source.get("properties", {}).get("value", env_temp)
-
-            r = handle_affection_ranged(nodes, poses, log, sensor, source, "temperature", disp)
-            if not r:
-                continue
 
-            progress = r["progress"]
-            influence = progress * (target_val - env_temp)
-            influences.append(influence)
-
-        final = env_temp + sum(influences)
+        final = ranged_property_value(nodes, poses, log, sensor, "temperature", env_temp, registry=registry)
         # final = apply_noise(final, noise)
         final = round(final, 2)
 
@@ -321,45 +430,14 @@ def handle_temperature_sensor(nodes, poses, log, sensor_id, env_properties=None)
         raise
 
 # Affected by humidifiers and waters
-def handle_humidity_sensor(nodes, poses, log, sensor_id, env_properties=None):
+def handle_humidity_sensor(nodes, poses, log, sensor_id, env_properties=None, registry=None):
     try:
-        sensor = find_node_by_id(nodes, sensor_id)
+        sensor = resolve_node(nodes, sensor_id, registry)
         props = sensor.get("properties", {})
         env_hum = (env_properties or {}).get("humidity", 40.0)
         noise = props.get("noise", 0.0)
-        influences = []
-
-        humidifiers = find_nodes_by_metadata(nodes, cls="actuator", type="envdevice", subtype="humidifier")
-        waters = find_nodes_by_metadata(nodes, cls="actor", type="envactor", subtype="water")
-        generic_entities = find_nodes_by_metadata(nodes)
-
-        # collect influencers
-        for source in humidifiers + waters + generic_entities:
-            # skip entity unless it explicitly affects humidity
-            if source in generic_entities and not affects(source, "humidity"):
-                continue
-            
-            disp = None
-            for a in source.get("properties", {}).get("affects", []):
-                if a["id"].lower() == "humidity":
-                    disp = a.get("dispersion")
-                    target_val = a.get("target_value")
-                    break
-            
-            # fallback
-            if target_val is None:
-                target_val = source.get("properties", {}).get("value", env_hum)
-
-            r = handle_affection_ranged(nodes, poses, log, sensor, source, "humidity", disp)
-            if not r:
-                continue
-            progress = r["progress"]
 
-            # influence relative to env_hum
-            influence = progress * (target_val - env_hum)
-            influences.append(influence)
-            
-        final = env_hum + sum(influences)
+        final = ranged_property_value(nodes, poses, log, sensor, "humidity", env_hum, registry=registry)
         # final = apply_noise(final, noise)
         final = round(final, 2)
         
@@ -370,7 +448,7 @@ def handle_humidity_sensor(nodes, poses, log, sensor_id, env_properties=None):
         raise
 
 # Affected by humans and fires
-def handle_gas_sensor(nodes, poses, log, sensor_id, env_properties=None):
+def handle_gas_sensor(nodes, poses, log, sensor_id, env_properties=None, registry=None):
     """
     Compute gas concentration for an environmental sensor.
     Influences:
@@ -379,42 +457,12 @@ def handle_gas_sensor(nodes, poses, log, sensor_id, env_properties=None):
     Returns: {"gas": float}
     """
     try:
-        sensor = find_node_by_id(nodes, sensor_id)
+        sensor = resolve_node(nodes, sensor_id, registry)
         props = sensor.get("properties", {})
         env_gas = (env_properties or {}).get("gas", 0.0)
         noise = props.get("noise", 0.0)
-        influences = []
-
-        # humans = find_nodes_by_metadata(nodes, cls="actor", subtype="human")
-        fires = find_nodes_by_metadata(nodes, cls="actor", type="envactor", subtype="fire")
-        generic_entities = find_nodes_by_metadata(nodes)
-
-        for source in fires + generic_entities:
-            # skip entity unless it explicitly affects temperature
-            if source in generic_entities and not affects(source, "gas"):
-                continue
 
-            disp = None
-            for a in source.get("properties", {}).get("affects", []):
-                if a["id"].lower() == "gas":
-                    disp = a.get("dispersion")
-                    target_val = a.get("target_value")
-                    break
-            
-            # fallback
-            if target_val is None:
-                target_val = source.get("properties", {}).get("value", env_gas)
-
-            r = handle_affection_ranged(nodes, poses, log, sensor, source, "gas", disp)
-            if not r:
-                continue
-            progress = r["progress"]
-
-            # influence relative to env_hum
-            influence = progress * (target_val - env_gas)
-            influences.append(influence)
-            
-        final = env_gas + sum(influences)
+        final = ranged_property_value(nodes, poses, log, sensor, "gas", env_gas, registry=registry)
         # final = apply_noise(final, noise)
         final = round(final, 2)
         
@@ -424,49 +472,19 @@ def handle_gas_sensor(nodes, poses, log, sensor_id, env_properties=None):
         raise
 
 # Affected by fires, leds
-def handle_light_sensor(nodes, poses, log, sensor_id, env_properties=None):
+def handle_light_sensor(nodes, poses, log, sensor_id, env_properties=None, registry=None):
     """
     Compute perceived light intensity at a sensor.
     Influences: fires only (intensity derived from fire.value)
     Returns: {"light": float}
     """
     try:
-        sensor = find_node_by_id(nodes, sensor_id)
+        sensor = resolve_node(nodes, sensor_id, registry)
         props = sensor.get("properties", {})
         env_light = (env_properties or {}).get("luminosity", 60.0)
         noise = props.get("noise", 0.0)
-        influences = []
 
-        fires = find_nodes_by_metadata(nodes, cls="actor", type="envactor", subtype="fire")
-        leds = find_nodes_by_metadata(nodes, cls="actuator", type="singleled", subtype="led")
-        generic_entities = find_nodes_by_metadata(nodes)
-        
-        for source in fires + leds + generic_entities:
-            # skip entity unless it explicitly affects temperature
-            if source in generic_entities and not affects(source, "light"):
-                continue
-
-            disp = None
-            for a in source.get("properties", {}).get("affects", []):
-                if a["id"].lower() == "light":
-                    disp = a.get("dispersion")
-                    target_val = a.get("target_value")
-                    break
-            
-            # fallback
-            if target_val is None:
-                target_val = source.get("properties", {}).get("value", env_light)
-
-            r = handle_affection_ranged(nodes, poses, log, sensor, source, "light", disp)
-            if not r:
-                continue
-            progress = r["progress"]
-
-            # influence relative to env_hum
-            influence = progress * (target_val - env_light)
-            influences.append(influence)
-            
-        final = env_light + sum(influences)
+        final = ranged_property_value(nodes, poses, log, sensor, "light", env_light, registry=registry)
         # final = apply_noise(final, noise)
         final = round(final, 2)
         
@@ -478,47 +496,42 @@ def handle_light_sensor(nodes, poses, log, sensor_id, env_properties=None):
 
 # Affected by humans with sound, sound sources, speakers (when playing smth),
 # robots (when moving)
-def handle_microphone_sensor(nodes, poses, log, sensor_id, env_properties=None, env=None):
+def handle_microphone_sensor(nodes, poses, log, sensor_id, env_properties=None, env=None, registry=None):
     """
     Detects sound-emitting entities (humans, speakers, sound sources, robots).
     Returns a dict of detections {target_name: {...}} with distance and signal strength.
     """
     try:
-        sensor = find_node_by_id(nodes, sensor_id)
+        sensor = resolve_node(nodes, sensor_id, registry)
         if not sensor:
             log.warning(f"[Microphone] Sensor {sensor_id} not found in node tree.")
             return {}
 
-        props = sensor.get("properties", {})
         detections = {}
-        noise = props.get("noise", 0.0)
+        noise = sensor_noise(sensor, registry)
 
         # --- Get sensor pose ---
-        pose = find_pose_by_metadata(
-            poses,
-            cls=sensor.get("class", "").lower(),
-            type=sensor.get("type", "").lower(),
-            subtype=sensor.get("subtype", "").lower(),
-            name=sensor.get("name", "").lower()
-        )
+        pose = resolve_pose(poses, sensor, registry)
         if not pose:
             log.warning(f"[Microphone] Pose not found for {sensor_id}")
             return {}
 
         # --- Candidate targets ---
-        humans = find_nodes_by_metadata(nodes, cls="actor", subtype="human")
-        speakers = find_nodes_by_metadata(nodes, cls="actuator", type="speaker")
-        soundsources = find_nodes_by_metadata(nodes, cls="actor", subtype="soundsource")
-        robots = find_nodes_by_metadata(nodes, cls="composite", type="robot")
-        visible_targets = humans + speakers + soundsources + robots
+        # humans, speakers, sound sources, robots
+        visible_targets = find_nodes_near(nodes, pose, (
+            {"cls": "actor", "subtype": "human"},
+            {"cls": "actuator", "type": "speaker"},
+            {"cls": "actor", "subtype": "soundsource"},
+            {"cls": "composite", "type": "robot"},
+        ), registry=registry)
 
         for target in visible_targets:
-            r = handle_affection_ranged(nodes, poses, log, sensor, target, target.get("subtype"))
-            if not r:
+            r = handle_affection_ranged(nodes, poses, log, sensor, target, target.get("subtype"), registry=registry)
+            if not r or not line_of_sight(poses, pose, target, registry):
                 continue
 
             # compute first
-            dist = round(apply_noise(r["distance"], noise), 2)
+            dist = round(noise(r["distance"]), 2)
             rng = r["range"]
             weight = max(0.0, 1.0 - dist / rng)
             signal = round(weight * 100.0, 2)
@@ -548,7 +561,22 @@ def handle_microphone_sensor(nodes, poses, log, sensor_id, env_properties=None,
         log.error(f"handle_microphone_sensor: {e}")
         return {}
 
-def compute_luminosity(nodes, poses, log, sensor_id, env_properties=None, print_debug=False):
+def luminosity_inputs(name, env_luminosity, registry):
+    """Version key of a luminosity reading: sensor pose, LEDs, fires and baseline."""
+    return (
+        registry.pose_version(name),
+        registry.bucket_version("actuator", "singleled", "led"),
+        registry.bucket_version("actor", "envactor", "fire"),
+        env_luminosity,
+    )
+
+def finish_luminosity(lum, sensor, registry=None):
+    """Per-read noise and jitter on top of a (possibly cached) clean luminosity."""
+    lum = sensor_noise(sensor, registry)(lum)
+    lum += sensor_stream(sensor, registry).uniform(-0.25, 0.25)
+    return round(lum, 2)
+
+def compute_luminosity(nodes, poses, log, sensor_id, env_properties=None, print_debug=False, registry=None):
     """
     Compute the luminosity at a given place identified by `name`.
     This method calculates the luminosity at a specific location by considering
@@ -564,33 +592,35 @@ def compute_luminosity(nodes, poses, log, sensor_id, env_properties=None, print_
     """
     try:
         # --- Initialization ---
-        sensor = find_node_by_id(nodes, sensor_id)
+        sensor = resolve_node(nodes, sensor_id, registry)
         if not sensor:
             raise Exception(f"[Luminosity] Sensor '{sensor_id}' not found in nodes")
         env_luminosity = (env_properties or {}).get("luminosity", 60.0)
         lum = 0.0
-        noise = sensor.get("properties", {}).get("noise", 0.0)
 
         # --- Find sensor pose ---
-        pose = find_pose_by_metadata(
-            poses,
-            cls=sensor.get("class", "").lower(),
-            type=sensor.get("type", "").lower(),
-            subtype=sensor.get("subtype", "").lower(),
-            name=sensor.get("name", "").lower()
-        )
+        pose = resolve_pose(poses, sensor, registry)
         if not pose:
             log.warning(f"[Luminosity] Pose not found for {sensor_id}")
             return env_luminosity
 
+        # --- Reuse the clean value while pose, lights and baseline are unchanged ---
+        name = (sensor.get("name") or "").lower()
+        inputs = None
+        if registry is not None and not print_debug:
+            inputs = luminosity_inputs(name, env_luminosity, registry)
+            cached = registry.luminosity_cache.get(name)
+            if cached is not None and cached[0] == inputs:
+                return finish_luminosity(cached[1], sensor, registry)
+
         sensor_pose = [pose["x"], pose["y"]]
         if print_debug:
             log.info(f"[Luminosity] Computing for {sensor_id} at {sensor_pose}")
 
         # --- (1) Environmental lights (LEDs) ---
-        leds = find_nodes_by_metadata(nodes, cls="actuator", type="singleled", subtype="led")
+        leds = find_nodes_by_metadata(nodes, cls="actuator", type="singleled", subtype="led", registry=registry)
         for led in leds:
-            r = handle_affection_ranged(nodes, poses, log, sensor, led, "light")
+            r = handle_affection_ranged(nodes, poses, log, sensor, led, "light", registry=registry)
             if r:
                 dist = r["distance"]
                 rng = r["range"]
@@ -603,9 +633,9 @@ def compute_luminosity(nodes, poses, log, sensor_id, env_properties=None, print_
                     log.info(f"\t[LED] {led['name']} from {src} -> +{weight * led_val:.1f}")
 
         # --- (2) Fire actors ---
-        fires = find_nodes_by_metadata(nodes, cls="actor", type="envactor", subtype="fire")
+        fires = find_nodes_by_metadata(nodes, cls="actor", type="envactor", subtype="fire", registry=registry)
         for fire in fires:
-            r = handle_affection_ranged(nodes, poses, log, sensor, fire, "light")
+            r = handle_affection_ranged(nodes, poses, log, sensor, fire, "light", registry=registry)
             if r:
                 dist = r["distance"]
                 rng = r["range"]
@@ -620,86 +650,61 @@ def compute_luminosity(nodes, poses, log, sensor_id, env_properties=None, print_
             lum = lum * 0.1 + env_luminosity
         else:
             lum = env_luminosity * 0.1 + lum
-        # Clamp and add noise
+        # Clamp, then add noise per read
         lum = max(0.0, min(100.0, lum))
-        lum = apply_noise(lum, noise)
-        lum += random.uniform(-0.25, 0.25)
+        if inputs is not None:
+            registry.luminosity_cache[name] = (inputs, lum)
+        lum = finish_luminosity(lum, sensor, registry)
 
         if print_debug:
             log.info(f"\t[Final Luminosity] {lum:.2f} (env={env_luminosity})")
 
-        return round(lum, 2)
+        return lum
     except Exception as e:
         log.error(f"compute_luminosity: {e}")
         raise
 
 # Affected by robots
-def handle_distance_sensor(nodes, poses, log, sensor_id, env_properties=None):
+def handle_distance_sensor(nodes, poses, log, sensor_id, env_properties=None, registry=None):
     """
     Compute distance readings for robots in range.
     Returns: {"distance": float} of the nearest detected robot.
     """
     try:
         # --- Find the sensor node (recursively) ---
-        sensor = find_node_by_id(nodes, sensor_id)
+        sensor = resolve_node(nodes, sensor_id, registry)
         if not sensor:
             log.warning(f"[Sonar] Sensor {sensor_id} not found in node tree.")
             return {"distance": 0.0}
         
         props = sensor.get("properties", {})
-        noise = props.get("noise", 0.0)
-        sensor_pose = find_pose_by_metadata(
-            poses,
-            sensor.get("class", ""),
-            sensor.get("type", ""),
-            sensor.get("subtype", ""),
-            sensor.get("name", "")
-        )
+        noise = sensor_noise(sensor, registry)
+        sensor_pose = resolve_pose(poses, sensor, registry)
         if not sensor_pose:
             log.warning(f"[Sonar] Pose for {sensor_id} not found in pose tree.")
             return {"distance": 0.0}
 
-        targets = (
-            find_nodes_by_metadata(nodes, cls="composite", type="robot")
-            + find_nodes_by_metadata(nodes, cls="obstacle")
-            + find_nodes_by_metadata(nodes, cls="actor")
-        )
+        targets = find_nodes_near(nodes, sensor_pose, (
+            {"cls": "composite", "type": "robot"},
+            {"cls": "obstacle"},
+            {"cls": "actor"},
+        ), radius=arc_parameters(sensor)[0], registry=registry)
 
+        # --- Distance + FOV for all targets at once, nearest hit by argmin ---
+        candidates, dist, bearing, visible, min_a, max_a = arced_pass(
+            poses, sensor, sensor_pose, targets, registry)
         nearest = None
         min_dist = float("inf")
+        hit = nearest_hits(dist[None, :], visible[None, :])[0]
+        if hit >= 0:
+            min_dist = float(dist[hit])
+            nearest = arced_result(sensor, candidates[hit], dist[hit], bearing[hit], min_a, max_a)
 
-        for target in targets:
-            if target.get("name") == sensor.get("name"):
-                continue
-
-            # --- Compute target pose recursively ---
-            target_pose = find_pose_by_metadata(
-                poses,
-                target.get("class", ""),
-                target.get("type", ""),
-                target.get("subtype", ""),
-                target.get("name", "")
-            )
-            if not target_pose:
-                continue
-
-            # --- Perform distance + FOV intersection check ---
-            r = handle_affection_arced(
-                nodes, poses, log,
-                sensor, target, target.get("subtype"),
-                sensor_pose=sensor_pose, target_pose=target_pose
-            )
-            if not r:
-                continue
-            d = r["distance"]
-            if d < min_dist:
-                min_dist = d
-                nearest = r
         if not nearest:
-            sensed = apply_noise(props.get("range", 0), noise)
+            sensed = noise(props.get("range", 0))
             return {"distance": round(sensed, 2)}
         
-        sensed = apply_noise(min_dist, noise)
+        sensed = noise(min_dist)
         return {
             "distance": round(min_dist, 2),
             "detected_class": nearest["class"],
@@ -713,8 +718,80 @@ def handle_distance_sensor(nodes, poses, log, sensor_id, env_properties=None):
         log.error(f"handle_distance_sensor({sensor_id}) crashed: {e}\n{traceback.format_exc()}")
         raise
 
+# Affected by obstacles, robots, actors (and the environment walls)
+def handle_lidar_sensor(nodes, poses, log, sensor_id, env_properties=None, env=None, registry=None):
+    """
+    Simulate one LiDAR scan: numBeams rays between minAngle and maxAngle
+    (degrees, relative to the sensor heading) cast at once against the world
+    polygons of obstacles, robots and actors. Shapes containing the sensor
+    (e.g. the robot carrying it) are ignored.
+    Returns: {"ranges": [float, ...], "min_angle", "max_angle", "num_beams"}
+    """
+    try:
+        sensor = resolve_node(nodes, sensor_id, registry)
+        if not sensor:
+            log.warning(f"[LiDAR] Sensor {sensor_id} not found in node tree.")
+            return {"ranges": []}
+
+        props = sensor.get("properties", {})
+        rng = props.get("range", 0.0) or 0.0
+        min_angle = props.get("minAngle", 0.0) or 0.0
+        max_angle = props.get("maxAngle", 360.0)
+        max_angle = 360.0 if max_angle is None else max_angle
+        num_beams = int(props.get("numBeams", 360) or 360)
+        angles = beam_angles(min_angle, max_angle, num_beams)
+        result = {"min_angle": min_angle, "max_angle": max_angle, "num_beams": len(angles)}
+
+        pose = resolve_pose(poses, sensor, registry)
+        if not pose:
+            log.warning(f"[LiDAR] Pose for {sensor_id} not found in pose tree.")
+            result["ranges"] = [round(rng, 2)] * len(angles)
+            return result
+
+        # whole buckets: an extended shape can reach into range from afar
+        grid = getattr(registry, "occupancy", None)
+        if grid is not None:
+            grid.refresh()
+        static = set(grid.names) if grid is not None else set()
+        targets = (
+            find_nodes_by_metadata(nodes, cls="composite", type="robot", registry=registry)
+            + [o for o in find_nodes_by_metadata(nodes, cls="obstacle", registry=registry)
+               if (o.get("name") or "").lower() not in static]
+            + find_nodes_by_metadata(nodes, cls="actor", registry=registry)
+        )
+
+        sensor_name = (sensor.get("name") or "").lower()
+        polys = []
+        for target in targets:
+            if (target.get("name") or "").lower() == sensor_name or not target.get("shape"):
+                continue
+            target_pose = resolve_pose(poses, target, registry)
+            if not target_pose:
+                continue
+            poly = world_points(target_pose, target["shape"], registry, target.get("name"))
+            if poly and not points_in_polygon(pose["x"], pose["y"], poly):
+                polys.append(poly)
+
+        segments = polygon_segments(polys)
+        if env is not None and getattr(env, "width", None) and getattr(env, "height", None):
+            segments = np.vstack((segments, bounds_segments(env.width, env.height)))
+
+        rays = np.radians(pose["theta"] + angles)
+        ranges = cast_rays(pose["x"], pose["y"], rays, rng, segments)
+        if grid is not None:
+            # static obstacles: ray-marched on the occupancy bits
+            inside = grid.point(pose["x"], pose["y"])
+            ranges = np.minimum(ranges, grid.march(pose["x"], pose["y"], rays, rng, exclude=inside))
+        ranges = np.clip(sensor_noise(sensor, registry)(ranges), 0.0, rng)
+        result["ranges"] = np.round(ranges, 2).tolist()
+        return result
+
+    except Exception as e:
+        log.error(f"handle_lidar_sensor({sensor_id}) error: {e}")
+        raise
+
 # Affected by barcode, color, human, qr, text
-def handle_reader_sensor(nodes, poses, log, sensor_id, env_properties=None, env=None):
+def handle_reader_sensor(nodes, poses, log, sensor_id, env_properties=None, env=None, registry=None):
     """
     Generic handler for active reader-type sensors (camera, RFID, barcode, QR, etc.).
     Decides dynamically what entities are visible or readable.
@@ -722,24 +799,17 @@ def handle_reader_sensor(nodes, poses, log, sensor_id, env_properties=None, env=
         dict of detections {target_name: {...}}.
     """
     try:
-        sensor = find_node_by_id(nodes, sensor_id)
+        sensor = resolve_node(nodes, sensor_id, registry)
         if not sensor:
             log.warning(f"[Reader] Sensor {sensor_id} not found in node tree.")
             return {}
 
-        props = sensor.get("properties", {})
-        noise = props.get("noise", 0.0)
+        noise = sensor_noise(sensor, registry)
         subtype = sensor.get("subtype", "").lower()
         detections = {}
 
         # --- Get pose ---
-        pose = find_pose_by_metadata(
-            poses,
-            cls=sensor.get("class", "").lower(),
-            type=sensor.get("type", "").lower(),
-            subtype=subtype,
-            name=sensor.get("name", "").lower(),
-        )
+        pose = resolve_pose(poses, sensor, registry)
         if not pose:
             log.warning(f"[Reader] Pose not found for {sensor_id}")
             return {}
@@ -747,36 +817,47 @@ def handle_reader_sensor(nodes, poses, log, sensor_id, env_properties=None, env=
         # --- Determine detection domain ---
         if subtype == "camera":
             # Visible light-based
-            luminosity = compute_luminosity(nodes, poses, log, sensor_id, env_properties)
+            luminosity = compute_luminosity(nodes, poses, log, sensor_id, env_properties, registry=registry)
             log.info(f"[Reader:Camera] {sensor_id}: local luminosity = {round(luminosity, 2)}")
 
-            humans = find_nodes_by_metadata(nodes, cls="actor", subtype="human")
-            qrs = find_nodes_by_metadata(nodes, cls="actor", type="text", subtype="qrcode")
-            barcodes = find_nodes_by_metadata(nodes, cls="actor", type="text", subtype="barcode")
-            texts = find_nodes_by_metadata(nodes, cls="actor", type="text", subtype="plaintext")
-            colors = find_nodes_by_metadata(nodes, cls="actor", subtype="color")
-            leds = find_nodes_by_metadata(nodes, cls="actuator", type="singleled", subtype="led")
+            humans = find_nodes_by_metadata(nodes, cls="actor", subtype="human", registry=registry)
+            qrs = find_nodes_by_metadata(nodes, cls="actor", type="text", subtype="qrcode", registry=registry)
+            barcodes = find_nodes_by_metadata(nodes, cls="actor", type="text", subtype="barcode", registry=registry)
+            texts = find_nodes_by_metadata(nodes, cls="actor", type="text", subtype="plaintext", registry=registry)
+            colors = find_nodes_by_metadata(nodes, cls="actor", subtype="color", registry=registry)
+            leds = find_nodes_by_metadata(nodes, cls="actuator", type="singleled", subtype="led", registry=registry)
             # robots = find_nodes_by_metadata(nodes, cls="composite", type="robot")
 
             visible_targets = humans + qrs + barcodes + texts + colors + leds # + robots
 
         elif subtype == "rfid":
             # RFID field-based
-            tags = find_nodes_by_metadata(nodes, cls="actor", type="text", subtype="rfidtag")
+            tags = find_nodes_by_metadata(nodes, cls="actor", type="text", subtype="rfidtag", registry=registry)
             visible_targets = tags
 
         else:
             log.warning(f"[Reader] Unsupported reader subtype '{subtype}'")
             return {}
 
+        # --- FOV test of every arced target in one pass ---
+        candidates, dist, bearing, visible, min_a, max_a = arced_pass(
+            poses, sensor, pose,
+            [t for t in visible_targets if t["class"] != "actuator"], registry)
+        arced_hits = {
+            id(t): arced_result(sensor, t, dist[k], bearing[k], min_a, max_a)
+            for k, t in enumerate(candidates) if visible[k]
+        }
+
         # --- Process detections ---
         for target in visible_targets:
-            handler = handle_affection_arced if target["class"] != "actuator" else handle_affection_ranged
-            r = handler(nodes, poses, log, sensor, target, target.get("subtype"))
-            if not r:
+            if target["class"] != "actuator":
+                r = arced_hits.get(id(target))
+            else:
+                r = handle_affection_ranged(nodes, poses, log, sensor, target, target.get("subtype"), registry=registry)
+            if not r or not line_of_sight(poses, pose, target, registry):
                 continue
             
-            dist = round(apply_noise(r["distance"], noise), 2)
+            dist = round(noise(r["distance"]), 2)
             rng = r["range"]
             name = target["name"]
 
@@ -817,8 +898,10 @@ def handle_reader_sensor(nodes, poses, log, sensor_id, env_properties=None, env=
         # --- Low light filtering (camera only) ---
         if subtype == "camera" and luminosity < 30 and detections:
             fail_prob = (30 - luminosity) / 30.0
-            for k in list(detections.keys()):
-                if random.random() < fail_prob:
+            names = list(detections.keys())
+            draws = sensor_stream(sensor, registry).random(len(names))
+            for k, u in zip(names, draws):
+                if u < fail_prob:
                     detections.pop(k, None)
                     log.info(f"[Reader:Camera] Dropped {k} due to low light")
 
@@ -829,16 +912,18 @@ def handle_reader_sensor(nodes, poses, log, sensor_id, env_properties=None, env=
         return {}
 
 # Affected by robots
-def handle_area_alarm(nodes, poses, log, sensor_id, env_properties=None):
+def handle_area_alarm(nodes, poses, log, sensor_id, env_properties=None, registry=None):
     """Trigger when a robot is within range."""
     try:
-        sensor = find_node_by_id(nodes, sensor_id)
+        sensor = resolve_node(nodes, sensor_id, registry)
         if not sensor:
             return {"triggered": False, "detections": {}}
 
         detections = []
-        for r in find_nodes_by_metadata(nodes, cls="composite", type="robot"):
-            aff = handle_affection_ranged(nodes, poses, log, sensor, r, "robot")
+        pose = resolve_pose(poses, sensor, registry)
+        robots = find_nodes_near(nodes, pose, ({"cls": "composite", "type": "robot"},), registry=registry)
+        for r in robots:
+            aff = handle_affection_ranged(nodes, poses, log, sensor, r, "robot", registry=registry)
             if aff and aff["distance"] <= aff["range"]:
                 detections.append(r["name"])
         return {"triggered": bool(detections), "detections": detections}
@@ -848,7 +933,7 @@ def handle_area_alarm(nodes, poses, log, sensor_id, env_properties=None):
         return {"triggered": False, "detections": "{}"}
 
 # Affected by robots
-def handle_linear_alarm(nodes, poses, log, sensor_id):
+def handle_linear_alarm(nodes, poses, log, sensor_id, registry=None):
     """
     Handles linear alarms for robots based on their positions and declared linear paths.
     Args:
@@ -871,7 +956,7 @@ def handle_linear_alarm(nodes, poses, log, sensor_id):
     try:
         log.info(f"[LinearAlarm] Evaluating {sensor_id}")
 
-        sensor = find_node_by_id(nodes, sensor_id)
+        sensor = resolve_node(nodes, sensor_id, registry)
         if not isinstance(sensor, dict):
             return {"triggered": False, "detections": []}
 
@@ -880,13 +965,7 @@ def handle_linear_alarm(nodes, poses, log, sensor_id):
         if len(points) < 2:
             return {"triggered": False, "detections": []}
 
-        pose = find_pose_by_metadata(
-            poses,
-            cls=sensor.get("class", "").lower(),
-            type=sensor.get("type", "").lower(),
-            subtype=sensor.get("subtype", "").lower(),
-            name=sensor.get("name", "").lower(),
-        )
+        pose = resolve_pose(poses, sensor, registry)
         if not pose:
             log.warning(f"[LinearAlarm] Pose not found for {sensor_id}")
             return {"triggered": False, "detections": []}
@@ -900,24 +979,38 @@ def handle_linear_alarm(nodes, poses, log, sensor_id):
             ]
 
         start, end = tf_local_to_world(points[0]), tf_local_to_world(points[1])
+        sensor_name = (sensor.get("name") or sensor_id).lower()
 
         detections = []
-        robots = find_nodes_by_metadata(nodes, cls="composite", type="robot")
+        robots = find_nodes_by_metadata(nodes, cls="composite", type="robot", registry=registry)
 
         # log.info(f"[LinearAlarm][DEBUG] Beam start={start}, end={end}")
         for rob in robots:
-            rob_pose = find_pose_by_metadata(poses, rob["class"], rob["type"], rob.get("subtype"), rob["name"])
+            rob_pose = resolve_pose(poses, rob, registry)
             if not rob_pose:
                 continue
-            world_pts = get_shape_world_points(rob_pose, rob.get("shape", {}))
+            world_pts = world_points(rob_pose, rob.get("shape", {}), registry, rob.get("name"))
             if not world_pts or len(world_pts) < 2:
                 continue
 
+            # Sweep the outline from where this alarm last saw the robot, so
+            # a robot moving further than its width per update still trips it
+            swept = False
+            if registry is not None:
+                previous = registry.sweep_from(sensor_name, rob.get("name"), rob_pose)
+                if previous is not None and previous != rob_pose:
+                    before = get_shape_world_points(previous, rob.get("shape", {}))
+                    world_pts = [tuple(p) for p in swept_outline(before, world_pts).tolist()]
+                    swept = True
+
             # Test each robot edge for intersection
-            for a, b in zip(world_pts, world_pts[1:] + [world_pts[0]]):
+            for a, b in zip(world_pts, world_pts[1:] + world_pts[:1]):
                 if check_lines_intersection(start, end, a, b):
                     detections.append(rob["name"])
                     break
+            else:
+                if swept and points_in_polygon(start[0], start[1], world_pts):
+                    detections.append(rob["name"])
 
         return {"triggered": bool(detections), "detections": detections}
 
@@ -980,16 +1073,15 @@ def handle_linear_alarm(nodes, poses, log, sensor_id):
 #         log.error(f"handle_generic_sensor({sensor_id}) error: {e}")
 #         return {}
 
-def handle_generic_sensor(nodes, poses, log, sensor_id, env_properties=None):
+def handle_generic_sensor(nodes, poses, log, sensor_id, env_properties=None, registry=None):
     try:
-        sensor = find_node_by_id(nodes, sensor_id)
+        sensor = resolve_node(nodes, sensor_id, registry)
         if not sensor:
             log.warning(f"[GenericSensor] {sensor_id} not found.")
             return {}
 
         props = sensor.get("properties", {})
         declared_affections = props.get("affectedBy", [])
-        entities = find_nodes_by_metadata(nodes)
 
         results = {}
 
@@ -1000,38 +1092,7 @@ def handle_generic_sensor(nodes, poses, log, sensor_id, env_properties=None):
 
             aff = aff.lower()
             base_value = (env_properties or {}).get(aff, props.get("value", 0.0))
-            influences = []
-
-            for source in entities:
-                if source.get("name") == sensor.get("name"):
-                    continue
-
-                if not affects(source, aff):
-                    continue
-
-                disp = None
-                target_val = None
-
-                for a in source.get("properties", {}).get("affects", []):
-                    aid = a.get("id") if isinstance(a, dict) else getattr(a, "id", None)
-
-                    if aid and aid.lower() == aff:
-                        disp = a.get("dispersion") if isinstance(a, dict) else getattr(a, "dispersion", None)
-                        target_val = a.get("target_value") if isinstance(a, dict) else getattr(a, "target_value", None)
-                        break
-
-                if target_val is None:
-                    target_val = source.get("properties", {}).get("value", base_value)
-
-                r = handle_affection_ranged(nodes, poses, log, sensor, source, aff, disp)
-                if not r:
-                    continue
-
-                progress = r.get("progress", 0.0)
-                influence = progress * (target_val - base_value)
-                influences.append(influence)
-
-            final = base_value + sum(influences)
+            final = ranged_property_value(nodes, poses, log, sensor, aff, base_value, registry=registry)
             results[aff] = round(final, 2)
 
         if not results:
@@ -1044,13 +1105,13 @@ def handle_generic_sensor(nodes, poses, log, sensor_id, env_properties=None):
         log.error(f"handle_generic_sensor({sensor_id}) error: {e}")
         return {}
 
-def handle_generic_actuator(nodes, poses, log, actuator_id, env_properties):
+def handle_generic_actuator(nodes, poses, log, actuator_id, env_properties, registry=None):
     """
     Generic handler for CustomThing actuators.
     Applies effects declared in properties['affects']: list[AffectEntry].
     Returns dict {property: delta_value}.
     """
-    actuator = find_node_by_id(nodes, actuator_id)
+    actuator = resolve_node(nodes, actuator_id, registry)
     if not actuator:
         log.warning(f"[GenericActuator] {actuator_id} not found.")
         return {}
@@ -1062,24 +1123,20 @@ def handle_generic_actuator(nodes, poses, log, actuator_id, env_properties):
 
     for declared in declared_affections:
         aff = declared.id.lower()
-        disp = declared.dispersion
+        disp = compile_dispersion(declared.dispersion) if declared.dispersion else None
         
         # distance attenuation
         sensor_results = []  # we apply ranged attenuation to all sensors in environment
-        sensors = find_nodes_by_metadata(nodes, cls="sensor")
+        sensors = find_nodes_by_metadata(nodes, cls="sensor", registry=registry)
 
         for s in sensors:
-            r = handle_affection_ranged(nodes, poses, log, s, actuator, aff)
+            r = handle_affection_ranged(nodes, poses, log, s, actuator, aff, registry=registry)
             if not r:
                 continue
             val = r["value"]
 
             if disp:
-                val = apply_dispersion(
-                    val,
-                    disp.__class__.__name__.lower(),
-                    **disp.__dict__
-                )
+                val = disp(val)
 
             sensor_results.append(val)
 
@@ -1090,7 +1147,59 @@ def handle_generic_actuator(nodes, poses, log, actuator_id, env_properties):
 
     return results
 
-def check_affectability(nodes, poses, log, sensor_id, env_properties, env=None):
+# Inputs of deterministic readings, by sensor subtype: the affected
+# properties of scalar sensors and the target buckets of geometric ones.
+_SCALAR_INPUTS = {
+    "temperature": ("temperature",),
+    "humidity": ("humidity",),
+    "gas": ("gas",),
+    "light": ("light",),
+}
+_TARGET_INPUTS = {
+    "sonar": (("composite", "robot"), ("obstacle",), ("actor",)),
+    "ir": (("composite", "robot"), ("obstacle",), ("actor",)),
+    "lidar": (("composite", "robot"), ("obstacle",), ("actor",)),
+    "areaalarm": (("composite", "robot"),),
+}
+# Random (noise, light drop-outs) or RPC driven readings, and the linear
+# alarm, whose beam test also depends on the sweep origins it keeps in the
+# registry (a crossing is reported once, on the check that sees it)
+_UNCACHED_SENSORS = {"microphone", "camera", "rfid", "linearalarm"}
+
+def affection_inputs(sensor, env_properties, registry):
+    """
+    Version key of everything a sensor's reading depends on: its own pose
+    and value, the sources / targets it can see, and env_properties.
+    Returns None when the reading must be recomputed every time.
+    """
+    subtype = ((sensor.get("subtype") or sensor.get("type")) or "").lower()
+    props = sensor.get("properties", {})
+    if subtype in _UNCACHED_SENSORS or isinstance(props.get("noise"), dict):
+        return None
+    try:
+        env_key = tuple(sorted((env_properties or {}).items()))
+        hash(env_key)
+    except TypeError:
+        return None
+
+    name = sensor.get("name", "")
+    if subtype in _TARGET_INPUTS:
+        deps = tuple(registry.bucket_version(*q) for q in _TARGET_INPUTS[subtype])
+    else:
+        affected = _SCALAR_INPUTS.get(subtype)
+        if affected is None:
+            affected = [
+                (a.get("id") if isinstance(a, dict) else getattr(a, "id", None)) or ""
+                for a in props.get("affectedBy") or []
+            ]
+        deps = tuple(registry.affects_version(a) for a in affected)
+        # a diffusing field changes with every step, not only with its sources
+        physics = getattr(registry, "physics", None)
+        if physics is not None and any(physics.covers(a) for a in affected):
+            deps += (physics.steps,)
+    return (registry.pose_version(name), registry.value_version(name), deps, env_key)
+
+def check_affectability(nodes, poses, log, sensor_id, env_properties, env=None, registry=None):
     """
     Check the affectability of a device based on its type and subtype.
     Parameters:
@@ -1103,11 +1212,13 @@ def check_affectability(nodes, poses, log, sensor_id, env_properties, env=None):
     """
     # --- Try to resolve node dict ---
     sensor = None
-    if sensor_id in nodes:
+    if registry is not None:
+        sensor = registry.get_node(sensor_id)
+    elif sensor_id in nodes:
         sensor = nodes[sensor_id]
     else:
         # fallback recursive search for nested sensors
-        all_sensors = find_nodes_by_metadata(nodes, cls="sensor")
+        all_sensors = find_nodes_by_metadata(nodes, cls="sensor", registry=registry)
         for s in all_sensors:
             if s.get("name") == sensor_id:
                 sensor = s
@@ -1128,6 +1239,14 @@ def check_affectability(nodes, poses, log, sensor_id, env_properties, env=None):
 
     # log.info(f"[Affectability] Evaluating {node_class}:{node_type}:{node_subtype or ''} -> {node_name}")
 
+    # --- Reuse the last reading while none of its inputs changed ---
+    inputs = None
+    if registry is not None and node_class == "sensor":
+        inputs = affection_inputs(sensor, env_properties, registry)
+        cached = registry.affection_cache.get(node_name)
+        if inputs is not None and cached is not None and cached[0] == inputs:
+            return {"affections": cached[1], "env_properties": env_properties}
+
     affected = {}
     try:
         # --- Sensor-based affectability ---
@@ -1135,50 +1254,57 @@ def check_affectability(nodes, poses, log, sensor_id, env_properties, env=None):
             subtype = node_subtype or node_type
 
             if subtype == "temperature":
-                affected = handle_temperature_sensor(nodes, poses, log, sensor_id, env_properties)
+                affected = handle_temperature_sensor(nodes, poses, log, sensor_id, env_properties, registry=registry)
             elif subtype == "humidity":
-                affected = handle_humidity_sensor(nodes, poses, log, sensor_id, env_properties)
+                affected = handle_humidity_sensor(nodes, poses, log, sensor_id, env_properties, registry=registry)
             elif subtype == "gas":
-                affected = handle_gas_sensor(nodes, poses, log, sensor_id, env_properties)
+                affected = handle_gas_sensor(nodes, poses, log, sensor_id, env_properties, registry=registry)
             elif subtype == "microphone":
-                detections = handle_microphone_sensor(nodes, poses, log, sensor_id, env_properties, env=env)
+                detections = handle_microphone_sensor(nodes, poses, log, sensor_id, env_properties, env=env, registry=registry)
                 return {"detections": detections, "env_properties": env_properties}
             elif subtype in ("camera", "rfid"):
-                detections = handle_reader_sensor(nodes, poses, log, sensor_id, env_properties, env=env)
+                detections = handle_reader_sensor(nodes, poses, log, sensor_id, env_properties, env=env, registry=registry)
                 return {"detections": detections, "env_properties": env_properties}
             elif subtype == "areaalarm":
-                affected = handle_area_alarm(nodes, poses, log, sensor_id)
+                affected = handle_area_alarm(nodes, poses, log, sensor_id, registry=registry)
             elif subtype == "linearalarm":
-                affected = handle_linear_alarm(nodes, poses, log, sensor_id)
+                affected = handle_linear_alarm(nodes, poses, log, sensor_id, registry=registry)
             elif subtype in ("sonar", "ir"):
-                affected = handle_distance_sensor(nodes, poses, log, sensor_id)
+                affected = handle_distance_sensor(nodes, poses, log, sensor_id, registry=registry)
+            elif subtype == "lidar":
+                affected = handle_lidar_sensor(nodes, poses, log, sensor_id, env_properties, env=env, registry=registry)
             elif subtype == "light":
-                affected = handle_light_sensor(nodes, poses, log, sensor_id, env_properties)
+                affected = handle_light_sensor(nodes, poses, log, sensor_id, env_properties, registry=registry)
             else:
-                affected = handle_generic_sensor(nodes, poses, log, sensor_id, env_properties)
+                affected = handle_generic_sensor(nodes, poses, log, sensor_id, env_properties, registry=registry)
 
         # --- Composite sensors (robot-mounted sensors, pantilt, etc.) ---
         elif node_class == "composite" and node_type == "robot":
             subtype = node_subtype or node_name
 
             if subtype == "microphone":
-                affected = handle_microphone_sensor(nodes, poses, log, sensor_id, env_properties)
+                affected = handle_microphone_sensor(nodes, poses, log, sensor_id, env_properties, registry=registry)
             elif subtype in ("camera", "rfid"):
-                detections = handle_reader_sensor(nodes, poses, log, sensor_id, env_properties, env=env)
+                detections = handle_reader_sensor(nodes, poses, log, sensor_id, env_properties, env=env, registry=registry)
                 return {"detections": detections, "env_properties": env_properties}
             elif subtype in ("sonar", "ir"):
-                affected = handle_distance_sensor(nodes, poses, log, sensor_id)
+                affected = handle_distance_sensor(nodes, poses, log, sensor_id, registry=registry)
+            elif subtype == "lidar":
+                affected = handle_lidar_sensor(nodes, poses, log, sensor_id, env_properties, env=env, registry=registry)
             elif subtype == "temperature":
-                affected = handle_temperature_sensor(nodes, poses, log, sensor_id, env_properties)
+                affected = handle_temperature_sensor(nodes, poses, log, sensor_id, env_properties, registry=registry)
             elif subtype == "humidity":
-                affected = handle_humidity_sensor(nodes, poses, log, sensor_id, env_properties)
+                affected = handle_humidity_sensor(nodes, poses, log, sensor_id, env_properties, registry=registry)
             elif subtype == "gas":
-                affected = handle_gas_sensor(nodes, poses, log, sensor_id, env_properties)
+                affected = handle_gas_sensor(nodes, poses, log, sensor_id, env_properties, registry=registry)
 
     except Exception as e:
         log.error(f"[Affectability] Error handling {sensor_id}: {e}")
         raise
 
+    if inputs is not None:
+        registry.affection_cache[node_name] = (inputs, affected)
+
     return {
         "affections": affected,
         "env_properties": env_properties
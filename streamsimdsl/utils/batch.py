@@ -0,0 +1,407 @@
+"""
+Vectorised affection evaluation for every passive sensor at once.
+
+``check_affectability`` answers one sensor at a time and walks every source
+for it, which is fine for a handful of devices but grows as sensors x sources
+Python iterations per tick. The engine here gathers sensor and source
+positions into NumPy arrays and evaluates the whole sensor x source
+distance / weight / progress matrix in one pass per affected property, then
+reduces it with a masked sum. Semantics follow ``ranged_property_value``:
+
+    weight   = 1 - dist / source_range      (0 outside range)
+    progress = clamp(dispersion(weight))
+    value    = base + sum(progress * (target - base))
+
+Arced (field-of-view) sensors get the same treatment through
+``arced_affection_matrix``; range finders keep only the nearest hit per row.
+Pairs of static entities still at their modelled pose take their progress
+from the registry's ``static_influences`` table and are left out of the
+matrix.
+"""
+import numpy as np
+from streamsimdsl.utils.utils import compile_dispersion
+from streamsimdsl.utils.fields import field_for
+
+# sensor subtype -> (affected property, env_properties key, default base)
+SCALAR_SENSORS = {
+    "temperature": ("temperature", "temperature", 25.0),
+    "humidity": ("humidity", "humidity", 40.0),
+    "gas": ("gas", "gas", 0.0),
+    "light": ("light", "luminosity", 60.0),
+}
+
+# Sensor subtypes with their own (non-scalar) handlers in affections.py
+NON_SCALAR_SENSORS = {
+    "microphone", "camera", "rfid", "areaalarm", "linearalarm", "sonar", "ir",
+    "lidar",
+}
+
+# Range finders reduced to their nearest visible target
+DISTANCE_SENSORS = {"sonar", "ir"}
+
+
+def ranged_affection_matrix(sensor_xy, source_xy, ranges):
+    """
+    Distance and linear weight of every sensor/source pair.
+
+    sensor_xy: (S, 2), source_xy: (K, 2), ranges: (K,). Rows or columns with
+    a NaN position (pose unknown) are never in range.
+    Returns (dist, weight, in_range), each of shape (S, K).
+    """
+    sensor_xy = np.asarray(sensor_xy, dtype=float).reshape(-1, 2)
+    source_xy = np.asarray(source_xy, dtype=float).reshape(-1, 2)
+    ranges = np.asarray(ranges, dtype=float).reshape(-1)
+
+    delta = sensor_xy[:, None, :] - source_xy[None, :, :]
+    dist = np.hypot(delta[..., 0], delta[..., 1])
+    with np.errstate(invalid="ignore"):
+        in_range = (ranges[None, :] > 0) & (dist <= ranges[None, :])
+    safe_rng = np.where(ranges > 0, ranges, 1.0)
+    weight = np.where(in_range, np.clip(1.0 - dist / safe_rng[None, :], 0.0, 1.0), 0.0)
+    return dist, weight, in_range
+
+
+def apply_dispersion_columns(weight, in_range, dispersions):
+    """
+    Per-source dispersion of a weight matrix, clamped to [0, 1].
+    ``dispersions`` holds one compiled dispersion callable, dispersion dict
+    or None per column.
+    """
+    progress = weight.copy()
+    for k, disp in enumerate(dispersions):
+        if not disp:
+            continue
+        if not callable(disp):
+            disp = compile_dispersion(disp)
+        rows = in_range[:, k]
+        if rows.any():
+            progress[rows, k] = disp(weight[rows, k])
+    return np.where(in_range, np.clip(progress, 0.0, 1.0), 0.0)
+
+
+def normalize_angles(a):
+    """Wrap radians to [-pi, pi), element-wise."""
+    return (a + np.pi) % (2 * np.pi) - np.pi
+
+
+def arc_parameters(sensor):
+    """(range, fov in degrees) of an arced sensor, as handle_affection_arced reads them."""
+    props = sensor.get("properties", {})
+    return (
+        props.get("range", sensor.get("range", 0)),
+        props.get("fov", sensor.get("fov", 0)),
+    )
+
+
+def arced_affection_matrix(sensor_poses, ranges, fovs, target_xy):
+    """
+    Field-of-view test of every sensor/target pair.
+
+    sensor_poses: (S, 3) x, y, theta in degrees; ranges, fovs (degrees): (S,);
+    target_xy: (K, 2). Same rules as handle_affection_arced: a target is seen
+    when dist <= range and its bearing lies in the (possibly wrapping) arc
+    [theta - fov/2, theta + fov/2].
+    Returns (dist, bearing, visible) of shape (S, K) plus the per-sensor arc
+    bounds (min_a, max_a), all angles in normalised radians.
+    """
+    sensor_poses = np.asarray(sensor_poses, dtype=float).reshape(-1, 3)
+    target_xy = np.asarray(target_xy, dtype=float).reshape(-1, 2)
+    ranges = np.asarray(ranges, dtype=float).reshape(-1)
+    half_fov = np.radians(np.asarray(fovs, dtype=float).reshape(-1)) / 2
+
+    dx = target_xy[None, :, 0] - sensor_poses[:, 0, None]
+    dy = target_xy[None, :, 1] - sensor_poses[:, 1, None]
+    dist = np.hypot(dx, dy)
+    bearing = normalize_angles(np.arctan2(dy, dx))
+
+    theta = np.radians(sensor_poses[:, 2])
+    min_a = normalize_angles(theta - half_fov)[:, None]
+    max_a = normalize_angles(theta + half_fov)[:, None]
+    in_fov = np.where(
+        min_a <= max_a,
+        (bearing >= min_a) & (bearing <= max_a),
+        (bearing >= min_a) | (bearing <= max_a),
+    )
+    with np.errstate(invalid="ignore"):
+        visible = in_fov & (dist <= ranges[:, None])
+    return dist, bearing, visible, min_a[:, 0], max_a[:, 0]
+
+
+def nearest_hits(dist, visible):
+    """Column of the nearest visible target per row, -1 when nothing is seen."""
+    if dist.shape[1] == 0:
+        return np.full(dist.shape[0], -1, dtype=int)
+    idx = np.argmin(np.where(visible, dist, np.inf), axis=1)
+    idx[~visible.any(axis=1)] = -1
+    return idx
+
+
+def _lower(value):
+    return (value or "").lower() or None
+
+
+class BatchAffectionEngine:
+    """
+    Evaluates all scalar (temperature, humidity, gas, light and generic
+    ``affectedBy``) sensors and all sonar / IR range finders of a
+    NodeRegistry per tick.
+
+    Sensor channels and source columns are collected once and rebuilt only
+    when the registry's structure version shows an entity was added or
+    replaced. Each property group (and the
+    range finders) is recomputed only when the registry's version counters
+    or the base values show one of its inputs changed since the last tick.
+    """
+
+    def __init__(self, registry):
+        self.registry = registry
+        self._structure = None
+        # sensor name -> [(property, env key, fallback base)]
+        self.channels = {}
+        # sensor name -> constant result for generic sensors without affectedBy
+        self.constants = {}
+        # sonar / IR sensor dicts, in registry order
+        self.rangers = []
+        self._ranger_names = set()
+        # group -> (input versions, results)
+        self._cache = {}
+        # property -> (sensor names, source names, dense static progress)
+        self._static = {}
+
+    def rebuild(self):
+        self.channels.clear()
+        self.constants.clear()
+        self.rangers = []
+        self._ranger_names = set()
+        self._cache.clear()
+        self._static.clear()
+        for sensor in self.registry.find("sensor"):
+            name = sensor["name"].lower()
+            subtype = (sensor.get("subtype") or sensor.get("type") or "").lower()
+            props = sensor.get("properties", {})
+            if subtype in DISTANCE_SENSORS:
+                self.rangers.append(sensor)
+                self._ranger_names.add(name)
+            elif subtype in SCALAR_SENSORS:
+                self.channels[name] = [SCALAR_SENSORS[subtype]]
+            elif subtype not in NON_SCALAR_SENSORS:
+                chans = []
+                for declared in props.get("affectedBy") or []:
+                    aff = declared.get("id") if isinstance(declared, dict) else getattr(declared, "id", None)
+                    if aff:
+                        chans.append((aff.lower(), aff.lower(), props.get("value", 0.0)))
+                if chans:
+                    self.channels[name] = chans
+                else:
+                    self.constants[name] = {(subtype or "value"): props.get("value", 0.0)}
+        self._structure = self.registry.structure_version
+
+    def handles(self, sensor_name):
+        if self._structure != self.registry.structure_version:
+            self.rebuild()
+        name = sensor_name.lower()
+        return name in self.channels or name in self.constants or name in self._ranger_names
+
+    def _positions(self, names):
+        xy = np.full((len(names), 2), np.nan)
+        for i, name in enumerate(names):
+            pose = self.registry.get_pose(name)
+            if pose:
+                xy[i, 0] = pose["x"]
+                xy[i, 1] = pose["y"]
+        return xy
+
+    def _static_block(self, table, prop, names, src_names):
+        """
+        Static progress table of `prop` as a dense (S, K) matrix, cached per
+        layout; NaN marks pairs the table does not list.
+        """
+        key = (tuple(names), tuple(src_names))
+        cached = self._static.get(prop)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        lookup = table.progress_table.get(prop.lower(), {})
+        block = np.array(
+            [[lookup.get(n, {}).get(src, np.nan) for src in src_names] for n in names], dtype=float
+        ).reshape(len(names), len(src_names))
+        self._static[prop] = (key, block)
+        return block
+
+    def _progress(self, prop, names, src_names, ranges, dispersions):
+        """
+        Dispersed progress (S, K) of every sensor/source pair. Pairs listed
+        in the registry's ``static_influences`` whose endpoints are both
+        still unmoved come from the table; only the rest is evaluated
+        geometrically.
+        """
+        n_s, n_k = len(names), len(src_names)
+        progress = np.zeros((n_s, n_k))
+        from_table = np.zeros((n_s, n_k), dtype=bool)
+        table = getattr(self.registry, "static_influences", None)
+        if table is not None:
+            s_static = np.array([table.unmoved(self.registry, n) for n in names], dtype=bool)
+            k_static = np.array([table.unmoved(self.registry, n) for n in src_names], dtype=bool)
+            if s_static.any() and k_static.any():
+                block = self._static_block(table, prop, names, src_names)
+                from_table = s_static[:, None] & k_static[None, :] & ~np.isnan(block)
+
+        live = ~from_table
+        r, c = np.flatnonzero(live.any(axis=1)), np.flatnonzero(live.any(axis=0))
+        if r.size and c.size:
+            row_names = [names[i] for i in r]
+            col_names = [src_names[k] for k in c]
+            _, weight, in_range = ranged_affection_matrix(
+                self._positions(row_names), self._positions(col_names), ranges[c])
+            # a sensor never affects itself
+            in_range &= np.array(row_names, dtype=object)[:, None] != np.array(col_names, dtype=object)[None, :]
+            progress[np.ix_(r, c)] = apply_dispersion_columns(
+                weight, in_range, [dispersions[k] for k in c])
+        if from_table.any():
+            progress[from_table] = block[from_table]
+        return progress
+
+    def distance_readings(self):
+        """
+        handle_distance_sensor for every range finder at once: one arced
+        matrix against all robots, obstacles and actors, then an argmin.
+        """
+        reg = self.registry
+        key = None
+        if not any(isinstance(s.get("properties", {}).get("noise"), dict) for s in self.rangers):
+            key = (
+                reg.bucket_version("composite", "robot"),
+                reg.bucket_version("obstacle"),
+                reg.bucket_version("actor"),
+                tuple(reg.pose_version(s["name"]) for s in self.rangers),
+            )
+            cached = self._cache.get("distance")
+            if cached is not None and cached[0] == key:
+                return cached[1]
+
+        results = {}
+        sensors = []
+        sensor_poses = []
+        for sensor in self.rangers:
+            pose = self.registry.get_pose(sensor["name"])
+            if pose:
+                sensors.append(sensor)
+                sensor_poses.append([pose["x"], pose["y"], pose["theta"]])
+            else:
+                results[sensor["name"].lower()] = {"distance": 0.0}
+        if not sensors:
+            if key is not None:
+                self._cache["distance"] = (key, results)
+            return results
+
+        targets = []
+        target_xy = []
+        for target in (
+            self.registry.find("composite", "robot")
+            + self.registry.find("obstacle")
+            + self.registry.find("actor")
+        ):
+            pose = self.registry.get_pose(target.get("name"))
+            if pose:
+                targets.append(target)
+                target_xy.append([pose["x"], pose["y"]])
+
+        arcs = [arc_parameters(s) for s in sensors]
+        dist, _, visible, _, _ = arced_affection_matrix(
+            sensor_poses, [a[0] for a in arcs], [a[1] for a in arcs], target_xy)
+        if targets:
+            # a sensor never detects itself
+            visible &= (
+                np.array([s.get("name") for s in sensors], dtype=object)[:, None]
+                != np.array([t.get("name") for t in targets], dtype=object)[None, :]
+            )
+        hits = nearest_hits(dist, visible)
+
+        for i, sensor in enumerate(sensors):
+            props = sensor.get("properties", {})
+            k = hits[i]
+            if k < 0:
+                sensed = self.registry.noise_model(sensor["name"])(props.get("range", 0))
+                results[sensor["name"].lower()] = {"distance": round(sensed, 2)}
+                continue
+            target = targets[k]
+            results[sensor["name"].lower()] = {
+                "distance": round(float(dist[i, k]), 2),
+                "detected_class": (target.get("class") or "").lower(),
+                "detected_type": _lower(target.get("type")),
+                "detected_subtype": _lower(target.get("subtype")),
+                "detected_name": (target.get("name") or "").lower(),
+            }
+        if key is not None:
+            self._cache["distance"] = (key, results)
+        return results
+
+    def evaluate(self, env_properties=None):
+        """
+        Return {sensor name: affections} for every scalar and distance sensor.
+        """
+        if self._structure != self.registry.structure_version:
+            self.rebuild()
+        env_properties = env_properties or {}
+
+        results = {name: dict(vals) for name, vals in self.constants.items()}
+        # property -> [(sensor name, base value)]
+        by_prop = {}
+        for name, chans in self.channels.items():
+            results[name] = {}
+            for prop, env_key, fallback in chans:
+                by_prop.setdefault(prop, []).append((name, env_properties.get(env_key, fallback)))
+
+        for prop, rows in by_prop.items():
+            names = [r[0] for r in rows]
+            fields = field_for(self.registry, prop)
+            key = (
+                self.registry.affects_version(prop),
+                tuple(r[1] for r in rows),
+                tuple(self.registry.pose_version(n) for n in names),
+                # a diffusing field changes with every step
+                getattr(fields, "steps", None),
+            )
+            cached = self._cache.get(prop)
+            if cached is not None and cached[0] == key:
+                for name, val in zip(names, cached[1]):
+                    results[name][prop] = val
+                continue
+
+            base = np.array([r[1] for r in rows], dtype=float)
+            final = base.copy()
+
+            entries = self.registry.affecting(prop)
+            if fields is not None:
+                xy = self._positions(names)
+                posed = ~np.isnan(xy).any(axis=1)
+                final[posed] = fields.sample(prop, xy[posed], base[posed])
+            elif entries:
+                sources = [e["node"] for e in entries]
+                src_names = [(s.get("name") or "").lower() for s in sources]
+                ranges = np.array(
+                    [s.get("properties", {}).get("range", 0.0) or 0.0 for s in sources], dtype=float)
+                targets = np.empty(len(entries))
+                has_target = np.ones(len(entries), dtype=bool)
+                for k, e in enumerate(entries):
+                    tv = e["target_value"]
+                    if tv is None:
+                        tv = e["node"].get("properties", {}).get("value")
+                    if tv is None:
+                        has_target[k] = False
+                        tv = 0.0
+                    targets[k] = tv
+
+                progress = self._progress(
+                    prop, names, src_names, ranges, [e["disperse"] for e in entries])
+
+                # sources without a value pull towards the sensor's own base
+                delta = np.where(has_target[None, :], targets[None, :] - base[:, None], 0.0)
+                final = base + (progress * delta).sum(axis=1)
+
+            values = [round(float(val), 2) for val in final]
+            self._cache[prop] = (key, values)
+            for name, val in zip(names, values):
+                results[name][prop] = val
+
+        results.update(self.distance_readings())
+        return results
@@ -1,12 +1,8 @@
-import math
-from streamsimdsl.utils.geometry import (
-    get_shape_world_points,
-    check_lines_intersection,
-)
-from streamsimdsl.utils.affections import (
-    find_node_by_id,
-    find_pose_by_metadata,
-)
+import numpy as np
+from streamsimdsl.utils.geometry import check_lines_intersection, get_shape_world_points
+from streamsimdsl.utils.raycast import points_in_polygon
+from streamsimdsl.utils.shapes import is_convex, swept_outline, world_points
+from streamsimdsl.utils.affections import resolve_pose
 
 # ---------------------------------------------------------------
 # Helpers
@@ -24,6 +20,13 @@ def polygons_intersect(poly1, poly2):
                 return True
     return False
 
+def polygons_overlap(poly1, poly2):
+    """Edge crossing or containment of one polygon in the other."""
+    if polygons_intersect(poly1, poly2):
+        return True
+    return (points_in_polygon(poly1[0][0], poly1[0][1], poly2)
+            or points_in_polygon(poly2[0][0], poly2[0][1], poly1))
+
 def hits_bounds(poly, w, h):
     for x, y in poly:
         if x < 0 or x > w:
@@ -32,14 +35,48 @@ def hits_bounds(poly, w, h):
             return True
     return False
 
-def collect_collision_entities(nodes, poses):
+def _collision_entity(current, poses, registry=None):
+    """Return the collision record of a node dict, or None if it cannot collide."""
+    if "class" not in current or "shape" not in current:
+        return None
+    cls = current.get("class", "").lower()
+    name = current.get("name", "").lower()
+    props = current.get("properties", {})
+    collidable = current.get("collidable",
+                    props.get("collidable", False))
+
+    # skip non-collidable geometry
+    if not collidable:
+        return None
+    # PHYSICAL OBJECTS ONLY
+    if cls not in {"composite", "actor", "actuator", "obstacle"}:
+        return None
+    pose = resolve_pose(poses, current, registry)
+    if not pose:
+        return None
+    return {
+        "name": name,
+        "shape": current["shape"],
+        "pose": pose,
+        "collidable": True,
+    }
+
+def collect_collision_entities(nodes, poses, registry=None):
     """
     Collect ALL entities that have a shape.
     Uses the same metadata resolution as affection logic.
     Ensures pose resolution = consistent with sensor system.
+    With a NodeRegistry the flat node table is scanned instead of the tree.
     """
     entities = []
 
+    if registry is not None:
+        for current in registry.nodes.values():
+            ent = _collision_entity(current, poses, registry)
+            if ent:
+                entities.append(ent)
+        return entities
+
     stack = [nodes]
     while stack:
         current = stack.pop()
@@ -48,27 +85,13 @@ def collect_collision_entities(nodes, poses):
 
         # It's a node-level dict with metadata
         if "class" in current and "shape" in current:
-            cls = current.get("class", "").lower()
-            type = current.get("type", "").lower() or None
-            subtype = current.get("subtype", "").lower() or None
-            name = current.get("name", "").lower()
             props = current.get("properties", {})
-            collidable = current.get("collidable",
-                            props.get("collidable", False))
-            
             # skip non-collidable geometry
-            if not collidable:
+            if not current.get("collidable", props.get("collidable", False)):
                 continue
-            # PHYSICAL OBJECTS ONLY
-            if cls in {"composite", "actor", "actuator", "obstacle"}:
-                pose = find_pose_by_metadata(poses, cls, type, subtype, name)
-                if pose:
-                    entities.append({
-                        "name": name,
-                        "shape": current["shape"],
-                        "pose": pose,
-                        "collidable": True,
-                    })
+            ent = _collision_entity(current, poses)
+            if ent:
+                entities.append(ent)
 
         # Recurse deeper
         for val in current.values():
@@ -77,37 +100,279 @@ def collect_collision_entities(nodes, poses):
 
     return entities
 
-def detect_collisions(nodes, poses, env_w, env_h):
+def polygon_aabb(poly):
+    """Axis-aligned bounding box (min_x, min_y, max_x, max_y) of a polygon."""
+    xs = [p[0] for p in poly]
+    ys = [p[1] for p in poly]
+    return (min(xs), min(ys), max(xs), max(ys))
+
+def aabb_hits_bounds(box, w, h):
+    """hits_bounds on a polygon's bounding box: some vertex lies outside [0,w] x [0,h]."""
+    return box[0] < 0 or box[2] > w or box[1] < 0 or box[3] > h
+
+class SweepAndPrune:
+    """
+    Broadphase over axis-aligned boxes: sort by min x, sweep, and keep only
+    pairs whose boxes overlap on both axes (touching counts as overlap).
+    The sort order is kept between ticks, so re-sorting the mostly unchanged
+    scene is an almost linear insertion sort.
+    """
+
+    def __init__(self):
+        self._order = []
+
+    def pairs(self, boxes):
+        """Name pairs (earlier in sweep order first) of overlapping boxes; boxes: name -> aabb."""
+        order = [n for n in self._order if n in boxes]
+        known = set(order)
+        order.extend(n for n in boxes if n not in known)
+        for k in range(1, len(order)):
+            name = order[k]
+            key = boxes[name][0]
+            j = k - 1
+            while j >= 0 and boxes[order[j]][0] > key:
+                order[j + 1] = order[j]
+                j -= 1
+            order[j + 1] = name
+        self._order = order
+
+        found = []
+        active = []
+        for name in order:
+            box = boxes[name]
+            active = [a for a in active if boxes[a][2] >= box[0]]
+            for a in active:
+                other = boxes[a]
+                if other[1] <= box[3] and box[1] <= other[3]:
+                    found.append((a, name))
+            active.append(name)
+        return found
+
+# ---------------------------------------------------------------
+# Narrow phase, vectorised over candidate pairs
+# ---------------------------------------------------------------
+
+# Tolerance of the separating-axis test; touching shapes collide
+SAT_EPS = 1e-9
+
+def _stack(polys):
+    """(P, K, 2) array of polygons, shorter ones padded with their last vertex."""
+    k = max(len(p) for p in polys)
+    out = np.empty((len(polys), k, 2))
+    for i, p in enumerate(polys):
+        out[i, :len(p)] = p
+        out[i, len(p):] = p[-1]
+    return out
+
+def _inside(pts, polys):
+    """Even-odd test of points (P, 2) against padded polygons (P, K, 2)."""
+    x, y = pts[:, 0, None], pts[:, 1, None]
+    xi, yi = polys[..., 0], polys[..., 1]
+    xj, yj = np.roll(xi, 1, axis=1), np.roll(yi, 1, axis=1)
+    crosses = (yi > y) != (yj > y)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x_at = (xj - xi) * (y - yi) / (yj - yi) + xi
+    return np.count_nonzero(crosses & (x < x_at), axis=1) % 2 == 1
+
+def sat_overlap(a, b):
+    """
+    Separating axis test of convex polygons a[i] vs b[i], both (P, K, 2).
+    Padding vertices only add zero axes, which never separate.
+    """
+    axes = []
+    for poly in (a, b):
+        e = np.roll(poly, -1, axis=1) - poly
+        axes.append(np.stack((-e[..., 1], e[..., 0]), axis=-1))
+    axes = np.concatenate(axes, axis=1)
+    pa = np.einsum("pmd,pkd->pmk", axes, a)
+    pb = np.einsum("pmd,pkd->pmk", axes, b)
+    scale = SAT_EPS * (1.0 + np.abs(axes).sum(axis=-1))
+    separated = (pa.max(axis=2) < pb.min(axis=2) - scale) | (pb.max(axis=2) < pa.min(axis=2) - scale)
+    return ~separated.any(axis=1)
+
+def circles_overlap(ca, ra, cb, rb):
+    """Circles (P, 2) / (P,) vs (P, 2) / (P,)."""
+    d = ca - cb
+    return np.einsum("pd,pd->p", d, d) <= (ra + rb) ** 2
+
+def circle_polygon_overlap(c, r, polys):
+    """Circle (P, 2) / (P,) vs any simple polygon (P, K, 2): centre inside, or an edge within r."""
+    a = polys
+    ab = np.roll(polys, -1, axis=1) - a
+    ac = c[:, None, :] - a
+    len2 = np.einsum("pkd,pkd->pk", ab, ab)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = np.where(len2 > 0, np.einsum("pkd,pkd->pk", ac, ab) / len2, 0.0)
+    t = np.clip(t, 0.0, 1.0)
+    d = ac - t[..., None] * ab
+    near = np.einsum("pkd,pkd->pk", d, d).min(axis=1) <= r ** 2
+    return near | _inside(c, polys)
+
+def narrow_phase(bodies, pairs):
+    """
+    Boolean mask over `pairs` (index pairs into `bodies`) of the ones that
+    overlap. A body is ``(poly, circle, convex)``: its (K, 2) outline,
+    ``(cx, cy, r)`` for native circles (else None), and whether the outline
+    is convex. Circles are tested analytically, convex polygons with SAT and
+    the rest by edge crossing plus containment.
+    """
+    hit = np.zeros(len(pairs), dtype=bool)
+    groups = {"cc": [], "cp": [], "sat": [], "other": []}
+    for k, (i, j) in enumerate(pairs):
+        ci, cj = bodies[i][1], bodies[j][1]
+        if ci is not None and cj is not None:
+            groups["cc"].append((k, i, j))
+        elif ci is not None:
+            groups["cp"].append((k, i, j))
+        elif cj is not None:
+            groups["cp"].append((k, j, i))
+        elif bodies[i][2] and bodies[j][2]:
+            groups["sat"].append((k, i, j))
+        else:
+            groups["other"].append((k, i, j))
+
+    if groups["cc"]:
+        ks, ii, jj = zip(*groups["cc"])
+        ca = np.array([bodies[i][1] for i in ii])
+        cb = np.array([bodies[j][1] for j in jj])
+        hit[list(ks)] = circles_overlap(ca[:, :2], ca[:, 2], cb[:, :2], cb[:, 2])
+    if groups["cp"]:
+        ks, ii, jj = zip(*groups["cp"])
+        circ = np.array([bodies[i][1] for i in ii])
+        hit[list(ks)] = circle_polygon_overlap(
+            circ[:, :2], circ[:, 2], _stack([bodies[j][0] for j in jj]))
+    if groups["sat"]:
+        ks, ii, jj = zip(*groups["sat"])
+        hit[list(ks)] = sat_overlap(
+            _stack([bodies[i][0] for i in ii]), _stack([bodies[j][0] for j in jj]))
+    for k, i, j in groups["other"]:
+        hit[k] = polygons_overlap(bodies[i][0].tolist(), bodies[j][0].tolist())
+    return hit
+
+def _body(ent, poly, registry=None):
+    """Narrow-phase body of a collision entity, see narrow_phase()."""
+    shape = ent["shape"]
+    circle = None
+    if shape.get("type", "").lower() == "circle":
+        pose = ent["pose"]
+        circle = (pose.get("x", 0.0), pose.get("y", 0.0), shape.get("radius", 1.0))
+    shapes = getattr(registry, "shapes", None)
+    if shapes is not None:
+        return shapes.world_array(ent["name"], ent["pose"], shape), circle, shapes.convex(shape)
+    poly = np.asarray(poly, dtype=float).reshape(-1, 2)
+    return poly, circle, is_convex(poly)
+
+def _swept_body(ent, poly, previous):
+    """Narrow-phase body covering the move from pose `previous` to the entity's pose."""
+    before = get_shape_world_points(previous, ent["shape"])
+    hull = swept_outline(before, poly)
+    return hull, None, True
+
+def detect_collisions(nodes, poses, env_w, env_h, registry=None, swept=None):
     """
     Pose resolution, hierarchy traversal, and shape handling now
     follow EXACTLY the same rules as the affection system.
+    A sweep-and-prune broadphase on bounding boxes decides which pairs
+    reach the narrow phase; with a registry its sort order persists
+    between ticks. Shapes collide when they touch, cross or one contains
+    the other.
+
+    With a registry and a ``swept`` observer name, every entity that moved
+    since that observer's previous call is tested with the area it swept
+    (see ``NodeRegistry.sweep_from``), so a fast or low-rate robot cannot
+    tunnel through thin obstacles between two checks.
     """
-    entities = collect_collision_entities(nodes, poses)
+    entities = collect_collision_entities(nodes, poses, registry)
     world_polys = []
+    bodies = []
 
     # Convert shapes+poses to world polygons
     for ent in entities:
-        poly = get_shape_world_points(ent["pose"], ent["shape"])
+        poly = world_points(ent["pose"], ent["shape"], registry, ent["name"])
         if not poly:
             continue
+        body = None
+        if swept is not None and registry is not None:
+            previous = registry.sweep_from(swept, ent["name"], ent["pose"])
+            if previous is not None and previous != {k: ent["pose"][k] for k in ("x", "y", "theta")}:
+                body = _swept_body(ent, poly, previous)
+                poly = [tuple(p) for p in body[0].tolist()]
         world_polys.append((ent["name"], poly, ent.get("collidable", False)))
+        bodies.append(body or _body(ent, poly, registry))
 
     collisions = []
+    boxes = {name: polygon_aabb(poly) for name, poly, _ in world_polys}
 
     # Wall collisions
     for name, poly, collidable in world_polys:
-        if hits_bounds(poly, env_w, env_h):
+        if aabb_hits_bounds(boxes[name], env_w, env_h):
             collisions.append((name, "WALL"))
 
-    # Entity–entity
-    n = len(world_polys)
-    for i in range(n):
-        name_i, poly_i, coll_i = world_polys[i]
-        for j in range(i + 1, n):
-            name_j, poly_j, coll_j = world_polys[j]
-            if not coll_i or not coll_j:
-                continue
-            if polygons_intersect(poly_i, poly_j):
-                collisions.append((name_i, name_j))
+    # Entity–entity, in the order of the all-pairs loop
+    broadphase = getattr(registry, "broadphase", None)
+    if broadphase is None:
+        broadphase = SweepAndPrune()
+        if registry is not None:
+            registry.broadphase = broadphase
+    index = {name: i for i, (name, _, _) in enumerate(world_polys)}
+    grid = getattr(registry, "occupancy", None)
+    if grid is not None:
+        candidates, static_hits = _occupancy_candidates(grid.refresh(), world_polys, bodies, boxes, broadphase)
+    else:
+        candidates = [tuple(sorted((index[a], index[b]))) for a, b in broadphase.pairs(boxes)]
+        static_hits = []
+    candidates = sorted(
+        (i, j) for i, j in candidates if world_polys[i][2] and world_polys[j][2]
+    )
+    hits = list(static_hits)
+    if candidates:
+        mask = narrow_phase(bodies, candidates)
+        hits.extend(pair for pair, hit in zip(candidates, mask) if hit)
+    for i, j in sorted(hits):
+        collisions.append((world_polys[i][0], world_polys[j][0]))
 
     return collisions
+
+def _occupancy_candidates(grid, world_polys, bodies, boxes, broadphase):
+    """
+    Candidate pairs when the static layer lives in an OccupancyGrid: the
+    broadphase only sorts moving entities, each of them asks the grid which
+    obstacles its footprint may touch, and the overlaps among the obstacles
+    themselves are settled once per bake.
+    Returns (candidate index pairs, index pairs already known to hit).
+    """
+    index = {name: i for i, (name, _, _) in enumerate(world_polys)}
+    static = {name for name in grid.names if name in index}
+    dynamic_boxes = {name: box for name, box in boxes.items() if name not in static}
+    candidates = [tuple(sorted((index[a], index[b]))) for a, b in broadphase.pairs(dynamic_boxes)]
+    for name in dynamic_boxes:
+        i = index[name]
+        for k in grid.footprint(bodies[i][0]):
+            other = index.get(grid.names[k])
+            if other is not None:
+                candidates.append(tuple(sorted((i, other))))
+
+    cached = getattr(grid, "static_pairs", None)
+    if cached is None or cached[0] != grid.version:
+        names = sorted(static, key=index.get)
+        pairs = SweepAndPrune().pairs({name: boxes[name] for name in names})
+        pairs = [tuple(sorted((index[a], index[b]))) for a, b in pairs]
+        pairs = [(i, j) for i, j in pairs if world_polys[i][2] and world_polys[j][2]]
+        mask = narrow_phase(bodies, pairs) if pairs else []
+        cached = (grid.version, [(world_polys[i][0], world_polys[j][0])
+                                 for (i, j), hit in zip(pairs, mask) if hit])
+        grid.static_pairs = cached
+    static_hits = []
+    for a, b in cached[1]:
+        if a in index and b in index:
+            static_hits.append(tuple(sorted((index[a], index[b]))))
+    return candidates, static_hits
+
+def contacts_by_entity(collisions):
+    """Map each colliding name to the names (or "WALL") it touches."""
+    contacts = {}
+    for a, b in collisions:
+        contacts.setdefault(a, set()).add(b)
+        if b != "WALL":
+            contacts.setdefault(b, set()).add(a)
+    return contacts
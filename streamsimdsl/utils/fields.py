@@ -0,0 +1,166 @@
+"""
+Rasterised scalar fields for the ranged environmental properties.
+
+Instead of summing every source per sensor read, ``FieldEngine`` keeps two
+grids per property over the environment: the summed progress ``P`` of all
+sources with a target value and the summed ``progress * target`` ``PT``.
+A reading at base value ``b`` is then
+
+    b + sum_k p_k * (t_k - b)  =  b + PT - b * P
+
+so changes of the environmental base never require re-splatting, and a
+sensor read (wherever it is mounted) is one bilinear sample.
+
+Each source's footprint (its range box on the grid) is remembered; when a
+source moves or changes value only that box is subtracted and re-added.
+Because cells are sampled at their centres, readings differ from the exact
+per-sensor evaluation by up to a cell's worth of distance; choose the
+resolution accordingly.
+"""
+import math
+import numpy as np
+
+FIELD_PROPERTIES = ("temperature", "humidity", "gas", "light")
+
+
+def bilinear(grid, xy, cell_size):
+    """Bilinear interpolation of a cell-centred (ny, nx) grid at (N, 2) positions, clamped to the edges."""
+    ny, nx = grid.shape
+    xy = np.asarray(xy, dtype=float).reshape(-1, 2)
+    fx = np.clip(xy[:, 0] / cell_size - 0.5, 0.0, nx - 1)
+    fy = np.clip(xy[:, 1] / cell_size - 0.5, 0.0, ny - 1)
+    i0 = np.minimum(fx.astype(int), max(nx - 2, 0))
+    j0 = np.minimum(fy.astype(int), max(ny - 2, 0))
+    i1 = np.minimum(i0 + 1, nx - 1)
+    j1 = np.minimum(j0 + 1, ny - 1)
+    tx, ty = fx - i0, fy - j0
+    top = grid[j0, i0] * (1 - tx) + grid[j0, i1] * tx
+    bottom = grid[j1, i0] * (1 - tx) + grid[j1, i1] * tx
+    return top * (1 - ty) + bottom * ty
+
+
+class ScalarField:
+    """P / PT grids of one property plus the footprint of every source."""
+
+    def __init__(self, width, height, cell_size):
+        self.cell_size = float(cell_size)
+        self.nx = max(1, int(math.ceil(width / self.cell_size)))
+        self.ny = max(1, int(math.ceil(height / self.cell_size)))
+        self.P = np.zeros((self.ny, self.nx))
+        self.PT = np.zeros((self.ny, self.nx))
+        # source name -> (row slice, col slice, progress, target)
+        self.footprints = {}
+
+    def clear(self):
+        self.P[:] = 0.0
+        self.PT[:] = 0.0
+        self.footprints.clear()
+
+    def remove(self, name):
+        fp = self.footprints.pop(name, None)
+        if fp is None:
+            return
+        rows, cols, prog, target = fp
+        self.P[rows, cols] -= prog
+        self.PT[rows, cols] -= prog * target
+
+    def splat(self, name, x, y, rng, target, disperse=None):
+        """(Re)place the kernel of source `name` at (x, y)."""
+        self.remove(name)
+        if rng <= 0 or target is None:
+            return
+        cs = self.cell_size
+        i0 = max(0, int(math.floor((x - rng) / cs)))
+        i1 = min(self.nx, int(math.ceil((x + rng) / cs)) + 1)
+        j0 = max(0, int(math.floor((y - rng) / cs)))
+        j1 = min(self.ny, int(math.ceil((y + rng) / cs)) + 1)
+        if i0 >= i1 or j0 >= j1:
+            return
+        cx = (np.arange(i0, i1) + 0.5) * cs
+        cy = (np.arange(j0, j1) + 0.5) * cs
+        dist = np.hypot(cx[None, :] - x, cy[:, None] - y)
+        in_range = dist <= rng
+        weight = np.where(in_range, 1.0 - dist / rng, 0.0)
+        prog = disperse(weight) if disperse else weight
+        prog = np.where(in_range, np.clip(prog, 0.0, 1.0), 0.0)
+
+        rows, cols = slice(j0, j1), slice(i0, i1)
+        self.P[rows, cols] += prog
+        self.PT[rows, cols] += prog * target
+        self.footprints[name] = (rows, cols, prog, float(target))
+
+    def sample(self, xy, base):
+        """Bilinear reading at the (N, 2) positions for the (N,) base values."""
+        base = np.asarray(base, dtype=float)
+        return base + bilinear(self.PT, xy, self.cell_size) - base * bilinear(self.P, xy, self.cell_size)
+
+
+class FieldEngine:
+    """
+    One ScalarField per property, kept in sync with the NodeRegistry's
+    affect sources. A field is refreshed lazily, when the property's
+    ``affects_version`` moved on, and then only the sources whose pose or
+    value version changed are re-splatted.
+    """
+
+    def __init__(self, registry, width, height, cell_size, properties=FIELD_PROPERTIES):
+        self.registry = registry
+        self.fields = {p: ScalarField(width, height, cell_size) for p in properties}
+        # property -> affects_version the field reflects
+        self._versions = {}
+        # property -> {source name: (pose version, value version)}
+        self._sources = {p: {} for p in properties}
+
+    def covers(self, prop):
+        return prop in self.fields
+
+    def refresh(self, prop):
+        field = self.fields[prop]
+        version = self.registry.affects_version(prop)
+        if self._versions.get(prop) == version:
+            return field
+        seen = self._sources[prop]
+        present = set()
+        for entry in self.registry.affecting(prop):
+            source = entry["node"]
+            name = (source.get("name") or "").lower()
+            present.add(name)
+            key = (self.registry.pose_version(name), self.registry.value_version(name), id(entry))
+            if seen.get(name) == key:
+                continue
+            seen[name] = key
+            pose = self.registry.get_pose(name)
+            target = entry["target_value"]
+            if target is None:
+                target = (source.get("properties") or {}).get("value")
+            if not pose:
+                field.remove(name)
+                continue
+            field.splat(
+                name, pose["x"], pose["y"],
+                (source.get("properties") or {}).get("range", 0.0) or 0.0,
+                target, entry["disperse"])
+        for name in set(seen) - present:
+            field.remove(name)
+            del seen[name]
+        self._versions[prop] = version
+        return field
+
+    def sample(self, prop, xy, base):
+        """Readings of `prop` at the (N, 2) positions for the (N,) base values."""
+        return self.refresh(prop).sample(xy, base)
+
+    def sample_point(self, prop, x, y, base):
+        return float(self.sample(prop, [[x, y]], [base])[0])
+
+
+def field_for(registry, prop):
+    """
+    The engine answering `prop` readings for a registry: its time-stepped
+    ``physics`` (utils/diffusion.py) first, then its rasterised ``fields``;
+    None when `prop` is evaluated per sensor.
+    """
+    for engine in (getattr(registry, "physics", None), getattr(registry, "fields", None)):
+        if engine is not None and engine.covers(prop):
+            return engine
+    return None
@@ -8,6 +8,16 @@ class PoseMessage(PubSubMessage):
     y: float
     theta: float
 
+class PoseArrayMessage(PubSubMessage):
+    """
+    Absolute poses of a composite and all its descendants for one tick,
+    as parallel lists; names[0] is the composite itself.
+    """
+    names: list = []
+    x: list = []
+    y: list = []
+    theta: list = []
+
 class VelocityMessage(PubSubMessage):
     vel_lin: float
     vel_ang: float
@@ -170,43 +180,58 @@ def make_tf_matrix(x, y, theta):
         [0,  0, 1]
     ], dtype=float)
 
+def _wrap_degrees(theta):
+    """Angle in [-180, 180), the range apply_transformation has always returned."""
+    return (theta + 180.0) % 360.0 - 180.0
+
+def compose_pose(px, py, ptheta, rx, ry, rtheta):
+    """
+    Scalar SE(2) composition parent ⊕ rel (angles in degrees): the fast path
+    of apply_transformation, plain cos/sin without matrices.
+    Returns (x, y, theta).
+    """
+    th = math.radians(ptheta)
+    c, s = math.cos(th), math.sin(th)
+    return px + c * rx - s * ry, py + s * rx + c * ry, _wrap_degrees(ptheta + rtheta)
+
+def compose_poses(parent, rel):
+    """
+    Vectorised compose_pose: (N, 3) or (3,) [x, y, theta] parent poses
+    composed with (N, 3) relative poses in one call, broadcasting like NumPy.
+    Returns an (N, 3) array.
+    """
+    parent = np.asarray(parent, dtype=float)
+    rel = np.asarray(rel, dtype=float)
+    th = np.radians(parent[..., 2])
+    c, s = np.cos(th), np.sin(th)
+    rx, ry = rel[..., 0], rel[..., 1]
+    return np.stack((
+        parent[..., 0] + c * rx - s * ry,
+        parent[..., 1] + s * rx + c * ry,
+        _wrap_degrees(parent[..., 2] + rel[..., 2]),
+    ), axis=-1)
+
 # 2. Apply a transformation to a pose dict ---
 def apply_transformation(parent_pose, rel_pose, parent_shape=None, child_shape=None):
     """
     Compose absolute pose = parent_pose ⊕ rel_pose.
-    Proper 2D homogeneous composition (local offsets, single rotation).
+    Proper 2D composition (local offsets, single rotation); the shape
+    arguments are accepted for compatibility and unused.
     """
-    parent_shape = shape_to_dict(parent_shape)
-    child_shape = shape_to_dict(child_shape)
-
-    # p_halfx, p_halfy = find_center(parent_shape)
-    # c_halfx, c_halfy = find_center(child_shape)
-
-    # Build tf matrices
-    Tp = make_tf_matrix(parent_pose["x"], parent_pose["y"], parent_pose["theta"])
-    Tr_rel = make_tf_matrix(rel_pose["x"], rel_pose["y"], rel_pose["theta"])
-
-    # Compose in local frame: Parent → Offset → Relative
-    T_abs = Tp @ Tr_rel # @ T_offset
-
-    # Extract pose
-    x, y = float(T_abs[0, 2]), float(T_abs[1, 2])
-    sin_theta, cos_theta = T_abs[1, 0], T_abs[0, 0]
-    theta = math.degrees(math.atan2(sin_theta, cos_theta))
-
-    # Normalize
-    if theta >= 180.0:
-        theta -= 360.0
-    if theta < -180.0:
-        theta += 360.0
-
+    x, y, theta = compose_pose(
+        parent_pose["x"], parent_pose["y"], parent_pose["theta"],
+        rel_pose["x"], rel_pose["y"], rel_pose["theta"],
+    )
     return {"x": x, "y": y, "theta": theta}
 
-def node_pose_callback(nodes, poses, log, node: dict, parent_pose=None):
+def node_pose_callback(nodes, poses, log, node: dict, parent_pose=None, registry=None):
     """
     Update or register a node's absolute pose into the correct hierarchy slot.
     For top-level nodes: update directly in poses dict.
     For nested children: let recurse() handle them via parent composite updates.
+    When a NodeRegistry is given, composites are resolved through it, any
+    newly created slot is registered so later lookups stay O(1), and every
+    moved entity is re-bucketed in its spatial hash.
     """
     node_class = node.get("class", "").lower()
     node_type = node.get("type", "").lower() or None
@@ -229,6 +254,8 @@ def node_pose_callback(nodes, poses, log, node: dict, parent_pose=None):
             else:
                 poses[category][node_name].update(node_pose)
                 log.debug(f"Updated leaf {node_class} {node_name} (top-level)")
+            if registry is not None:
+                registry.pose_moved(node_name)
             return
         except (KeyError, TypeError):
             # Not found at top-level - search in nested composites
@@ -273,6 +300,14 @@ def node_pose_callback(nodes, poses, log, node: dict, parent_pose=None):
         ctype = node_type or node_name
         found_entry = None
 
+        # Array-backed fast path: one vectorised pass over the subtree
+        tree = getattr(registry, "transforms", None)
+        if tree is not None and node_name in tree:
+            rows = tree.move(node_name, float(node_pose["x"]), float(node_pose["y"]), float(node_pose["theta"]))
+            tree.sync(rows, registry)
+            log.debug("Updated composite %s/%s and %d descendants", ctype, node_name, rows[1] - rows[0] - 1)
+            return
+
         # Search for existing composite
         def search_composite(struct):
             nonlocal found_entry
@@ -286,18 +321,23 @@ def node_pose_callback(nodes, poses, log, node: dict, parent_pose=None):
                         return
                     search_composite(entry)
 
-        for t, group in poses.get("composites", {}).items():
-            for n, entry in group.items():
-                if t == ctype and n == node_name:
-                    found_entry = entry
+        if registry is not None:
+            found_entry = registry.get_pose_slot(node_name)
+        else:
+            for t, group in poses.get("composites", {}).items():
+                for n, entry in group.items():
+                    if t == ctype and n == node_name:
+                        found_entry = entry
+                        break
+                    search_composite(entry)
+                if found_entry:
                     break
-                search_composite(entry)
-            if found_entry:
-                break
 
         if found_entry is None:
             poses.setdefault("composites", {}).setdefault(ctype, {})
             found_entry = poses["composites"][ctype].setdefault(node_name, {})
+            if registry is not None:
+                registry.register_pose(node_name, found_entry)
 
         entry = found_entry
 
@@ -316,21 +356,28 @@ def node_pose_callback(nodes, poses, log, node: dict, parent_pose=None):
         entry["actuators"] = prev_actuators
         entry["composites"] = prev_composites
 
+        if registry is not None:
+            registry.pose_moved(node_name)
+
         log.debug(f"Updated composite {ctype}/{node_name}")
 
         # Recursively update all children using their stored rel_pose
         for entity in ("actuators", "sensors", "composites"):
             entity_data = entry.get(entity, {})
             if isinstance(entity_data, dict):
-                recurse(entity_data, node_pose, log)
+                recurse(entity_data, node_pose, log, registry)
 
         log.debug(f"[Composite] Recursed into children of {node_name}")
+        if tree is not None:
+            # a composite the tree had not seen yet: index it for next time
+            tree.build(poses)
 
 
-def recurse(d, parent_pose, log):
+def recurse(d, parent_pose, log, registry=None):
     """
     Recursively update children using stored relative poses.
     Transforms rel_pose to abs_pose for all nested children.
+    Child slots missing from the optional NodeRegistry are registered on the way.
     """
     if not isinstance(d, dict):
         return
@@ -344,16 +391,22 @@ def recurse(d, parent_pose, log):
         # Case 1: this node has a relative pose - compute absolute
         if "rel_pose" in v and isinstance(v["rel_pose"], dict):
             rel_pose = v["rel_pose"]
-            abs_pose = apply_transformation(parent_pose, rel_pose)
-            v["x"] = abs_pose["x"]
-            v["y"] = abs_pose["y"]
-            v["theta"] = abs_pose["theta"]
-
-            node_name = v.get('name', k)
-            log.debug(f"[PoseUpdate] {node_name}: abs_x={abs_pose['x']}, abs_y={abs_pose['y']}, abs_theta={abs_pose['theta']}")
+            # scalar fast path, no intermediate matrices or dicts
+            v["x"], v["y"], v["theta"] = compose_pose(
+                parent_pose["x"], parent_pose["y"], parent_pose["theta"],
+                rel_pose["x"], rel_pose["y"], rel_pose["theta"],
+            )
+
+            if registry is not None:
+                if registry.get_pose_slot(k) is not v:
+                    registry.register_pose(k, v)
+                else:
+                    registry.pose_moved(k)
+            log.debug("[PoseUpdate] %s: abs_x=%s, abs_y=%s, abs_theta=%s",
+                      v.get('name', k), v["x"], v["y"], v["theta"])
 
             # This abs_pose becomes the new parent for its children
-            next_pose = abs_pose
+            next_pose = v
         else:
             # No rel_pose - intermediate dict (type/subtype layer)
             # Keep using same parent_pose for traversal
@@ -362,16 +415,12 @@ def recurse(d, parent_pose, log):
         # Case 2: Always recurse into sub-dicts
         # for subk, subv in v.items():
         #     if isinstance(subv, dict):
-        recurse(v, next_pose, log)
+        recurse(v, next_pose, log, registry)
 
-def get_shape_world_points(pose, shape):
-    """Return world-space polygon matching the visualized geometry exactly."""
+def shape_local_points(shape):
+    """Shape-local polygon vertices [(x, y), ...], or None for unknown shapes."""
     if not isinstance(shape, dict):
-        return []
-
-    x, y = pose.get("x", 0.0), pose.get("y", 0.0)
-    th = math.radians(pose.get("theta", 0.0))
-    cos_t, sin_t = math.cos(th), math.sin(th)
+        return None
 
     stype = shape.get("type", "").lower()
 
@@ -382,24 +431,33 @@ def get_shape_world_points(pose, shape):
         l = shape.get("length", 1.0)
         hw, hl = w / 2.0, l / 2.0
         # same orientation as draw_entity()
-        local = [(-hw, -hl), (hw, -hl), (hw, hl), (-hw, hl)]
+        return [(-hw, -hl), (hw, -hl), (hw, hl), (-hw, hl)]
 
-    elif stype == "square":
+    if stype == "square":
         s = shape.get("length", 1.0) / 2.0
-        local = [(-s, -s), (s, -s), (s, s), (-s, s)]
+        return [(-s, -s), (s, -s), (s, s), (-s, s)]
 
-    elif stype == "circle":
+    if stype == "circle":
         r = shape.get("radius", 1.0)
         # Approximate with 16 points instead of 8
-        local = [(r * math.cos(a), r * math.sin(a))
-                 for a in [i * 2*math.pi/16 for i in range(16)]]
+        return [(r * math.cos(a), r * math.sin(a))
+                for a in [i * 2*math.pi/16 for i in range(16)]]
 
-    elif stype == "arbitraryshape":
-        local = [(p["x"], p["y"]) for p in shape.get("points", [])]
+    if stype == "arbitraryshape":
+        return [(p["x"], p["y"]) for p in shape.get("points", [])]
 
-    else:
+    return None
+
+def get_shape_world_points(pose, shape):
+    """Return world-space polygon matching the visualized geometry exactly."""
+    local = shape_local_points(shape)
+    if local is None:
         return []
 
+    x, y = pose.get("x", 0.0), pose.get("y", 0.0)
+    th = math.radians(pose.get("theta", 0.0))
+    cos_t, sin_t = math.cos(th), math.sin(th)
+
     # ---- APPLY WORLD TRANSFORM ONCE ----
 
     world = []
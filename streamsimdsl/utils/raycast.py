@@ -0,0 +1,85 @@
+"""
+Vectorised ray casting against scene polygons.
+
+Polygons (as returned by ``get_shape_world_points``) are flattened into one
+(M, 4) array of segments; ``cast_rays`` then intersects all N rays of a scan
+with all M segments in a single NumPy pass and keeps the nearest hit per ray.
+"""
+import math
+import numpy as np
+
+# Rays x segments handled per pass, to bound the temporaries of huge scenes
+CHUNK_PAIRS = 1 << 20
+
+
+def polygon_segments(polys):
+    """(M, 4) array [ax, ay, bx, by] of the closed edges of every polygon."""
+    segs = []
+    for poly in polys:
+        pts = np.asarray(poly, dtype=float).reshape(-1, 2)
+        if len(pts) < 2:
+            continue
+        segs.append(np.hstack((pts, np.roll(pts, -1, axis=0))))
+    if not segs:
+        return np.zeros((0, 4))
+    return np.vstack(segs)
+
+
+def bounds_segments(w, h):
+    """The four walls of a w x h environment as segments."""
+    return np.array([
+        [0.0, 0.0, w, 0.0],
+        [w, 0.0, w, h],
+        [w, h, 0.0, h],
+        [0.0, h, 0.0, 0.0],
+    ])
+
+
+def points_in_polygon(x, y, poly):
+    """Even-odd test of point (x, y) against a polygon."""
+    pts = np.asarray(poly, dtype=float).reshape(-1, 2)
+    if len(pts) < 3:
+        return False
+    xi, yi = pts[:, 0], pts[:, 1]
+    xj, yj = np.roll(xi, 1), np.roll(yi, 1)
+    crosses = (yi > y) != (yj > y)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x_at = (xj - xi) * (y - yi) / (yj - yi) + xi
+    return bool(np.count_nonzero(crosses & (x < x_at)) % 2)
+
+
+def beam_angles(min_angle, max_angle, num_beams):
+    """Beam directions in degrees; a full circle does not repeat its first beam."""
+    num_beams = max(1, int(num_beams))
+    full = math.isclose(abs(max_angle - min_angle), 360.0) or abs(max_angle - min_angle) > 360.0
+    return np.linspace(min_angle, max_angle, num_beams, endpoint=not full and num_beams > 1)
+
+
+def cast_rays(x, y, angles, max_range, segments):
+    """
+    Distance along each ray from (x, y) (angles in radians) to the nearest
+    segment, ``max_range`` where nothing is hit within range.
+    """
+    angles = np.asarray(angles, dtype=float)
+    ranges = np.full(angles.shape, float(max_range))
+    segments = np.asarray(segments, dtype=float).reshape(-1, 4)
+    if not len(segments) or not angles.size:
+        return ranges
+
+    dx, dy = np.cos(angles), np.sin(angles)
+    ax, ay = segments[:, 0] - x, segments[:, 1] - y
+    ex, ey = segments[:, 2] - segments[:, 0], segments[:, 3] - segments[:, 1]
+
+    step = max(1, CHUNK_PAIRS // len(segments))
+    for s in range(0, angles.size, step):
+        rdx, rdy = dx[s:s + step, None], dy[s:s + step, None]
+        # ray o + t*d meets segment a + u*e where
+        #   t = (a x e) / (d x e),  u = (a x d) / (d x e)
+        denom = rdx * ey - rdy * ex
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = (ax * ey - ay * ex) / denom
+            u = (ax * rdy - ay * rdx) / denom
+        hit = (np.abs(denom) > 1e-12) & (t >= 0.0) & (u >= 0.0) & (u <= 1.0)
+        t = np.where(hit, t, np.inf).min(axis=1)
+        ranges[s:s + step] = np.minimum(ranges[s:s + step], t)
+    return ranges
@@ -0,0 +1,528 @@
+"""
+Flat, name-keyed lookup tables over the nested ``nodes`` / ``poses`` dicts of a
+generated environment.
+
+The environment keeps its entities in a category -> type -> subtype -> name
+hierarchy (with composites nesting further levels). Walking that hierarchy on
+every affection or collision query is what made a single tick quadratic, so the
+registry indexes it once and hands out the *same* dict objects the hierarchy
+holds. Pose updates that mutate a slot in place are therefore visible here
+without any extra bookkeeping; only newly created slots must be registered.
+
+Given a ``cell_size`` the registry also keeps a SpatialHash of entity
+positions. That hash is not a view of the slots, so whoever moves a pose
+reports it through ``pose_moved``; ``node_pose_callback`` does.
+
+The same two hooks, ``pose_moved`` and ``set_value``, maintain version
+counters: per entity, and per (class, type, subtype) bucket and affected
+property the entity belongs to. They only advance on an actual change, so
+callers can cache results keyed on the versions of their inputs.
+"""
+from streamsimdsl.utils.shapes import ShapeCache
+from streamsimdsl.utils.spatial import SpatialHash
+from streamsimdsl.utils.utils import GLOBAL_RANDOM, compile_dispersion, compile_noise
+
+POSE_KEYS = ("x", "y", "theta")
+
+# Sub-dicts of a node / pose slot that never contain other entities
+_NON_ENTITY_KEYS = ("shape", "properties", "rel_pose", "initial_pose", "start", "end")
+
+# Built-in sources that influence a property without declaring it in
+# ``affects``. Only temperature has any: humidity, gas and light sensors
+# count declared sources alone.
+IMPLICIT_AFFECTS = {
+    "temperature": (("actuator", "envdevice", "thermostat"), ("actor", "envactor", "fire")),
+}
+
+
+def _meta(node):
+    """Lower-cased (class, type, subtype) of a node dict; missing parts are None."""
+    return (
+        (node.get("class") or "").lower(),
+        (node.get("type") or "").lower() or None,
+        (node.get("subtype") or "").lower() or None,
+    )
+
+
+def _meta_query(cls=None, type=None, subtype=None):
+    """Lower-cased (class, type, subtype) query key; None parts mean "any"."""
+    return (
+        cls.lower() if cls else None,
+        type.lower() if type else None,
+        subtype.lower() if subtype else None,
+    )
+
+
+def _meta_keys(meta):
+    """
+    Every (class, type, subtype) query a node must answer, None meaning
+    "any". A node of (c, t, s) is listed under all 8 wildcard combinations.
+    """
+    c, t, s = meta
+    return {
+        (qc, qt, qs)
+        for qc in (c, None)
+        for qt in (t, None)
+        for qs in (s, None)
+    }
+
+
+def _entry_attr(entry, key):
+    """AffectEntry field from either the generated dict or a textX object."""
+    if isinstance(entry, dict):
+        return entry.get(key)
+    return getattr(entry, key, None)
+
+
+def affect_entries(node):
+    """
+    Map affected property id -> source entry for a single node.
+
+    An entry is ``{"node", "dispersion", "disperse", "target_value"}``,
+    ``disperse`` being the dispersion compiled to a callable (or None). Declared
+    ``affects`` entries win (the first one per id, like the old per-sensor
+    scans); built-in sources from ``IMPLICIT_AFFECTS`` fall back to
+    ``properties.dispersion``. A ``target_value`` of None means "read
+    ``properties.value`` at query time", since actuator values change live.
+    """
+    props = node.get("properties") or {}
+    entries = {}
+    for a in props.get("affects") or []:
+        aid = _entry_attr(a, "id")
+        if not aid or aid.lower() in entries:
+            continue
+        dispersion = _entry_attr(a, "dispersion")
+        entries[aid.lower()] = {
+            "node": node,
+            "dispersion": dispersion,
+            "disperse": compile_dispersion(dispersion) if dispersion else None,
+            "target_value": _entry_attr(a, "target_value"),
+        }
+    meta = _meta(node)
+    for prop, sources in IMPLICIT_AFFECTS.items():
+        if prop not in entries and meta in sources:
+            entries[prop] = {
+                "node": node,
+                "dispersion": props.get("dispersion"),
+                "disperse": compile_dispersion(props.get("dispersion")) if props.get("dispersion") else None,
+                "target_value": None,
+            }
+    return entries
+
+
+def _node_range(node):
+    return (node.get("properties") or {}).get("range", 0.0) or 0.0
+
+
+def _is_pose_slot(val):
+    """A pose slot carries an absolute pose, a relative pose, or both."""
+    if not isinstance(val, dict):
+        return False
+    if all(k in val for k in POSE_KEYS):
+        return True
+    rel = val.get("rel_pose")
+    return isinstance(rel, dict) and all(k in rel for k in POSE_KEYS)
+
+
+class PoseHandle:
+    """
+    The pose slot of one entity, resolved once so that applying a pose
+    message is an O(1) write instead of a hierarchy search. Composites
+    known to the registry's TransformTree move their whole subtree; leaves
+    nested in a composite follow their parent, so their own messages are
+    dropped, as ``node_pose_callback`` always did.
+    """
+
+    __slots__ = ("registry", "name", "slot", "composite", "nested")
+
+    def __init__(self, registry, name):
+        self.registry = registry
+        self.name = name.lower()
+        self.slot = None
+        self.composite = False
+        self.nested = False
+        self.resolve()
+
+    def resolve(self):
+        """(Re)bind the slot; False while the entity has none."""
+        self.slot = self.registry.get_pose_slot(self.name)
+        node = self.registry.get_node(self.name) or {}
+        self.composite = (node.get("class") or "").lower() == "composite"
+        self.nested = self.slot is not None and "rel_pose" in self.slot
+        return self.slot is not None
+
+    def write(self, x, y, theta):
+        """
+        Apply an absolute pose. Returns False when the handle cannot apply
+        it (no slot yet, or a composite without a TransformTree), in which
+        case the caller falls back to ``node_pose_callback``.
+        """
+        # re-bind if the slot was replaced (e.g. re-registered)
+        if self.slot is None or self.registry.poses.get(self.name) is not self.slot:
+            if not self.resolve():
+                return False
+        if self.nested and not self.composite:
+            return True
+        tree = self.registry.transforms
+        if tree is not None and self.name in tree:
+            tree.sync(tree.move(self.name, float(x), float(y), float(theta)), self.registry)
+            return True
+        if self.composite:
+            return False
+        slot = self.slot
+        slot["x"], slot["y"], slot["theta"] = float(x), float(y), float(theta)
+        self.registry.pose_moved(self.name)
+        return True
+
+
+class NodeRegistry:
+    """
+    O(1) name -> node dict and name -> pose slot lookups.
+
+    Build it once after the environment has populated ``nodes`` and ``poses``
+    and pass it to the affection / collision helpers through their
+    ``registry`` argument. Names are matched case-insensitively, like the
+    recursive ``find_*`` helpers in ``affections.py``.
+    ``cell_size`` (the environment's cellSizeCm) enables ``spatial``;
+    ``rng`` (a RandomStreams) gives every sensor its own seeded noise stream.
+    """
+
+    def __init__(self, nodes=None, poses=None, cell_size=None, rng=None):
+        self.nodes = {}
+        self.poses = {}
+        self.spatial = SpatialHash(cell_size) if cell_size else None
+        self.rng = rng
+        # name -> registration index, to return spatial hits in tree order
+        self._order = {}
+        # cached max ``properties.range`` per bucket / affected property
+        self._max_range = {}
+        # name -> last (x, y, theta) seen by pose_moved
+        self._last_pose = {}
+        # name -> pose / value version
+        self._pose_versions = {}
+        self._value_versions = {}
+        # ("bucket", meta key) / ("affects", prop) -> version
+        self._versions = {}
+        # advances whenever a node is added or replaced (not when one moves)
+        self.structure_version = 0
+        # sensor name -> (input versions, result); see check_affectability
+        self.affection_cache = {}
+        # sensor name -> (input versions, clean luminosity); see compute_luminosity
+        self.luminosity_cache = {}
+        # world outlines keyed on pose versions, see utils/shapes.py
+        self.shapes = ShapeCache(self)
+        # (observer, name) -> pose the observer last checked, see sweep_from()
+        self._sweep_origins = {}
+        # SweepAndPrune kept between detect_collisions ticks
+        self.broadphase = None
+        # optional StaticInfluenceTable emitted by env_to_vcode
+        self.static_influences = None
+        # optional TransformTree driving nested pose propagation
+        self.transforms = None
+        # optional OccupancyGrid baked from the static obstacles
+        self.occupancy = None
+        # optional VisibilityIndex for occlusion-aware sensors
+        self.visibility = None
+        # optional FieldEngine answering ranged property readings
+        self.fields = None
+        # optional DiffusionEngine, takes precedence over ``fields``
+        self.physics = None
+        # (class, type, subtype) -> [node dicts], None parts are wildcards
+        self._by_meta = {}
+        # affected property id -> [source entries], see affect_entries()
+        self._affects = {}
+        # affected property id -> {name: source entry}
+        self._affects_by_name = {}
+        # name -> affected property ids of that node
+        self._node_affects = {}
+        # name -> compiled properties.noise, see compile_noise()
+        self._noise = {}
+        if nodes is not None or poses is not None:
+            self.build(nodes or {}, poses or {})
+
+    # ------------------------------------------------------------------
+    # Construction
+    # ------------------------------------------------------------------
+
+    def build(self, nodes, poses):
+        """(Re)index both hierarchies from scratch."""
+        self.nodes.clear()
+        self.poses.clear()
+        self._by_meta.clear()
+        self._affects.clear()
+        self._affects_by_name.clear()
+        self._node_affects.clear()
+        self._order.clear()
+        self._max_range.clear()
+        self._last_pose.clear()
+        self.affection_cache.clear()
+        self.structure_version += 1
+        if self.spatial is not None:
+            self.spatial.clear()
+        self._index_nodes(nodes)
+        self._index_poses(poses)
+        return self
+
+    def _index_nodes(self, section):
+        if not isinstance(section, dict):
+            return
+        if "class" in section and section.get("name"):
+            self.register_node(section)
+        for key, val in section.items():
+            if key in _NON_ENTITY_KEYS:
+                continue
+            if isinstance(val, dict):
+                self._index_nodes(val)
+
+    def _index_poses(self, section):
+        if not isinstance(section, dict):
+            return
+        for key, val in section.items():
+            if key in _NON_ENTITY_KEYS or not isinstance(val, dict):
+                continue
+            if _is_pose_slot(val):
+                self.register_pose(key, val)
+            self._index_poses(val)
+
+    # ------------------------------------------------------------------
+    # Incremental updates
+    # ------------------------------------------------------------------
+
+    def register_node(self, node):
+        """Add (or replace) a node dict, keyed by its ``name``."""
+        name = node["name"].lower()
+        old = self.nodes.get(name)
+        if old is node:
+            return
+        if old is not None:
+            self._touch(old)
+            self._unbucket(old)
+        self.nodes[name] = node
+        self.structure_version += 1
+        self._order.setdefault(name, len(self._order))
+        self._max_range.clear()
+        for key in _meta_keys(_meta(node)):
+            self._by_meta.setdefault(key, []).append(node)
+        entries = affect_entries(node)
+        for prop, entry in entries.items():
+            self._affects.setdefault(prop, []).append(entry)
+            self._affects_by_name.setdefault(prop, {})[name] = entry
+        self._node_affects[name] = tuple(entries)
+        self._noise[name] = compile_noise(
+            (node.get("properties") or {}).get("noise"), self.stream(name))
+        self._touch(node)
+
+    def _unbucket(self, node):
+        for key in _meta_keys(_meta(node)):
+            bucket = self._by_meta.get(key)
+            if bucket is None:
+                continue
+            for i, n in enumerate(bucket):
+                if n is node:
+                    del bucket[i]
+                    break
+        for prop, entries in self._affects.items():
+            entries[:] = [e for e in entries if e["node"] is not node]
+        for by_name in self._affects_by_name.values():
+            by_name.pop(node["name"].lower(), None)
+
+    def register_pose(self, name, slot):
+        """Add (or replace) the pose slot dict that belongs to ``name``."""
+        self.poses[name.lower()] = slot
+        self.pose_moved(name)
+
+    def pose_moved(self, name):
+        """
+        Report that the slot of ``name`` may have changed: bumps its pose
+        version (and those of its buckets) if it really moved, and re-buckets
+        it in the spatial hash. Returns True on an actual change.
+        """
+        name = name.lower()
+        pose = self.get_pose(name)
+        key = (pose["x"], pose["y"], pose["theta"]) if pose else None
+        if self._last_pose.get(name, False) == key:
+            return False
+        self._last_pose[name] = key
+        self._pose_versions[name] = self._pose_versions.get(name, 0) + 1
+        node = self.nodes.get(name)
+        if node is not None:
+            self._touch(node)
+        if self.spatial is not None:
+            if pose is None:
+                self.spatial.remove(name)
+            else:
+                self.spatial.update(name, pose["x"], pose["y"])
+        return True
+
+    def set_value(self, name, value):
+        """
+        Write ``properties.value`` of ``name`` (e.g. an actuator's current
+        target) and bump its value version. Returns True on an actual change.
+        """
+        node = self.get_node(name)
+        if node is None:
+            return False
+        props = node.setdefault("properties", {})
+        if props.get("value") == value:
+            return False
+        props["value"] = value
+        name = name.lower()
+        self._value_versions[name] = self._value_versions.get(name, 0) + 1
+        self._touch(node)
+        return True
+
+    def _touch(self, node):
+        """Advance the versions of every bucket / property ``node`` feeds."""
+        for key in _meta_keys(_meta(node)):
+            vkey = ("bucket", key)
+            self._versions[vkey] = self._versions.get(vkey, 0) + 1
+        props = self._node_affects.get(node["name"].lower())
+        if props is None:
+            props = tuple(affect_entries(node))
+        for prop in props:
+            vkey = ("affects", prop)
+            self._versions[vkey] = self._versions.get(vkey, 0) + 1
+
+    # ------------------------------------------------------------------
+    # Versions
+    # ------------------------------------------------------------------
+
+    def pose_version(self, name):
+        return self._pose_versions.get((name or "").lower(), 0)
+
+    def value_version(self, name):
+        return self._value_versions.get((name or "").lower(), 0)
+
+    def bucket_version(self, cls=None, type=None, subtype=None):
+        """Changes whenever a member of ``find(cls, type, subtype)`` moves, changes value or is added."""
+        key = _meta_query(cls, type, subtype)
+        return self._versions.get(("bucket", key), 0)
+
+    def affects_version(self, prop):
+        """Changes whenever a source of ``prop`` moves, changes value or is added."""
+        return self._versions.get(("affects", prop.lower()), 0)
+
+    def sweep_from(self, observer, name, pose):
+        """
+        Pose of ``name`` when ``observer`` (e.g. a linear alarm) last checked
+        it, None the first time; remembers ``pose`` for the next call.
+        Continuous tests sweep the outline from there to ``pose``.
+        """
+        key = (observer, (name or "").lower())
+        previous = self._sweep_origins.get(key)
+        self._sweep_origins[key] = (
+            {"x": pose["x"], "y": pose["y"], "theta": pose["theta"]} if pose else None
+        )
+        return previous
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def get_node(self, name):
+        if not name:
+            return None
+        return self.nodes.get(name.lower())
+
+    def stream(self, name):
+        """Random stream of ``name``: its own seeded one with ``rng``, else the global modules."""
+        if self.rng is None:
+            return GLOBAL_RANDOM
+        return self.rng.stream(name)
+
+    def noise_model(self, name):
+        """Compiled noise callable of ``name`` (the identity if it has none)."""
+        return self._noise.get((name or "").lower(), compile_noise(None))
+
+    def find(self, cls=None, type=None, subtype=None):
+        """
+        Bucketed equivalent of ``find_nodes_by_metadata``: one dict lookup.
+        ``find()`` with no arguments is the cached list of all entities.
+        The returned list is shared; callers must not mutate it.
+        """
+        key = _meta_query(cls, type, subtype)
+        return self._by_meta.get(key, [])
+
+    def affecting(self, prop):
+        """Source entries (shared list) of every entity that can affect ``prop``."""
+        return self._affects.get(prop.lower(), [])
+
+    def max_range(self, cls=None, type=None, subtype=None):
+        """Largest ``properties.range`` among ``find(cls, type, subtype)``."""
+        key = ("find",) + _meta_query(cls, type, subtype)
+        if key not in self._max_range:
+            self._max_range[key] = max(
+                (_node_range(n) for n in self.find(cls, type, subtype)), default=0.0)
+        return self._max_range[key]
+
+    def max_affect_range(self, prop):
+        """Largest ``properties.range`` among the sources affecting ``prop``."""
+        key = ("affects", prop.lower())
+        if key not in self._max_range:
+            self._max_range[key] = max(
+                (_node_range(e["node"]) for e in self.affecting(prop)), default=0.0)
+        return self._max_range[key]
+
+    def _sorted_near(self, x, y, radius):
+        names = self.spatial.query_radius(x, y, radius)
+        names.sort(key=lambda n: self._order.get(n, len(self._order)))
+        return names
+
+    def find_near(self, x, y, radius, cls=None, type=None, subtype=None):
+        """
+        ``find(cls, type, subtype)`` restricted to entities positioned within
+        ``radius`` of (x, y). Requires ``spatial``; results keep tree order.
+        """
+        query = _meta_query(cls, type, subtype)
+        found = []
+        for name in self._sorted_near(x, y, radius):
+            node = self.nodes.get(name)
+            if node is not None and query in _meta_keys(_meta(node)):
+                found.append(node)
+        return found
+
+    def affecting_near(self, prop, x, y):
+        """
+        ``affecting(prop)`` restricted to sources close enough to (x, y) for
+        their own range to reach it. Requires ``spatial``.
+        """
+        by_name = self._affects_by_name.get(prop.lower())
+        if not by_name:
+            return []
+        return [
+            by_name[name]
+            for name in self._sorted_near(x, y, self.max_affect_range(prop))
+            if name in by_name
+        ]
+
+    def pose_handle(self, name):
+        """A PoseHandle bound to the current slot of ``name``."""
+        return PoseHandle(self, name)
+
+    def get_pose_slot(self, name):
+        """Return the live pose slot dict (not a copy) or None."""
+        if not name:
+            return None
+        return self.poses.get(name.lower())
+
+    def get_pose(self, name):
+        """
+        Return ``{"x", "y", "theta"}`` for ``name``, or None.
+        Same normalisation as ``find_pose_by_metadata``: the absolute pose if
+        one has been computed, otherwise the stored relative pose.
+        """
+        slot = self.get_pose_slot(name)
+        if slot is None:
+            return None
+        if all(k in slot for k in POSE_KEYS):
+            return {"x": slot["x"], "y": slot["y"], "theta": slot["theta"]}
+        rel = slot.get("rel_pose")
+        if isinstance(rel, dict) and all(k in rel for k in POSE_KEYS):
+            return {"x": rel["x"], "y": rel["y"], "theta": rel["theta"]}
+        return None
+
+    def __contains__(self, name):
+        return isinstance(name, str) and name.lower() in self.nodes
+
+    def __len__(self):
+        return len(self.nodes)
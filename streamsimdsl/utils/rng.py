@@ -0,0 +1,92 @@
+"""
+Reproducible random streams for sensor noise.
+
+One scenario seed feeds a ``numpy.random.SeedSequence``; every sensor gets
+its own child stream, keyed by a stable hash of its name, so a sensor's
+samples depend only on the seed and its own draw count, never on how the
+node threads interleave. Streams draw standard normals / uniforms in blocks
+and hand them out scaled, which is much cheaper per sample than one
+``random`` call (and one global lock) each.
+"""
+import threading
+import zlib
+import numpy as np
+
+BLOCK_SIZE = 256
+
+
+class SampleStream:
+    """Block-buffered normal / uniform samples from one Generator."""
+
+    def __init__(self, generator, block_size=BLOCK_SIZE):
+        self.generator = generator
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._normals = np.empty(0)
+        self._uniforms = np.empty(0)
+
+    def _take(self, kind, n):
+        with self._lock:
+            buf = self._normals if kind == "normal" else self._uniforms
+            if len(buf) < n:
+                size = max(self.block_size, n - len(buf))
+                if kind == "normal":
+                    fresh = self.generator.standard_normal(size)
+                else:
+                    fresh = self.generator.random(size)
+                buf = np.concatenate((buf, fresh))
+            out, buf = buf[:n], buf[n:]
+            if kind == "normal":
+                self._normals = buf
+            else:
+                self._uniforms = buf
+            return out
+
+    def normal(self, mean=0.0, std=1.0, size=None):
+        """Gaussian sample(s); a float for size=None, else an array of that shape."""
+        n = 1 if size is None else int(np.prod(size))
+        z = mean + std * self._take("normal", n)
+        return float(z[0]) if size is None else z.reshape(size)
+
+    def uniform(self, low=0.0, high=1.0, size=None):
+        """Uniform sample(s) in [low, high)."""
+        n = 1 if size is None else int(np.prod(size))
+        u = low + (high - low) * self._take("uniform", n)
+        return float(u[0]) if size is None else u.reshape(size)
+
+    def random(self, size=None):
+        """Uniform sample(s) in [0, 1), like ``random.random``."""
+        return self.uniform(0.0, 1.0, size)
+
+    def sign(self, size=None):
+        """-1.0 or 1.0 with equal probability."""
+        u = self.uniform(0.0, 1.0, size)
+        return np.where(u < 0.5, -1.0, 1.0) if size is not None else (-1.0 if u < 0.5 else 1.0)
+
+
+class RandomStreams:
+    """
+    Per-environment RNG service: ``stream(name)`` returns the independent
+    SampleStream of sensor ``name``, created on first use. seed=None draws
+    fresh OS entropy (non-reproducible runs); ``entropy`` then records it.
+    """
+
+    def __init__(self, seed=None, block_size=BLOCK_SIZE):
+        self.seed_sequence = np.random.SeedSequence(seed)
+        self.entropy = self.seed_sequence.entropy
+        self.block_size = block_size
+        self._streams = {}
+        self._lock = threading.Lock()
+
+    def stream(self, name):
+        key = (name or "").lower()
+        stream = self._streams.get(key)
+        if stream is None:
+            with self._lock:
+                stream = self._streams.get(key)
+                if stream is None:
+                    seq = np.random.SeedSequence(
+                        self.entropy, spawn_key=(zlib.crc32(key.encode()),))
+                    stream = SampleStream(np.random.default_rng(seq), self.block_size)
+                    self._streams[key] = stream
+        return stream
@@ -0,0 +1,138 @@
+"""
+Cached world-space outlines of entity shapes.
+
+``get_shape_world_points`` rebuilds the local vertex list (a 16-gon per
+circle) and transforms it on every call, and collisions, the linear alarm,
+LiDAR, visibility and diffusion all ask for the same outlines every tick.
+``ShapeCache`` builds each shape's local vertices once, as a NumPy array,
+and keeps each entity's world outline until its pose version moves on; a
+static obstacle is therefore transformed exactly once.
+
+The outlines are the exact same floats ``get_shape_world_points`` returns.
+Returned lists and arrays are shared between callers and must not be
+mutated.
+"""
+import math
+import numpy as np
+from streamsimdsl.utils.geometry import get_shape_world_points, shape_local_points
+
+
+def is_convex(pts):
+    """True when the closed polygon (K, 2) turns one way only (collinear edges allowed)."""
+    pts = np.asarray(pts, dtype=float).reshape(-1, 2)
+    if len(pts) < 3:
+        return False
+    e = np.roll(pts, -1, axis=0) - pts
+    cross = e[:, 0] * np.roll(e[:, 1], -1) - e[:, 1] * np.roll(e[:, 0], -1)
+    scale = max(np.abs(cross).max(), 1e-12)
+    cross = cross[np.abs(cross) > 1e-9 * scale]
+    return bool(len(cross)) and (bool((cross > 0).all()) or bool((cross < 0).all()))
+
+
+def convex_hull(points):
+    """Counter-clockwise convex hull (H, 2) of a point set (Andrew's monotone chain)."""
+    pts = sorted(set(map(tuple, np.asarray(points, dtype=float).reshape(-1, 2).tolist())))
+    if len(pts) < 3:
+        return np.asarray(pts, dtype=float).reshape(-1, 2)
+
+    def half(seq):
+        chain = []
+        for p in seq:
+            while len(chain) >= 2 and (
+                (chain[-1][0] - chain[-2][0]) * (p[1] - chain[-2][1])
+                - (chain[-1][1] - chain[-2][1]) * (p[0] - chain[-2][0])
+            ) <= 0:
+                chain.pop()
+            chain.append(p)
+        return chain[:-1]
+
+    return np.asarray(half(pts) + half(reversed(pts)), dtype=float)
+
+
+def swept_outline(poly_from, poly_to):
+    """
+    Area covered moving an outline from one pose to the next: the convex
+    hull of both. Exact for a translating convex shape, a close bound when
+    it also turns.
+    """
+    return convex_hull(np.vstack((
+        np.asarray(poly_from, dtype=float).reshape(-1, 2),
+        np.asarray(poly_to, dtype=float).reshape(-1, 2),
+    )))
+
+
+class ShapeCache:
+    """Local vertices per shape and world outlines per entity of a NodeRegistry."""
+
+    def __init__(self, registry=None):
+        self.registry = registry
+        # id(shape) -> (shape, (K, 2) local vertices or None)
+        self._local = {}
+        # id(shape) -> (shape, convex?)
+        self._convex = {}
+        # entity name -> (key, (K, 2) world vertices, [(x, y), ...])
+        self._world = {}
+
+    def local(self, shape):
+        """(K, 2) shape-local vertices, or None for shapes without an outline."""
+        hit = self._local.get(id(shape))
+        if hit is not None and hit[0] is shape:
+            return hit[1]
+        pts = shape_local_points(shape)
+        arr = np.asarray(pts, dtype=float).reshape(-1, 2) if pts is not None else None
+        self._local[id(shape)] = (shape, arr)
+        return arr
+
+    def convex(self, shape):
+        """True when the shape's outline is a convex polygon."""
+        hit = self._convex.get(id(shape))
+        if hit is not None and hit[0] is shape:
+            return hit[1]
+        local = self.local(shape)
+        result = local is not None and is_convex(local)
+        self._convex[id(shape)] = (shape, result)
+        return result
+
+    def _entry(self, name, pose, shape):
+        name = (name or "").lower()
+        x, y, theta = pose.get("x", 0.0), pose.get("y", 0.0), pose.get("theta", 0.0)
+        version = self.registry.pose_version(name) if self.registry is not None else None
+        # the pose itself guards slots mutated without pose_moved
+        key = (version, x, y, theta, id(shape))
+        hit = self._world.get(name)
+        if hit is not None and hit[0] == key:
+            return hit
+        local = self.local(shape)
+        if local is None:
+            entry = (key, np.zeros((0, 2)), [])
+        else:
+            th = math.radians(theta)
+            cos_t, sin_t = math.cos(th), math.sin(th)
+            world = np.empty_like(local)
+            world[:, 0] = x + (local[:, 0] * cos_t - local[:, 1] * sin_t)
+            world[:, 1] = y + (local[:, 0] * sin_t + local[:, 1] * cos_t)
+            entry = (key, world, [tuple(p) for p in world.tolist()])
+        self._world[name] = entry
+        return entry
+
+    def world(self, name, pose, shape):
+        """``get_shape_world_points(pose, shape)`` of entity `name`, cached."""
+        return self._entry(name, pose, shape)[2]
+
+    def world_array(self, name, pose, shape):
+        """The same outline as a (K, 2) array."""
+        return self._entry(name, pose, shape)[1]
+
+    def forget(self, name):
+        self._world.pop((name or "").lower(), None)
+
+
+def world_points(pose, shape, registry=None, name=None):
+    """
+    World outline of an entity: from the registry's ShapeCache when one is
+    available and the entity is named, otherwise computed afresh.
+    """
+    shapes = getattr(registry, "shapes", None)
+    if shapes is not None and name:
+        return shapes.world(name, pose, shape)
+    return get_shape_world_points(pose, shape)
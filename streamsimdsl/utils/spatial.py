@@ -0,0 +1,101 @@
+"""
+Uniform-grid spatial hash over entity positions.
+
+Cells are ``cell_size`` wide, normally the environment's ``Grid.cellSizeCm``.
+Entities are stored by name in the cell their pose falls into and moved
+between cells as poses change, so a radius query only touches the entities
+of the cells it overlaps.
+
+Because the grid cell of a ``.env`` is often small compared to sensor
+ranges (1cm cells with 3m ranges in ``home.env``), a query iterates
+whichever is cheaper: the cells covered by its bounding box, or the
+occupied cells.
+"""
+import math
+
+
+class SpatialHash:
+    def __init__(self, cell_size=1.0):
+        self.cell_size = float(cell_size) if cell_size and cell_size > 0 else 1.0
+        # (i, j) -> {name: (x, y)}
+        self._cells = {}
+        # name -> (i, j)
+        self._where = {}
+
+    def _cell(self, x, y):
+        return (math.floor(x / self.cell_size), math.floor(y / self.cell_size))
+
+    def update(self, name, x, y):
+        """Insert ``name`` at (x, y), or move it there."""
+        if x is None or y is None or math.isnan(x) or math.isnan(y):
+            self.remove(name)
+            return
+        cell = self._cell(x, y)
+        old = self._where.get(name)
+        if old is not None and old != cell:
+            bucket = self._cells[old]
+            del bucket[name]
+            if not bucket:
+                del self._cells[old]
+        self._cells.setdefault(cell, {})[name] = (x, y)
+        self._where[name] = cell
+
+    def remove(self, name):
+        cell = self._where.pop(name, None)
+        if cell is None:
+            return
+        bucket = self._cells[cell]
+        bucket.pop(name, None)
+        if not bucket:
+            del self._cells[cell]
+
+    def clear(self):
+        self._cells.clear()
+        self._where.clear()
+
+    def position(self, name):
+        cell = self._where.get(name)
+        if cell is None:
+            return None
+        return self._cells[cell][name]
+
+    def query_radius(self, x, y, radius):
+        """Names of the entities within ``radius`` of (x, y), distance inclusive."""
+        if radius is None or radius < 0:
+            return []
+        found = []
+        if math.isinf(radius):
+            for bucket in self._cells.values():
+                found.extend(bucket)
+            return found
+
+        i0, j0 = self._cell(x - radius, y - radius)
+        i1, j1 = self._cell(x + radius, y + radius)
+        n_cells = (i1 - i0 + 1) * (j1 - j0 + 1)
+
+        if n_cells <= len(self._cells):
+            cells = (
+                self._cells.get((i, j))
+                for i in range(i0, i1 + 1)
+                for j in range(j0, j1 + 1)
+            )
+        else:
+            cells = (
+                bucket for (i, j), bucket in self._cells.items()
+                if i0 <= i <= i1 and j0 <= j <= j1
+            )
+
+        for bucket in cells:
+            if not bucket:
+                continue
+            for name, (px, py) in bucket.items():
+                # same formula as calc_distance, so range edges agree exactly
+                if math.sqrt((px - x) ** 2 + (py - y) ** 2) <= radius:
+                    found.append(name)
+        return found
+
+    def __len__(self):
+        return len(self._where)
+
+    def __contains__(self, name):
+        return name in self._where
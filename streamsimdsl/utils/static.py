@@ -0,0 +1,95 @@
+"""
+Influence tables for entities that never move.
+
+Most placements in an ``.env`` model (wall-mounted sensors, thermostats,
+fires) keep the pose they were placed at. ``env_to_vcode`` classifies them
+as static, computes the dispersed progress of every static sensor / static
+source pair once at generation time with the same kernels as the batch
+engine, and emits the result into the generated environment. At runtime
+``ranged_property_value`` takes a pair's progress from the table while both
+endpoints are still where the model put them and evaluates the geometry only
+for pairs with a moving endpoint or missing from the table.
+"""
+import numpy as np
+from streamsimdsl.utils.registry import affect_entries
+from streamsimdsl.utils.batch import ranged_affection_matrix, apply_dispersion_columns
+
+
+def build_static_influences(nodes, positions):
+    """
+    progress[prop][sensor][source] for every in-range pair of static nodes.
+
+    nodes: node dicts (class/type/subtype/name/properties, as emitted into
+    the environment); positions: name -> (x, y) of every static node.
+    Every checked pair is listed, out-of-range ones with an explicit 0.0.
+    """
+    sensors = [n for n in nodes if (n.get("class") or "").lower() == "sensor"]
+    sensor_names = [n["name"].lower() for n in sensors]
+    if not sensors:
+        return {}
+    sensor_xy = [positions[name] for name in sensor_names]
+
+    by_prop = {}
+    for node in nodes:
+        for prop, entry in affect_entries(node).items():
+            by_prop.setdefault(prop, []).append(entry)
+
+    progress = {}
+    for prop, entries in by_prop.items():
+        src_names = [e["node"]["name"].lower() for e in entries]
+        ranges = [(e["node"].get("properties") or {}).get("range", 0.0) or 0.0 for e in entries]
+        _, weight, in_range = ranged_affection_matrix(
+            sensor_xy, [positions[n] for n in src_names], ranges)
+        in_range &= np.array(sensor_names, dtype=object)[:, None] != np.array(src_names, dtype=object)[None, :]
+        prog = apply_dispersion_columns(weight, in_range, [e["disperse"] for e in entries])
+
+        checked = np.array(sensor_names, dtype=object)[:, None] != np.array(src_names, dtype=object)[None, :]
+        table = {}
+        for i, k in zip(*np.nonzero(checked)):
+            table.setdefault(sensor_names[i], {})[src_names[k]] = float(prog[i, k])
+        if table:
+            progress[prop] = table
+    return progress
+
+
+class StaticInfluenceTable:
+    """
+    Generated static progress table plus the codegen positions it is valid
+    for. A pair is answered from the table only while both endpoints are
+    still at those positions; moved entities fall back to live evaluation.
+    """
+
+    def __init__(self, positions, progress):
+        self.positions = {name.lower(): tuple(xy) for name, xy in positions.items()}
+        self.progress_table = progress
+        # name -> (pose version, still at its codegen position)
+        self._checked = {}
+
+    def unmoved(self, registry, name):
+        name = (name or "").lower()
+        pos = self.positions.get(name)
+        if pos is None:
+            return False
+        version = registry.pose_version(name)
+        checked = self._checked.get(name)
+        if checked is not None and checked[0] == version:
+            return checked[1]
+        pose = registry.get_pose(name)
+        ok = pose is not None and (pose["x"], pose["y"]) == pos
+        self._checked[name] = (version, ok)
+        return ok
+
+    def progress(self, registry, prop, sensor_name, source_name):
+        """
+        Precomputed progress of `source_name` on `sensor_name` for `prop`
+        (0.0 for static pairs out of range), or None when the pair must be
+        evaluated live: either endpoint is dynamic or has moved, or the
+        pair was never checked at generation time.
+        """
+        if not (self.unmoved(registry, sensor_name) and self.unmoved(registry, source_name)):
+            return None
+        return (
+            self.progress_table.get(prop.lower(), {})
+            .get(sensor_name.lower(), {})
+            .get(source_name.lower())
+        )
@@ -0,0 +1,161 @@
+"""
+Array-backed transform tree over the nested ``poses`` dict.
+
+Every posed entity becomes one row of three arrays kept in depth-first
+(pre-)order: ``parent`` (row index, -1 for top-level entities), ``rel``
+(the child's ``rel_pose``) and ``abs`` (its absolute pose). Because of the
+ordering, the descendants of row k are exactly the contiguous rows
+``k + 1 : end[k]``, so moving a composite recomputes its whole subtree with
+one ``compose_poses`` call per tree level instead of walking and searching
+the nested dicts the way ``recurse()`` does.
+
+The arrays are the source of truth for nested children; the nested dict
+slots stay as the view templates, tests and the NodeRegistry read, and are
+written from the arrays after every move (``sync``). The tree follows the
+rules of ``recurse()``: inside an entity only slots carrying a ``rel_pose``
+are moved with it, and any other dict level passes its parent through.
+"""
+import numpy as np
+from streamsimdsl.utils.geometry import compose_poses
+
+POSE_KEYS = ("x", "y", "theta")
+
+# Sub-dicts of a pose slot that never contain other entities
+_NON_ENTITY_KEYS = ("shape", "properties", "rel_pose", "initial_pose", "start", "end")
+
+
+def _has_pose(d):
+    return isinstance(d, dict) and all(k in d for k in POSE_KEYS)
+
+
+class TransformTree:
+    """Parent / relative / absolute pose arrays of every posed entity, in DFS order."""
+
+    def __init__(self, poses=None):
+        self.names = []
+        self.slots = []
+        self.index = {}
+        self.parent = np.zeros(0, dtype=int)
+        self.depth = np.zeros(0, dtype=int)
+        self.end = np.zeros(0, dtype=int)
+        self.rel = np.zeros((0, 3))
+        self.abs = np.zeros((0, 3))
+        # row -> [(rows, parent rows), ...] per level below it
+        self._levels = {}
+        if poses is not None:
+            self.build(poses)
+
+    def __contains__(self, name):
+        return isinstance(name, str) and name.lower() in self.index
+
+    def __len__(self):
+        return len(self.names)
+
+    # ------------------------------------------------------------------
+    # Construction
+    # ------------------------------------------------------------------
+
+    def build(self, poses):
+        """(Re)build the arrays from the nested dict."""
+        names, slots, parent, depth, rel, end = [], [], [], [], [], []
+
+        def walk(section, up, level):
+            for key, val in section.items():
+                if key in _NON_ENTITY_KEYS or not isinstance(val, dict):
+                    continue
+                # top level: any pose slot; below an entity: rel_pose children
+                entity = _has_pose(val.get("rel_pose")) if up >= 0 else (
+                    _has_pose(val) or _has_pose(val.get("rel_pose")))
+                if not entity:
+                    walk(val, up, level)
+                    continue
+                k = len(names)
+                names.append(key.lower())
+                slots.append(val)
+                parent.append(up)
+                depth.append(level)
+                r = val.get("rel_pose")
+                rel.append([r[p] for p in POSE_KEYS] if _has_pose(r) else [0.0, 0.0, 0.0])
+                end.append(None)
+                walk(val, k, level + 1)
+                end[k] = len(names)
+
+        walk(poses if isinstance(poses, dict) else {}, -1, 0)
+        self.names, self.slots = names, slots
+        self.index = {name: k for k, name in enumerate(names)}
+        self.parent = np.asarray(parent, dtype=int)
+        self.depth = np.asarray(depth, dtype=int)
+        self.end = np.asarray(end, dtype=int)
+        self.rel = np.asarray(rel, dtype=float).reshape(-1, 3)
+        self.abs = np.array([
+            [s.get(p, r[i]) for i, p in enumerate(POSE_KEYS)]
+            for s, r in zip(slots, self.rel)
+        ], dtype=float).reshape(-1, 3)
+        self._levels = {}
+        return self
+
+    def _subtree_levels(self, k):
+        levels = self._levels.get(k)
+        if levels is None:
+            rows = np.arange(k + 1, self.end[k])
+            levels = []
+            for d in np.unique(self.depth[rows]):
+                at = rows[self.depth[rows] == d]
+                levels.append((at, self.parent[at]))
+            self._levels[k] = levels
+        return levels
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+
+    def move(self, name, x, y, theta):
+        """
+        Set the absolute pose of `name` and recompute its descendants, one
+        vectorised composition per level. Returns the affected row range.
+        """
+        k = self.index[name.lower()]
+        self.abs[k] = (x, y, theta)
+        for rows, parents in self._subtree_levels(k):
+            self.abs[rows] = compose_poses(self.abs[parents], self.rel[rows])
+        return k, int(self.end[k])
+
+    def place(self, name, names, poses):
+        """
+        Apply one subtree snapshot: move `name`, then overwrite the rows of
+        the descendants listed in `names` with their reported absolute
+        `poses` (N, 3); unlisted descendants keep the composed pose and
+        unknown names are ignored. Returns the affected row range for
+        ``sync``.
+        """
+        k = self.index[name.lower()]
+        poses = np.asarray(poses, dtype=float).reshape(-1, 3)
+        rows = [self.index.get(n.lower(), -1) for n in names]
+        root = [i for i, r in enumerate(rows) if r == k]
+        start, stop = self.move(name, *(poses[root[0]] if root else self.abs[k]))
+        at = np.asarray(rows, dtype=int)
+        inside = (at > start) & (at < stop)
+        self.abs[at[inside]] = poses[inside]
+        return start, stop
+
+    def sync(self, rows, registry=None):
+        """Write the absolute poses of a row range back into the dict slots."""
+        start, stop = rows
+        for k, (x, y, theta) in enumerate(self.abs[start:stop].tolist(), start):
+            slot = self.slots[k]
+            slot["x"], slot["y"], slot["theta"] = x, y, theta
+            if registry is not None:
+                registry.pose_moved(self.names[k])
+
+    def pose(self, name):
+        """{"x", "y", "theta"} of `name` from the arrays, or None."""
+        k = self.index.get((name or "").lower())
+        if k is None:
+            return None
+        x, y, theta = self.abs[k].tolist()
+        return {"x": x, "y": y, "theta": theta}
+
+    def subtree(self, name):
+        """Names of `name` and all its descendants, in DFS order."""
+        k = self.index[name.lower()]
+        return self.names[k:self.end[k]]
@@ -1,43 +1,159 @@
 from os.path import dirname, join
-import time, math, random
+import time, math, random, json
+import numpy as np
 
 THIS_DIR = dirname((dirname(__file__)))
 MODEL_REPO_PATH = join(THIS_DIR, 'models')
 GENFILES_REPO_PATH = join(THIS_DIR, 'generated_files')
 TEMPLATES_PATH = join(THIS_DIR, 'templates')
 
-def apply_dispersion(x: float, type_name: str, **params) -> float:
+def _model_params(model):
+    """(type name, params) of a dispersion / noise model given as dict or textX object."""
+    if isinstance(model, dict):
+        return model.get("type", ""), {k: v for k, v in model.items() if k != "type"}
+    params = {
+        k: v for k, v in vars(model).items()
+        if not k.startswith("_") and k not in ("parent", "ref")
+    }
+    return model.__class__.__name__, params
+
+def _clamp01(x):
+    if isinstance(x, np.ndarray):
+        return np.clip(x, 0.0, 1.0)
+    return max(0.0, min(1.0, x))
+
+def compile_dispersion(dispersion):
     """
-    x must be in [0,1].
-    Output must stay in [0,1].
+    Bind a DispersionType model (dict or textX object) to a callable
+    f(x) -> progress, x in [0,1], output clamped to [0,1].
+
+    The callable accepts a float or a NumPy array of weights. None compiles to
+    the clamped identity.
     """
-    x = max(0.0, min(1.0, x))
+    if not dispersion:
+        return _clamp01
+    type_name, params = _model_params(dispersion)
+    type_name = type_name.capitalize()
+
     if type_name == "Constant":
-        disp = params.get("value", x)
-    
+        value = params.get("value")
+        def disp(x):
+            if value is None:
+                return x
+            return np.full_like(x, value, dtype=float) if isinstance(x, np.ndarray) else value
+
     elif type_name == "Linear":
         start = params.get("start", 0.0)
-        end   = params.get("end", 1.0)
-        disp = start + (end - start) * x
-    
+        span = params.get("end", 1.0) - start
+        disp = lambda x: start + span * x
+
     elif type_name == "Quadratic":
         a = params.get("a", 0.0)
         b = params.get("b", 0.0)
         c = params.get("c", 0.0)
-        disp = a * x**2 + b * x + c
+        disp = lambda x: a * x**2 + b * x + c
+
     elif type_name == "Exponential":
         base = params.get("base", math.e)
         y_int = params.get("yIntercept", 0.0)
-        disp = y_int + base ** x
+        disp = lambda x: y_int + base ** x
+
     elif type_name == "Logarithmic":
         base = params.get("base", math.e)
         alpha = params.get("alpha", 1.0)
-        disp = alpha * math.log(x + 1, base)
+        scale = alpha / math.log(base)
+        def disp(x):
+            if isinstance(x, np.ndarray):
+                return scale * np.log1p(x)
+            return scale * math.log1p(x)
     else:
         raise ValueError(f"Unknown dispersion type: {type_name}")
-    
-    # clamp to [0,1] always
-    return max(0.0, min(1.0, disp))
+
+    def dispersed(x):
+        return _clamp01(disp(_clamp01(x)))
+    return dispersed
+
+def _identity(value):
+    return value
+
+class _GlobalRandom:
+    """SampleStream interface (see utils/rng.py) over the global random modules."""
+
+    def normal(self, mean=0.0, std=1.0, size=None):
+        return random.gauss(mean, std) if size is None else np.random.normal(mean, std, size)
+
+    def uniform(self, low=0.0, high=1.0, size=None):
+        return random.uniform(low, high) if size is None else np.random.uniform(low, high, size)
+
+    def random(self, size=None):
+        return random.random() if size is None else np.random.random(size)
+
+    def sign(self, size=None):
+        if size is None:
+            return random.choice([-1.0, 1.0])
+        return np.random.choice([-1.0, 1.0], size)
+
+GLOBAL_RANDOM = _GlobalRandom()
+
+def _size(value):
+    """Sample shape for `value`: None for scalars, the array shape otherwise."""
+    return np.shape(value) or None
+
+def compile_noise(noise, stream=None):
+    """
+    Bind a Noise model (Gaussian, Uniform, CustomNoise; dict or textX object)
+    to a callable f(value) -> noisy value.
+
+    The callable accepts a float or a NumPy array, in which case one sample is
+    drawn per element. Anything that is not a noise model (None, 0.0, ...)
+    compiles to the identity. Samples come from `stream`, a per-sensor
+    SampleStream, or from the global random modules without one.
+    """
+    if noise is None or isinstance(noise, (int, float, str)):
+        return _identity
+    stream = stream or GLOBAL_RANDOM
+    ntype, params = _model_params(noise)
+    ntype = ntype.capitalize()
+
+    if ntype == "Gaussian":
+        mean = params.get("mean", 0.0)
+        std = params.get("std", 0.0)
+        return lambda value: value + stream.normal(mean, std, _size(value))
+
+    if ntype == "Uniform":
+        nmin = params.get("min", 0.0)
+        nmax = params.get("max", 0.0)
+        return lambda value: value + stream.uniform(nmin, nmax, _size(value))
+
+    # CustomNoise: the generated dict carries the custom kind in "type"
+    if ntype == "Customnoise":
+        ctype = (params.get("type") or "").lower()
+    else:
+        ctype = ntype.lower()
+    cparams = params.get("params") or {}
+    if isinstance(cparams, str):
+        try:
+            cparams = json.loads(cparams)
+        except ValueError:
+            cparams = {}
+
+    if ctype == "sine":
+        amp = cparams.get("amp", 1.0)
+        freq = cparams.get("freq", 1.0)
+        return lambda value: value + amp * math.sin(freq * time.monotonic())
+    if ctype == "step":
+        step = cparams.get("step", 1.0)
+        return lambda value: value + stream.sign(_size(value)) * step
+    # Unknown custom model: value unchanged
+    return _identity
+
+def apply_dispersion(x: float, type_name: str, **params) -> float:
+    """
+    x must be in [0,1].
+    Output must stay in [0,1].
+    Hot paths should compile the model once with compile_dispersion.
+    """
+    return compile_dispersion({"type": type_name, **params})(x)
 
 def apply_noise(value: float, noise: dict) -> float:
     """
@@ -57,47 +173,7 @@ def apply_noise(value: float, noise: dict) -> float:
     -------
     float
         The noisy value.
+
+    Hot paths should compile the model once with compile_noise.
     """
-    # No noise model provided
-    if noise is None:
-        return value
-    
-    # If caller passed 0.0, 1.0, etc. instead of a dict, keep value unchanged
-    if not isinstance(noise, dict):
-        return value
-    
-    ntype = noise.get("type", "").capitalize()
-
-    # === Gaussian(mean, std) ===
-    if ntype == "Gaussian":
-        mean = noise.get("mean", 0.0)
-        std = noise.get("std", 0.0)
-        result = value + random.gauss(mean, std)
-
-    # === Uniform(min, max) ===
-    elif ntype == "Uniform":
-        nmin = noise.get("min", 0.0)
-        nmax = noise.get("max", 0.0)
-        result = value + random.uniform(nmin, nmax)
-
-    # === CustomNoise(type, params) ===
-    elif ntype == "Customnoise":
-        ctype = noise.get("type", "").lower()
-        params = noise.get("params", {})
-
-        # Example extension for common custom types
-        if ctype == "sine":
-            amp = params.get("amp", 1.0)
-            freq = params.get("freq", 1.0)
-            t = time.monotonic()
-            result = value + amp * math.sin(freq * t)
-        elif ctype == "step":
-            step = params.get("step", 1.0)
-            result = value + (random.choice([-1, 1]) * step)
-        else:
-            # Unknown custom model — return unchanged
-            result = value
-    else:
-        result = value
-    # === Fallback ===
-    return result
+    return compile_noise(noise)(value)